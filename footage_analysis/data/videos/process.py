@@ -1,6 +1,9 @@
 from __future__ import annotations
 import argparse
 import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Tuple
@@ -89,6 +92,220 @@ def compute_crop(
     return x1, y1, x2, y2
 
 
+class FrameStore:
+    """Append-only file of equally sized frames. Reads go through one reused buffer, so a
+    clip's ping-pong tail is served from disk (page cache) instead of a list in RAM.
+    """
+
+    def __init__(self, path: str | Path, shape: Tuple[int, ...]):
+        self.path = Path(path)
+        self.shape = tuple(shape)
+        self.count = 0
+        self._f = open(self.path, "w+b")
+        self._buf = np.empty(self.shape, dtype=np.uint8)
+
+    def append(self, frame: np.ndarray) -> None:
+        self._f.write(np.ascontiguousarray(frame, dtype=np.uint8).data)
+        self.count += 1
+
+    def get(self, i: int) -> np.ndarray:
+        """Frame `i`; valid until the next call."""
+        self._f.seek(i * self._buf.nbytes)
+        self._f.readinto(memoryview(self._buf).cast("B"))
+        return self._buf
+
+    def close(self) -> None:
+        self._f.close()
+        self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class _ClipState:
+    """One output clip while its source is being decoded."""
+    var: Variation
+    out_path: Path
+    start_seconds: float
+    start_idx: int
+    target_frames: int
+    freeze_frames: int
+    crop: Tuple[int, int, int, int]
+    writer: cv2.VideoWriter
+    keep: bool  # expected to outlast its source: rendered frames go to `store`
+    augment: ColorAugment
+    written: int = 0
+    forward: int = 0  # source frames rendered since start_idx
+    last: np.ndarray | None = None
+    store: FrameStore | None = None
+    rng: np.random.Generator | None = None  # freeze noise
+
+    @property
+    def done(self) -> bool:
+        return self.written >= self.target_frames
+
+
+def _render(frame: np.ndarray, st: _ClipState, size: Tuple[int, int]) -> np.ndarray:
+    x1, y1, x2, y2 = st.crop
+    return st.augment(cv2.resize(frame[y1:y2, x1:x2], size, interpolation=cv2.INTER_LINEAR))
+
+
+def _emit(st: _ClipState, frame: np.ndarray, report_every: int) -> None:
+    if st.last is None:
+        # minimal freeze at start (optional noise)
+        n_freeze = min(st.freeze_frames, st.target_frames)
+        noise = NoiseBank(frame.shape, st.var.freeze_noise_std, rng=st.rng) if n_freeze and st.var.freeze_noise_std > 0.0 else None
+        for _ in range(n_freeze):
+            st.writer.write(noise(frame) if noise is not None else frame)
+        st.written = st.freeze_frames
+    st.last = frame
+    if st.written < st.target_frames:
+        st.writer.write(frame)
+        st.written += 1
+        if st.written % report_every == 0:
+            logger.info(f"progress {st.out_path.name}: {st.written}/{st.target_frames} frames")
+
+
+def write_source_variants(
+    source_video: str | Path,
+    jobs: List[Tuple[Variation, Path, float]],
+    target_seconds: float,
+    center_xy: Tuple[float, float] | None = None,
+    store_dir: str | Path | None = None,
+    rng: np.random.Generator | None = None,
+) -> List[Path]:
+    """Write every (variation, out_path, start_seconds) clip of one source in a single decode.
+
+    Each clip is a start freeze, the source played forward from its start, then ping-ponged
+    (forward/backward, endpoints once) until `target_seconds`. Decoding runs once from the
+    earliest start and each frame is rendered for every clip that has started. A clip that
+    will outlast its source appends its rendered frames to a `FrameStore` file under
+    `store_dir` and plays its ping-pong tail back from there, so memory stays at a few
+    frames regardless of source length. Freeze noise is drawn from `rng` (fresh entropy
+    when None). Returns the paths written.
+    """
+    source_video = Path(source_video)
+    meta = read_video_meta(source_video)
+    fps = meta.fps
+    size = (meta.width, meta.height)
+    if center_xy is None:
+        center_xy = (meta.width / 2.0, meta.height / 2.0)
+    # clamp starts like a seek would: at least ~0.2s before the end
+    last_start = max(0, meta.frame_count - max(1, int(round(0.2 * fps)))) if meta.frame_count > 0 else None
+    store_root = Path(store_dir or tempfile.gettempdir())
+
+    states: List[_ClipState] = []
+    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+    for var, out_path, start_seconds in jobs:
+        # first frame at or after the start time, as a millisecond seek lands
+        start_idx = max(0, int(math.ceil(start_seconds * fps - 1e-6)))
+        if last_start is not None:
+            start_idx = min(start_idx, last_start)
+        target_frames = int(round(target_seconds * fps))
+        freeze_frames = int(round(max(0.0, var.freeze_s) * fps))
+        # unknown length, or the source runs out (1s slack) before the target
+        keep = meta.frame_count <= 0 or freeze_frames + meta.frame_count - start_idx < target_frames + fps
+        writer = cv2.VideoWriter(str(out_path), fourcc, fps, size)
+        if not writer.isOpened():
+            logger.error(f"Could not open writer: {out_path}")
+            continue
+        st = _ClipState(
+            var=var,
+            out_path=Path(out_path),
+            start_seconds=start_idx / max(1.0, fps),
+            start_idx=start_idx,
+            target_frames=target_frames,
+            freeze_frames=freeze_frames,
+            crop=compute_crop(meta.width, meta.height, center_xy, var.zoom, var.offset),
+            writer=writer,
+            keep=keep,
+            augment=ColorAugment.from_variation(var),
+            rng=rng,
+        )
+        states.append(st)
+        logger.info(
+            f"start clip -> out={st.out_path.name} start={st.start_seconds:.2f}s zoom={var.zoom:.2f} "
+            f"offset=({var.offset[0]:+.2f},{var.offset[1]:+.2f}) target={target_seconds:.2f}s freeze_start={var.freeze_s:.2f}s "
+            f"crop={st.crop} alpha={var.alpha:.2f} beta={var.beta:.1f} gamma={var.gamma:.2f} sat={var.sat:.2f}"
+        )
+    if not states:
+        return []
+
+    report_every = max(1, int(fps * 10))  # ~every 10 seconds
+    cap = cv2.VideoCapture(str(source_video))
+    try:
+        if not cap.isOpened():
+            raise RuntimeError(f"Could not open video: {source_video}")
+        idx = min(st.start_idx for st in states)
+        if idx > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+        ok, frame = cap.read()
+        if not ok and idx > 0:
+            # seek failed; decode from the top instead
+            cap.release()
+            cap = cv2.VideoCapture(str(source_video))
+            idx = 0
+            ok, frame = cap.read()
+        if not ok:
+            raise RuntimeError("no frames in source video (seek failed and start failed)")
+
+        # single forward pass shared by all clips
+        while ok:
+            pending = False
+            for st in states:
+                if idx < st.start_idx:
+                    pending = True
+                    continue
+                if st.done:
+                    continue
+                pending = True
+                processed = _render(frame, st, size)
+                if st.keep:
+                    if st.store is None:
+                        st.store = FrameStore(store_root / f"{st.out_path.stem}.{os.getpid()}.frames", processed.shape)
+                    st.store.append(processed)
+                _emit(st, processed, report_every)
+                st.forward += 1
+            if not pending:
+                break
+            ok, frame = cap.read()
+            idx += 1
+        cap.release()
+
+        # ping-pong tails: pingpong = frames + frames[-2:0:-1], continued where the forward pass stopped
+        for st in states:
+            if st.done:
+                continue
+            if st.last is None:
+                logger.error(f"no frames for {st.out_path.name}: source ended before {st.start_seconds:.2f}s")
+                continue
+            if st.store is None:
+                logger.warning(f"{st.out_path.name}: source shorter than reported; holding the last frame")
+                while not st.done:
+                    _emit(st, st.last, report_every)
+                continue
+            n = st.store.count
+            period = 2 * n - 2 if n > 1 else 1
+            k = n
+            while not st.done:
+                j = k % period
+                _emit(st, st.store.get(j if j < n else period - j), report_every)
+                k += 1
+    finally:
+        cap.release()
+        for st in states:
+            st.writer.release()
+            if st.store is not None:
+                st.store.close()
+
+    written = []
+    for st in states:
+        if st.last is None:
+            st.out_path.unlink(missing_ok=True)
+            continue
+        logger.info(f"done clip -> out={st.out_path.name}")
+        written.append(st.out_path)
+    return written
+
+
 def write_angle_clip(
     source_video: str | Path,
     out_path: str | Path,
@@ -104,105 +321,62 @@ def write_angle_clip(
     freeze_noise_std: float = 0.0,
     center_xy: Tuple[float, float] | None = None,
 ) -> None:
-    meta = read_video_meta(source_video)
-    cap = cv2.VideoCapture(str(source_video))
-    if not cap.isOpened():
-        raise RuntimeError(f"Could not open video: {source_video}")
-
-    fps = meta.fps
-    target_frames = int(round(target_seconds * fps))
-    freeze_start_frames = int(round(max(0.0, freeze_start_seconds) * fps))
-
-    if center_xy is None:
-        center_xy = (meta.width / 2.0, meta.height / 2.0)
-
-    x1 = y1 = x2 = y2 = 0
-    first_processed = None
-    last_processed = None
-
-    fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-    writer = cv2.VideoWriter(str(out_path), fourcc, fps, (meta.width, meta.height))
-    if not writer.isOpened():
-        raise RuntimeError(f"Could not open writer: {out_path}")
-
-    # clamp and seek to start
-    total_secs = (meta.frame_count / max(1.0, fps)) if meta.frame_count > 0 else 0.0
-    safe_start = start_seconds
-    if total_secs > 0.0:
-        safe_start = clamp(start_seconds, 0.0, max(0.0, total_secs - 0.2))
-    if safe_start > 0:
-        cap.set(cv2.CAP_PROP_POS_MSEC, safe_start * 1000.0)
-
-    # read first frame and compute crop box; retry with frame index and then fallback to 0s
-    ok, frame = cap.read()
-    if not ok and safe_start > 0:
-        idx = int(round(safe_start * fps))
-        cap.set(cv2.CAP_PROP_POS_FRAMES, max(0, idx))
-        ok, frame = cap.read()
-    if not ok:
-        cap.release()
-        cap = cv2.VideoCapture(str(source_video))
-        ok, frame = cap.read()
-    if not ok:
-        writer.release()
-        cap.release()
-        raise RuntimeError("no frames in source video (seek failed and start failed)")
-
-    if x2 == 0 and y2 == 0:
-        x1, y1, x2, y2 = compute_crop(meta.width, meta.height, center_xy, zoom, offset_frac)
-
-    logger.info(
-        f"start clip -> out={out_path.name} start={safe_start:.2f}s zoom={zoom:.2f} "
-        f"offset=({offset_frac[0]:+.2f},{offset_frac[1]:+.2f}) target={target_seconds:.2f}s freeze_start={freeze_start_seconds:.2f}s "
-        f"crop=({x1},{y1},{x2},{y2}) alpha={contrast_alpha:.2f} beta={brightness_beta:.1f} gamma={gamma:.2f} sat={saturation_scale:.2f}"
-    )
-
-    crop = frame[y1:y2, x1:x2]
-    processed = cv2.resize(crop, (meta.width, meta.height), interpolation=cv2.INTER_LINEAR)
-    processed = apply_augmentations(processed, contrast_alpha, brightness_beta, gamma, saturation_scale)
-    first_processed = processed
-    last_processed = first_processed.copy()
-
-    # minimal freeze at start (optional noise)
-    for _ in range(min(freeze_start_frames, target_frames)):
-        if freeze_noise_std > 0.0:
-            writer.write(add_gaussian_noise(first_processed, freeze_noise_std))
-        else:
-            writer.write(first_processed)
-
-    written = freeze_start_frames
-
-    # collect processed frames
-    processed_frames: List[np.ndarray] = [first_processed]
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-        crop = frame[y1:y2, x1:x2]
-        processed = cv2.resize(crop, (meta.width, meta.height), interpolation=cv2.INTER_LINEAR)
-        processed = apply_augmentations(processed, contrast_alpha, brightness_beta, gamma, saturation_scale)
-        processed_frames.append(processed)
-
-    # build ping-pong sequence
-    if len(processed_frames) == 0:
-        processed_frames = [first_processed]
-    pingpong = processed_frames + processed_frames[-2:0:-1] if len(processed_frames) > 1 else processed_frames
-
-    # write until target length is reached
-    report_every = max(1, int(meta.fps * 10))  # ~every 10 seconds
-    idx_pp = 0
-    while written < target_frames:
-        frm = pingpong[idx_pp]
-        writer.write(frm)
-        last_processed = frm
-        written += 1
-        idx_pp = (idx_pp + 1) % len(pingpong)
-        if written % report_every == 0:
-            logger.info(f"progress {out_path.name}: {written}/{target_frames} frames")
-
-    writer.release()
-    cap.release()
-    logger.info(f"done clip -> out={out_path.name}")
+    var = Variation(zoom=zoom, offset=offset_frac, freeze_s=freeze_start_seconds, start_frac=0.0, alpha=contrast_alpha,
+                    beta=brightness_beta, gamma=gamma, sat=saturation_scale, freeze_noise_std=freeze_noise_std)
+    if not write_source_variants(source_video, [(var, Path(out_path), start_seconds)], target_seconds, center_xy):
+        raise RuntimeError(f"no frames written to {out_path}")
+
+
+class ColorAugment:
+    """A variant's color tuning compiled once instead of recomputed per frame: contrast,
+    brightness and gamma fold into one per-channel uint8 LUT (`cv2.LUT`, one pass), and
+    saturation, when not 1, is one blend of each pixel toward its brightest channel.
+    """
+
+    def __init__(self, alpha: float = 1.0, beta: float = 0.0, gamma: float = 1.0, saturation_scale: float = 1.0):
+        # run the per-pixel ops over all 256 levels once; cv2 rounds exactly as it would per frame
+        table = cv2.convertScaleAbs(np.arange(256, dtype=np.uint8)[None, :], alpha=float(alpha), beta=float(beta))[0]
+        if abs(gamma - 1.0) > 1e-3:
+            inv_g = 1.0 / max(1e-6, gamma)
+            gamma_lut = np.clip((np.linspace(0, 1, 256) ** inv_g) * 255.0, 0, 255).astype(np.uint8)
+            table = gamma_lut[table]
+        self.lut = None if np.array_equal(table, np.arange(256)) else np.dstack([table] * 3)  # (1, 256, 3)
+        # the same table on every channel runs as one flat single-channel pass, ~2x faster
+        self._flat_lut = None
+        if self.lut is not None and all(np.array_equal(self.lut[..., 0], self.lut[..., c]) for c in (1, 2)):
+            self._flat_lut = np.ascontiguousarray(self.lut[0, :, 0])
+        self.saturation = float(saturation_scale) if abs(saturation_scale - 1.0) > 1e-3 else None
+
+    @classmethod
+    def from_variation(cls, var: "Variation") -> "ColorAugment":
+        return cls(var.alpha, var.beta, var.gamma, var.sat)
+
+    def __call__(self, bgr: np.ndarray) -> np.ndarray:
+        img = bgr
+        if self._flat_lut is not None:
+            img = cv2.LUT(np.ascontiguousarray(bgr).reshape(bgr.shape[0], -1), self._flat_lut).reshape(bgr.shape)
+        elif self.lut is not None:
+            img = cv2.LUT(bgr, self.lut)
+        if self.saturation is not None:
+            # hue and value stay, channels move away from (k > 1) or toward (k < 1) the max,
+            # which scales HSV saturation without the HSV round trip
+            b, g, r = (cv2.extractChannel(img, c) for c in range(3))
+            v = cv2.max(cv2.max(b, g), r)
+            k = self.saturation
+            src = img
+            img = cv2.addWeighted(src, k, cv2.cvtColor(v, cv2.COLOR_GRAY2BGR), 1.0 - k, 0.0)
+            if k > 1.0:
+                # where the min channel would drop below 0 the HSV path clips S at 255 instead;
+                # redo those pixels with k capped at V / (V - min), which keeps their hue
+                mn = cv2.min(cv2.min(b, g), r)
+                clipped = np.flatnonzero(cv2.compare(mn, cv2.multiply(v, (k - 1.0) / k), cv2.CMP_LT))
+                if len(clipped):
+                    px = src.reshape(-1, 3)[clipped].astype(np.float32)
+                    vf = v.reshape(-1)[clipped].astype(np.float32)[:, None]
+                    spread = vf - mn.reshape(-1)[clipped].astype(np.float32)[:, None]
+                    kk = np.minimum(k, vf / np.maximum(spread, 1.0))
+                    img.reshape(-1, 3)[clipped] = np.clip(vf - kk * (vf - px) + 0.5, 0, 255).astype(np.uint8)
+        return img
 
 
 def apply_augmentations(
@@ -212,30 +386,35 @@ def apply_augmentations(
     gamma: float,
     saturation_scale: float,
 ) -> np.ndarray:
-    # contrast/brightness
-    img = cv2.convertScaleAbs(bgr, alpha=float(alpha), beta=float(beta))
-    # gamma
-    if abs(gamma - 1.0) > 1e-3:
-        inv_g = 1.0 / max(1e-6, gamma)
-        table = (np.linspace(0, 1, 256) ** inv_g) * 255.0
-        lut = np.clip(table, 0, 255).astype(np.uint8)
-        img = cv2.LUT(img, lut)
-    # saturation
-    if abs(saturation_scale - 1.0) > 1e-3:
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        h, s, v = cv2.split(hsv)
-        s = np.clip(s.astype(np.float32) * float(saturation_scale), 0, 255).astype(np.uint8)
-        hsv = cv2.merge([h, s, v])
-        img = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
-    return img
-
-
-def add_gaussian_noise(img: np.ndarray, sigma: float) -> np.ndarray:
+    """One-off form of `ColorAugment`; compile it once when tuning many frames."""
+    return ColorAugment(alpha, beta, gamma, saturation_scale)(bgr)
+
+
+class NoiseBank:
+    """Freeze-frame noise drawn once: a Gaussian field a little larger than the frame,
+    floored to integers (the old float path truncated the same way) and split into
+    saturating add/subtract planes. Each frame uses a random offset into the field.
+    Draws come from `rng` (fresh entropy when None), never the global numpy state.
+    """
+
+    def __init__(self, shape: Tuple[int, ...], sigma: float, pad: int = 32, rng: np.random.Generator | None = None):
+        h, w = shape[:2]
+        self.h, self.w, self.pad = h, w, int(pad)
+        self.rng = rng if rng is not None else np.random.default_rng()
+        field = np.floor(self.rng.normal(0.0, sigma, (h + pad, w + pad) + tuple(shape[2:])))
+        self.pos = np.clip(field, 0, 255).astype(np.uint8)
+        self.neg = np.clip(-field, 0, 255).astype(np.uint8)
+
+    def __call__(self, img: np.ndarray) -> np.ndarray:
+        dy, dx = self.rng.integers(0, self.pad + 1, size=2)
+        sl = (slice(dy, dy + self.h), slice(dx, dx + self.w))
+        return cv2.subtract(cv2.add(img, self.pos[sl]), self.neg[sl])
+
+
+def add_gaussian_noise(img: np.ndarray, sigma: float, rng: np.random.Generator | None = None) -> np.ndarray:
     if sigma <= 0.0:
         return img
-    noise = np.random.normal(0.0, sigma, img.shape).astype(np.float32)
-    out = img.astype(np.float32) + noise
-    return np.clip(out, 0, 255).astype(np.uint8)
+    return NoiseBank(img.shape, sigma, pad=0, rng=rng)(img)
 
 
 @dataclass
@@ -261,6 +440,60 @@ def per_video_variations() -> List[Variation]:
     ]
 
 
+def process_source(
+    src: Path,
+    per_vars: List[Variation],
+    out_root: Path,
+    duration: float,
+    center_xy: Tuple[float, float] | None = None,
+    tmp_dir: str | None = None,
+    rng: np.random.Generator | None = None,
+) -> List[dict]:
+    """All variants of one source in one decode; returns their manifest items."""
+    meta = read_video_meta(src)
+    if center_xy is None:
+        center_xy = (meta.width / 2.0, meta.height / 2.0)
+
+    video_out_dir = out_root  # flat output directory, no per-video subfolders
+    logger.info(f"processing {src.name} ({meta.width}x{meta.height} @ {meta.fps:.2f} fps); variants={len(per_vars)} -> out {video_out_dir}")
+
+    jobs = []
+    for idx, var in enumerate(per_vars):
+        start_sec = float(var.start_frac) * (meta.frame_count / max(1.0, meta.fps))
+        safe_name = (
+            f"{src.stem}_v{idx:02d}_start{var.start_frac:.2f}_zoom{var.zoom:.1f}_ox{var.offset[0]:+.2f}_oy{var.offset[1]:+.2f}"
+        ).replace(".", "p").replace("-", "m").replace("+", "p")
+        jobs.append((var, video_out_dir / f"{safe_name}.mp4", start_sec))
+    try:
+        written = set(write_source_variants(src, jobs, duration, center_xy, tmp_dir, rng))
+    except Exception as e:
+        logger.exception(f"failed to generate variants of {src.name}: {e}")
+        return []
+
+    items = []
+    for var, out_path, start_sec in jobs:
+        if out_path not in written:
+            continue
+        items.append({
+            "source": str(src),
+            "file": str(out_path),
+            "start_seconds": start_sec,
+            "zoom": var.zoom,
+            "offset_frac": [var.offset[0], var.offset[1]],
+            "freeze_start_seconds": var.freeze_s,
+            "alpha": var.alpha,
+            "beta": var.beta,
+            "gamma": var.gamma,
+            "sat": var.sat,
+            "freeze_noise_std": var.freeze_noise_std,
+        })
+    return items
+
+
+def _process_source_task(task: tuple) -> List[dict]:
+    return process_source(*task)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Generate varied time-splice clips with angles and color tuning.")
     parser.add_argument("--video", default=None, help="Optional single source video path")
@@ -270,6 +503,8 @@ def main() -> None:
     parser.add_argument("--duration", type=float, default=120.0, help="Duration of each clip in seconds")
     parser.add_argument("--center", default=None, help="Optional center point 'x,y' in pixels for zoom center")
     parser.add_argument("--seed", type=int, default=42, help="Random seed for reproducibility")
+    parser.add_argument("--workers", type=int, default=1, help="Source videos processed in parallel (one process each)")
+    parser.add_argument("--tmp_dir", default=None, help="Directory for the on-disk frame stores (default: system temp)")
 
     args = parser.parse_args()
 
@@ -318,61 +553,32 @@ def main() -> None:
                         beta=max(-20.0, min(20.0, base.beta + random.uniform(-5.0, 5.0))),
                         gamma=min(1.3, max(0.7, base.gamma + random.uniform(-0.1, 0.1))),
                         sat=min(1.3, max(0.7, base.sat + random.uniform(-0.1, 0.1))),
+                        freeze_noise_std=base.freeze_noise_std,
                     )
                 )
 
-    for src in sources:
-        meta = read_video_meta(src)
-        if args.center:
-            xs = args.center.split(",")
-            if len(xs) != 2:
-                raise ValueError("--center must be 'x,y' in pixels")
-            center_xy = (float(xs[0]), float(xs[1]))
-        else:
-            center_xy = (meta.width / 2.0, meta.height / 2.0)
-
-        video_out_dir = out_root  # flat output directory, no per-video subfolders
-        logger.info(f"processing {src.name} ({meta.width}x{meta.height} @ {meta.fps:.2f} fps); variants={len(per_vars)} -> out {video_out_dir}")
-
-        for idx, var in enumerate(per_vars):
-            start_sec = float(var.start_frac) * (meta.frame_count / max(1.0, meta.fps))
-            safe_name = (
-                f"{src.stem}_v{idx:02d}_start{var.start_frac:.2f}_zoom{var.zoom:.1f}_ox{var.offset[0]:+.2f}_oy{var.offset[1]:+.2f}"
-            ).replace(".", "p").replace("-", "m").replace("+", "p")
-            out_path = video_out_dir / f"{safe_name}.mp4"
-            try:
-                write_angle_clip(
-                    source_video=src,
-                    out_path=out_path,
-                    zoom=var.zoom,
-                    offset_frac=var.offset,
-                    target_seconds=args.duration,
-                    freeze_start_seconds=var.freeze_s,
-                    start_seconds=start_sec,
-                    contrast_alpha=var.alpha,
-                    brightness_beta=var.beta,
-                    gamma=var.gamma,
-                    saturation_scale=var.sat,
-                    freeze_noise_std=var.freeze_noise_std,
-                    center_xy=center_xy,
-                )
-            except Exception as e:
-                logger.exception(f"failed to generate {out_path.name}: {e}")
-                continue
-            total_outputs.append(str(out_path))
-            global_manifest_items.append({
-                "source": str(src),
-                "file": str(out_path),
-                "start_seconds": start_sec,
-                "zoom": var.zoom,
-                "offset_frac": [var.offset[0], var.offset[1]],
-                "freeze_start_seconds": var.freeze_s,
-                "alpha": var.alpha,
-                "beta": var.beta,
-                "gamma": var.gamma,
-                "sat": var.sat,
-                "freeze_noise_std": var.freeze_noise_std,
-            })
+    center = None
+    if args.center:
+        xs = args.center.split(",")
+        if len(xs) != 2:
+            raise ValueError("--center must be 'x,y' in pixels")
+        center = (float(xs[0]), float(xs[1]))
+
+    # one generator per source, so noise is reproducible whichever worker runs it
+    tasks = [
+        (src, per_vars, out_root, args.duration, center, args.tmp_dir, np.random.default_rng((args.seed, i)))
+        for i, src in enumerate(sources)
+    ]
+    workers = max(1, min(int(args.workers), len(tasks)))
+    if workers == 1:
+        results = [_process_source_task(t) for t in tasks]
+    else:
+        # one source per worker at a time; results come back in source order
+        with ProcessPoolExecutor(max_workers=workers, initializer=setup_logging, initargs=(Path(log_root) / "process.log",)) as pool:
+            results = list(pool.map(_process_source_task, tasks))
+    for items in results:
+        total_outputs.extend(item["file"] for item in items)
+        global_manifest_items.extend(items)
 
     manifest = {
         "outputs_count": len(total_outputs),
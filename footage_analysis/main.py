@@ -1,7 +1,10 @@
 from __future__ import annotations
 from pathlib import Path
+from typing import Optional
+import os
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yaml
 from dotenv import load_dotenv
 import logging
@@ -14,18 +17,25 @@ load_dotenv(here.parent / ".env")
 if __package__ is None or __package__ == "":
     sys.path.append(str(here))
     from pipeline.run import process_video  # type: ignore
-    from models.llm import synthesize_text  # type: ignore
-    from utils import write_json, prompts  # type: ignore
-    from utils.context import build_job_context_from_paths  # type: ignore
+    from pipeline.pool import run_videos_process_pool  # type: ignore
+    from pipeline.live import process_stream  # type: ignore
+    from pipeline.schedule import ChunkScheduler, load_cameras, load_incident  # type: ignore
+    from pipeline.report import ProgressiveJobReport, write_job_report  # type: ignore
+    from models.detector_service import shutdown_detector_services  # type: ignore
+    from utils.trace import start_tracing, stop_tracing  # type: ignore
 else:
     from .pipeline.run import process_video
-    from .models.llm import synthesize_text
-    from .utils import write_json, prompts
-    from .utils.context import build_job_context_from_paths
+    from .pipeline.pool import run_videos_process_pool
+    from .pipeline.live import process_stream
+    from .pipeline.schedule import ChunkScheduler, load_cameras, load_incident
+    from .pipeline.report import ProgressiveJobReport, write_job_report
+    from .models.detector_service import shutdown_detector_services
+    from .utils.trace import start_tracing, stop_tracing
 
 
 def main() -> None:
-    cfg_path = here / "config.yaml"
+    # FOOTAGE_CONFIG swaps in another config file (e.g. scripts/bench_pipeline.py)
+    cfg_path = Path(os.environ.get("FOOTAGE_CONFIG") or here / "config.yaml")
     with open(cfg_path, "r") as f:
         cfg = yaml.safe_load(f)
 
@@ -33,7 +43,27 @@ def main() -> None:
     base_videos = Path(cfg.get("videos_base_dir", "data/videos"))
     base_results = Path(cfg.get("results_base_dir", "data/results"))
     parser.add_argument("--job_name", default="kirk", help="job name; reads from data/videos/<job_name>/processed and writes to data/results/<job_name>")
-    parser.add_argument("--jobs", type=int, default=1, help="number of videos to process in parallel")
+    parser.add_argument("--jobs", type=int, default=1, help="number of videos (thread mode) or worker processes (process mode) in parallel")
+    parser.add_argument("--executor", choices=["thread", "process"], default=str(cfg.get("executor", "thread")),
+                        help="thread: one video per thread; process: schedule individual chunks across worker processes")
+    parser.add_argument("--worker_threads", type=int, default=None, help="torch/OpenCV threads per worker process (default: cores // jobs)")
+    parser.add_argument("--live", action="append", default=[], metavar="SOURCE",
+                        help="analyze a live feed (stream URL, named pipe or growing file) instead of processed/*.mp4; repeatable")
+    parser.add_argument("--live_name", action="append", default=[], help="output name per --live source (default: source stem)")
+    parser.add_argument("--replay", action="store_true", help="with --live: replay local files at real-time speed")
+    parser.add_argument("--progressive_report", action=argparse.BooleanOptionalAction,
+                        default=bool(cfg.get("progressive_job_report", True)),
+                        help="regenerate job_report.json as each video finishes instead of once at the end")
+    parser.add_argument("--replay_mode", choices=["passthrough", "record", "replay"], default=None,
+                        help="VLM/LLM responses: passthrough (live), record (reuse stored, store new) or replay (stored only, offline); "
+                             "overrides replay_mode")
+    parser.add_argument("--trace", action=argparse.BooleanOptionalAction, default=bool(cfg.get("trace", False)),
+                        help="record per-stage spans and memory to <results>/trace.json and print a summary table")
+    parser.add_argument("--incident", default=None,
+                        help="shot location/time as a JSON file or inline JSON ({lat, lng, timestamp} or {lat, lng, t} in ms); "
+                             "footage nearest the shot in space and time is processed first")
+    parser.add_argument("--window_minutes", type=float, default=None,
+                        help="with --incident: skip chunks more than this many minutes from the shot (overrides incident_window_minutes)")
     args = parser.parse_args()
 
     # compute io paths from yaml bases and job_name
@@ -51,51 +81,89 @@ def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
     logging.info(
         f"job={args.job_name} videos_dir={videos_dir} artifacts_dir={cfg['artifacts_dir']} "
-        f"yolo={enable_yolo} vlm={enable_vlm} llm={enable_llm} chunk_seconds={cfg.get('chunk_seconds')}"
+        f"yolo={enable_yolo} vlm={enable_vlm} llm={enable_llm} chunk_seconds={cfg.get('chunk_seconds')} executor={args.executor}"
     )
-    if not videos_dir.exists():
-        raise FileNotFoundError(f"videos_dir not found: {videos_dir}")
+    if args.replay_mode:
+        cfg["replay_mode"] = args.replay_mode
+    if args.trace:
+        cfg["trace"] = True
+        start_tracing(cfg)
 
-    videos = sorted([p for p in videos_dir.glob("*.mp4") if p.is_file()])
-    if not videos:
-        raise SystemExit(f"no .mp4 files found in {videos_dir}")
+    schedule = None
+    if args.incident:
+        if args.window_minutes is not None:
+            cfg["incident_window_minutes"] = args.window_minutes
+        cameras = load_cameras(base_videos / args.job_name / str(cfg.get("cameras_file", "cameras.json")))
+        schedule = ChunkScheduler(load_incident(args.incident), cameras, cfg)
+        logging.info(f"incident schedule {schedule.describe()}")
 
-    if args.jobs <= 1:
-        for vp in videos:
-            process_video(str(vp), cfg)
-    else:
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+    def _start_reporter(n_videos: int) -> Optional[ProgressiveJobReport]:
+        return ProgressiveJobReport(artifacts_dir, cfg, videos_total=n_videos) if args.progressive_report else None
+
+    def _video_done(video_path: str) -> None:
+        if reporter is not None:
+            reporter.video_done(video_path)
 
-        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
-            futs = {ex.submit(process_video, str(vp), cfg): vp for vp in videos}
+    reporter: Optional[ProgressiveJobReport] = None
+    if args.live:
+        reporter = _start_reporter(len(args.live))
+        names = args.live_name + [None] * (len(args.live) - len(args.live_name))
+        # one thread per feed; the shared detector batches frames across them
+        with ThreadPoolExecutor(max_workers=len(args.live)) as ex:
+            futs = {ex.submit(process_stream, src, cfg, name, args.replay): src for src, name in zip(args.live, names)}
             for fut in as_completed(futs):
-                vp = futs[fut]
                 try:
-                    fut.result()
+                    _video_done(fut.result().video_path)
                 except Exception as e:
-                    print(f"error processing {vp}: {e}")
+                    print(f"error processing live source {futs[fut]}: {e}")
+    else:
+        if not videos_dir.exists():
+            raise FileNotFoundError(f"videos_dir not found: {videos_dir}")
+
+        videos = sorted([p for p in videos_dir.glob("*.mp4") if p.is_file()])
+        if not videos:
+            raise SystemExit(f"no .mp4 files found in {videos_dir}")
+
+        if schedule is not None and args.executor != "process":
+            # thread mode runs each video's chunks in sequence, so prioritize whole videos
+            videos = [Path(v) for v in schedule.order_videos([str(vp) for vp in videos])]
+
+        reporter = _start_reporter(len(videos))
+        if args.executor == "process":
+            run_videos_process_pool([str(vp) for vp in videos], cfg, workers=args.jobs, threads=args.worker_threads,
+                                    schedule=schedule, on_video_done=_video_done)
+        elif args.jobs <= 1:
+            for vp in videos:
+                process_video(str(vp), cfg, schedule)
+                _video_done(str(vp))
+        else:
+            with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as ex:
+                futs = {ex.submit(process_video, str(vp), cfg, schedule): vp for vp in videos}
+                for fut in as_completed(futs):
+                    vp = futs[fut]
+                    try:
+                        fut.result()
+                        _video_done(str(vp))
+                    except Exception as e:
+                        print(f"error processing {vp}: {e}")
+    shutdown_detector_services()
 
-    # job-level synthesis across videos (condensed combined report)
+    # job-level synthesis across videos (condensed combined report); progressive mode
+    # has been writing it as videos landed, this is the final pass over all of them
     try:
-        summaries_root = artifacts_dir / "summaries"
-        context_items = []
-        for vid_dir in sorted(summaries_root.iterdir()):
-            if not vid_dir.is_dir():
-                continue
-            vs_path = vid_dir / "video_summary.json"
-            if vs_path.exists():
-                context_items.append({
-                    "video": vid_dir.name,
-                    "summary_path": str(vs_path),
-                })
-        if context_items and bool(cfg.get("enable_llm", True)):
-            # load a compact job context from video summary files
-            job_ctx = build_job_context_from_paths([c["summary_path"] for c in context_items])
-            report = synthesize_text(f"Context JSON: {job_ctx}\n\n{prompts.JOB_SUMMARY_REPORT}", cfg)
-            write_json({"job_report": report, "videos": [c["video"] for c in context_items]}, artifacts_dir / "job_report.json")
+        if reporter is not None:
+            reporter.finish()
+        else:
+            write_job_report(artifacts_dir, cfg)
     except Exception as e:
         print(f"job-level synthesis failed: {e}")
 
+    tracer = stop_tracing()
+    if tracer is not None:
+        trace_path = artifacts_dir / "trace.json"
+        tracer.write(trace_path)
+        print(f"trace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+        print(tracer.summary_table())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from ..records import Det
+from .yolo import YoloDetector
+
+
+logger = logging.getLogger("models.detector_service")
+logger.addHandler(logging.NullHandler())
+
+
+class DetectorService:
+    """One warm YoloDetector shared by every video worker in the process.
+    Callers enqueue frames; a single worker thread forms dynamic batches of up to
+    `batch_size` frames, waiting at most `window_ms` after the first frame arrives.
+    Exposes the same `infer` / `infer_batch` / `batch_size` surface as YoloDetector.
+    """
+
+    def __init__(self, detector: YoloDetector, window_ms: float = 10.0):
+        self.detector = detector
+        self.batch_size = detector.batch_size
+        self.tiling = getattr(detector, "tiling", False)
+        self.window_s = max(0.0, float(window_ms)) / 1000.0
+        self._q: "queue.Queue[Optional[Tuple[np.ndarray, Optional[np.ndarray], Future]]]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="detector-service", daemon=True)
+        self._thread.start()
+
+    def infer(self, frame_bgr: np.ndarray) -> List[Det]:
+        return self.infer_batch([frame_bgr])[0]
+
+    def infer_batch(self, frames_bgr: List[np.ndarray],
+                    regions: Optional[Sequence[Optional[np.ndarray]]] = None) -> List[List[Det]]:
+        if regions is None:
+            regions = [None] * len(frames_bgr)
+        futs = [self.submit(f, r) for f, r in zip(frames_bgr, regions)]
+        return [f.result() for f in futs]
+
+    def submit(self, frame_bgr: np.ndarray, regions: Optional[np.ndarray] = None) -> Future:
+        if self._closed:
+            raise RuntimeError("detector service is closed")
+        fut: Future = Future()
+        self._q.put((frame_bgr, regions, fut))
+        return fut
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+
+    def _collect(self) -> Tuple[List[Tuple[np.ndarray, Optional[np.ndarray], Future]], bool]:
+        first = self._q.get()
+        if first is None:
+            return [], True
+        items = [first]
+        deadline = time.monotonic() + self.window_s
+        while len(items) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                nxt = self._q.get(timeout=remaining) if remaining > 0 else self._q.get_nowait()
+            except queue.Empty:
+                break
+            if nxt is None:
+                return items, True
+            items.append(nxt)
+        return items, False
+
+    def _loop(self) -> None:
+        stop = False
+        while not stop:
+            items, stop = self._collect()
+            if not items:
+                continue
+            try:
+                regions = [r for _, r, _ in items]
+                if all(r is None for r in regions):
+                    results = self.detector.infer_batch([f for f, _, _ in items])
+                else:
+                    results = self.detector.infer_batch([f for f, _, _ in items], regions)
+            except Exception as e:
+                logger.exception(f"detector batch of {len(items)} failed: {e}")
+                for _, _, fut in items:
+                    fut.set_exception(e)
+                continue
+            for (_, _, fut), dets in zip(items, results):
+                fut.set_result(dets)
+
+
+_services: Dict[Tuple, DetectorService] = {}
+_services_lock = threading.Lock()
+
+
+def get_detector_service(cfg: Dict) -> DetectorService:
+    """Return the process-wide detector service for this config, loading weights once."""
+    imgsz = int(cfg.get("yolo_imgsz", 640))
+    batch_size = int(cfg.get("yolo_batch_size", 8))
+    key = (
+        str(cfg["yolo_weights"]),
+        tuple(cfg["target_classes"]),
+        float(cfg["conf_threshold"]),
+        imgsz,
+        batch_size,
+        int(cfg.get("yolo_tile_size") or 0),
+        float(cfg.get("yolo_tile_overlap", 0.2)),
+        int(cfg.get("yolo_tile_max_per_frame", 6)),
+        float(cfg.get("yolo_tile_nms_iou", 0.5)),
+    )
+    with _services_lock:
+        svc = _services.get(key)
+        if svc is None:
+            detector = YoloDetector.from_cfg(cfg)
+            svc = DetectorService(detector, window_ms=float(cfg.get("detector_batch_window_ms", 10)))
+            _services[key] = svc
+            logger.info(f"detector service started weights={key[0]} batch={batch_size} imgsz={imgsz} tile={key[5] or 'off'}")
+        return svc
+
+
+def shutdown_detector_services() -> None:
+    with _services_lock:
+        for svc in _services.values():
+            svc.close()
+        _services.clear()
@@ -1,54 +1,155 @@
 from __future__ import annotations
 import os
-from typing import Dict
-import asyncio
+import queue
+import itertools
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Dict, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 from cerebras.cloud.sdk import Cerebras
-from ..utils.backoff import with_exponential_backoff, RateLimiter
+from ..utils.backoff import with_backoff, TokenBucket
+from ..utils.trace import span, traced
+from .replay import get_replay_store, request_key
 
 
-limiter = RateLimiter(rpm=28)
+logger = logging.getLogger("models.llm")
+logger.addHandler(logging.NullHandler())
 
-def synthesize_text(prompt: str, cfg: Dict) -> str:
-    # read llm settings from config
-    if not bool(cfg.get("enable_llm", True)):
-        return ""
+# lower runs first: responders wait on the job report, synopses can trail
+PRIORITY_JOB_REPORT = 0
+PRIORITY_VIDEO_NARRATIVE = 1
+PRIORITY_CLIP_SYNOPSIS = 2
+
+
+def _is_rate_limited(e: BaseException) -> bool:
+    return getattr(e, "status_code", None) == 429 or type(e).__name__ == "RateLimitError"
+
+
+class LLMDispatcher:
+    """Process-wide text LLM dispatcher: one pooled client, a thread-safe token bucket
+    shared by every caller, and a priority queue drained by `workers` threads.
+    """
+
+    def __init__(self, api_key: str, rpm: float = 28, burst: int = 1, workers: int = 4,
+                 retries: int = 6, penalty_seconds: float = 5.0):
+        # retries are ours (token-bucket aware); the sdk's own retries would bypass the bucket
+        self.client = Cerebras(api_key=api_key, max_retries=0)
+        self.bucket = TokenBucket(rpm, burst)
+        self.retries = int(retries)
+        self.penalty_seconds = float(penalty_seconds)
+        self._q: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"llm-{i}", daemon=True) for i in range(max(1, int(workers)))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, prompt: str, model: str, max_tokens: int, temperature: float,
+               priority: int = PRIORITY_CLIP_SYNOPSIS) -> Future:
+        fut: Future = Future()
+        req = {"prompt": prompt, "model": model, "max_tokens": max_tokens, "temperature": temperature}
+        self._q.put((int(priority), next(self._seq), req, fut))
+        return fut
+
+    @traced("llm_call", "model")
+    def _call(self, req: Dict) -> str:
+        def _once():
+            self.bucket.acquire()
+            try:
+                return self.client.chat.completions.create(
+                    model=req["model"],
+                    messages=[{"role": "user", "content": req["prompt"]}],
+                    max_completion_tokens=req["max_tokens"],
+                    temperature=req["temperature"],
+                )
+            except Exception as e:
+                if _is_rate_limited(e):
+                    # hold back every thread, not just this one
+                    self.bucket.penalize(self.penalty_seconds)
+                raise
+
+        resp = with_backoff(_once, retries=self.retries)
+        return (resp.choices[0].message.content or "").strip()
+
+    def _loop(self) -> None:
+        while True:
+            _, _, req, fut = self._q.get()
+            if not fut.set_running_or_notify_cancel():
+                continue
+            try:
+                fut.set_result(self._call(req))
+            except Exception as e:
+                logger.info(f"llm request failed: {e}")
+                fut.set_result("")
 
+
+_dispatchers: Dict[str, LLMDispatcher] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def _api_key() -> Optional[str]:
     # ensure env is loaded (repo root or module dir)
     if not os.environ.get("CEREBRAS_API_KEY"):
         here = Path(__file__).resolve().parents[1]
         load_dotenv(here / ".env")
         load_dotenv(here.parent / ".env")
+    return os.environ.get("CEREBRAS_API_KEY")
 
-    key = os.environ.get("CEREBRAS_API_KEY")
+
+def get_llm_dispatcher(cfg: Dict) -> Optional[LLMDispatcher]:
+    key = _api_key()
     if not key:
-        return ""
+        return None
+    with _dispatchers_lock:
+        d = _dispatchers.get(key)
+        if d is None:
+            d = _dispatchers[key] = LLMDispatcher(
+                key,
+                rpm=float(cfg.get("llm_rpm", 28)),
+                burst=int(cfg.get("llm_burst", 1)),
+                workers=int(cfg.get("llm_max_concurrency", 4)),
+            )
+        return d
+
 
+def _done(value: str) -> Future:
+    fut: Future = Future()
+    fut.set_result(value)
+    return fut
+
+
+def submit_text(prompt: str, cfg: Dict, priority: int = PRIORITY_CLIP_SYNOPSIS) -> Future:
+    """Queue a completion; the future resolves to the text, or "" when disabled or failed."""
+    if not bool(cfg.get("enable_llm", True)):
+        return _done("")
     model = str(cfg.get("model") or os.environ.get("CEREBRAS_MODEL") or "gpt-oss-120b")
     max_tokens = int(cfg.get("max_tokens", 512))
     temperature = float(cfg.get("temperature", 0.2))
+    store = get_replay_store(cfg)
+    key = None
+    if store is not None:
+        key = request_key("llm", {"model": model, "max_tokens": max_tokens, "temperature": temperature}, prompt)
+        text = store.get(key)
+        if text is not None or store.offline:
+            return _done(text or "")
+    d = get_llm_dispatcher(cfg)
+    if d is None:
+        return _done("")
+    fut = d.submit(prompt, model, max_tokens, temperature, priority=priority)
+    if store is not None:
+        def _record(f: Future) -> None:
+            # failed calls resolve to ""; only real answers are kept
+            if not f.cancelled() and f.exception() is None and f.result():
+                store.put(key, f.result(), {"kind": "llm", "model": model})
 
-    client = Cerebras(api_key=key)
-
-    async def _call():
-        await limiter.wait()
-        return client.chat.completions.create(
-            model=model,
-            messages=[{"role": "user", "content": prompt}],
-            max_completion_tokens=max_tokens,
-            temperature=temperature,
-        )
-
-    try:
-        try:
-            loop = asyncio.get_running_loop()
-            resp = loop.run_until_complete(with_exponential_backoff(_call, retries=6))  # type: ignore
-        except RuntimeError:
-            resp = asyncio.run(with_exponential_backoff(_call, retries=6))
-        return (resp.choices[0].message.content or "").strip()
-    except Exception:
-        return ""
-
+        fut.add_done_callback(_record)
+    return fut
 
 
+def synthesize_text(prompt: str, cfg: Dict, priority: int = PRIORITY_CLIP_SYNOPSIS) -> str:
+    fut = submit_text(prompt, cfg, priority=priority)
+    with span("llm_wait", "wait", priority=priority):
+        return fut.result()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("models.replay")
+logger.addHandler(logging.NullHandler())
+
+PASSTHROUGH = "passthrough"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (PASSTHROUGH, RECORD, REPLAY)
+
+
+def request_key(kind: str, params: Dict[str, Any], prompt: str, images: Sequence[np.ndarray] = ()) -> str:
+    """sha256 over the model/params, the prompt and the raw image bytes of one request."""
+    h = hashlib.sha256()
+    h.update(json.dumps({"kind": kind, **params}, sort_keys=True).encode())
+    h.update(b"\0")
+    h.update(prompt.encode())
+    for img in images:
+        arr = np.ascontiguousarray(img)
+        h.update(f"\0{arr.shape}{arr.dtype}".encode())
+        h.update(memoryview(arr).cast("B"))
+    return h.hexdigest()
+
+
+class ReplayStore:
+    """Content-addressed store of model responses: one JSON file per request key under
+    `root/<key[:2]>/<key>.json`, written atomically, shared by processes and jobs.
+
+    - passthrough: not consulted
+    - record: a stored response is reused; otherwise the live call's response is stored
+    - replay: stored responses only; a miss is treated like a failed call (no network)
+    """
+
+    def __init__(self, root: str | Path, mode: str = RECORD):
+        if mode not in MODES:
+            raise ValueError(f"replay_mode must be one of {MODES}, got {mode!r}")
+        self.root = Path(root)
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        self._lock = threading.Lock()
+
+    @property
+    def offline(self) -> bool:
+        return self.mode == REPLAY
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            with open(self._path(key), "r") as f:
+                resp = json.load(f)["response"]
+        except FileNotFoundError:
+            resp = None
+        except (OSError, ValueError, KeyError) as e:
+            logger.info(f"replay entry {key[:12]} unreadable: {e}")
+            resp = None
+        with self._lock:
+            if resp is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if resp is None and self.offline:
+            logger.info(f"replay miss {key[:12]}; no recorded response")
+        return resp
+
+    def put(self, key: str, response: Any, meta: Optional[Dict[str, Any]] = None) -> None:
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp, "w") as f:
+                json.dump({"response": response, "meta": meta or {}, "created": time.time()}, f)
+            os.replace(tmp, p)
+        except OSError as e:
+            logger.info(f"replay record {key[:12]} failed: {e}")
+            return
+        with self._lock:
+            self.recorded += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+_stores: Dict[tuple, ReplayStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_replay_store(cfg: Dict) -> Optional[ReplayStore]:
+    """Process-wide store for this config, or None in passthrough mode."""
+    mode = str(cfg.get("replay_mode") or PASSTHROUGH)
+    if mode == PASSTHROUGH:
+        return None
+    key = (str(cfg.get("replay_dir", "data/cache/replay")), mode)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ReplayStore(key[0], mode)
+        return store
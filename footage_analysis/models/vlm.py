@@ -2,17 +2,36 @@ from __future__ import annotations
 import os
 import re
 import json
+import hashlib
 from typing import Optional, Dict, List
 from pathlib import Path
 from dotenv import load_dotenv
 import anthropic
-from ..utils import b64_of_bgr, prompts
+from ..utils import b64_of_bgr, dhash, prompts
+from ..utils.trace import traced
+from .vlm_cache import get_vlm_cache
+from .replay import get_replay_store, request_key
 import cv2
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 
 _ANTH_MODEL = os.environ.get("ANTHROPIC_MODEL")
 
+# one dispatch pool per process so the concurrency limit holds across video workers
+_dispatch_lock = threading.Lock()
+_dispatch_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _dispatcher(max_workers: int) -> ThreadPoolExecutor:
+    global _dispatch_pool
+    with _dispatch_lock:
+        if _dispatch_pool is None:
+            _dispatch_pool = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="vlm")
+        return _dispatch_pool
+
+
 class VisionLLM:
     def __init__(self, cfg: Dict, max_tokens: int = 512):
         if not os.environ.get("ANTHROPIC_API_KEY"):
@@ -22,12 +41,20 @@ class VisionLLM:
         self.enabled = bool(cfg.get("enable_vlm", False))
         model = str(cfg.get("anthropic_model") or os.environ.get("ANTHROPIC_MODEL") or "").strip()
         key = os.environ.get("ANTHROPIC_API_KEY")
-        if self.enabled and (not key or not model):
+        self.replay = get_replay_store(cfg) if self.enabled else None
+        # replaying recorded responses needs no api key
+        offline = self.replay is not None and self.replay.offline
+        if self.enabled and (not model or not (key or offline)):
             raise RuntimeError("enable_vlm=true but ANTHROPIC_API_KEY or anthropic_model is missing")
-        self.client = anthropic.Anthropic(api_key=key) if (self.enabled and key) else None
+        self.client = anthropic.Anthropic(api_key=key) if (self.enabled and key and not offline) else None
         self.model = model if self.enabled else None
         self.max_tokens = max_tokens
         self.images_per_call = int(cfg.get("vlm_images_per_call", 4))
+        self.max_concurrency = int(cfg.get("vlm_max_concurrency", 4))
+        self.cache = get_vlm_cache(cfg) if self.enabled else None
+        prompt_sig = hashlib.sha1(prompts.VLM_BATCH_JSON.encode()).hexdigest()[:12]
+        # responses are only reusable for the same model, prompt and generation params
+        self.cache_ns = f"{self.model}|{self.max_tokens}|{prompt_sig}"
         self.debug = bool(cfg.get("vlm_debug", False))
         self.artifacts_dir = Path(cfg.get("artifacts_dir", "."))
         self.debug_dir = self.artifacts_dir / "debug" / "vlm"
@@ -35,11 +62,38 @@ class VisionLLM:
             self.debug_dir.mkdir(parents=True, exist_ok=True)
         self.logger = logging.getLogger("models.vlm")
 
+    @property
+    def available(self) -> bool:
+        return bool(self.model and (self.client or (self.replay is not None and self.replay.offline)))
+
+    def submit_batch(self, frames_bgr: List, context: Optional[Dict] = None) -> Future:
+        """Queue describe_batch on the shared dispatch pool; the caller keeps decoding."""
+        return _dispatcher(self.max_concurrency).submit(self.describe_batch, list(frames_bgr), context)
+
+    @traced("vlm_call", "model")
     def describe_batch(self, frames_bgr: List, context: Optional[Dict] = None) -> Optional[Dict]:
-        if not self.client or not self.model or not frames_bgr:
+        if not self.available or not frames_bgr:
             return None
         # limit images per call
         frames_bgr = frames_bgr[: self.images_per_call]
+        if self.replay is None:
+            return self._describe(frames_bgr, context)
+        # exact request key; recorded whatever answered it (similarity cache or live call)
+        key = request_key("vlm", {"model": self.model, "max_tokens": self.max_tokens}, prompts.VLM_BATCH_JSON, frames_bgr)
+        resp = self.replay.get(key)
+        if resp is not None or self.replay.offline:
+            return resp
+        resp = self._describe(frames_bgr, context)
+        if resp is not None and "raw" not in resp:
+            self.replay.put(key, resp, {"kind": "vlm", "model": self.model, "images": len(frames_bgr)})
+        return resp
+
+    def _describe(self, frames_bgr: List, context: Optional[Dict] = None) -> Optional[Dict]:
+        hashes = [dhash(img) for img in frames_bgr] if self.cache is not None else []
+        if self.cache is not None:
+            cached = self.cache.get(self.cache_ns, hashes)
+            if cached is not None:
+                return cached
         content = []
         for img in frames_bgr:
             b64, media = b64_of_bgr(img)
@@ -77,9 +131,13 @@ class VisionLLM:
                 pass
         try:
             m = re.search(r"\{.*\}", text, re.S)
-            return json.loads(m.group(0)) if m else {"raw": text}
+            parsed = json.loads(m.group(0)) if m else {"raw": text}
         except Exception:
             return {"raw": text}
+        # only well-formed JSON answers are worth replaying
+        if self.cache is not None and "raw" not in parsed:
+            self.cache.put(self.cache_ns, hashes, parsed)
+        return parsed
 
 
 
@@ -0,0 +1,153 @@
+from __future__ import annotations
+import json
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("models.vlm_cache")
+logger.addHandler(logging.NullHandler())
+
+# first-frame hash is split into 4 x 16-bit bands for disk candidate lookup; by pigeonhole
+# any hash within 3 bits shares at least one band exactly
+_BANDS = 4
+_BAND_BITS = 16
+
+
+def _bands(h: int) -> List[int]:
+    return [(h >> (i * _BAND_BITS)) & ((1 << _BAND_BITS) - 1) for i in range(_BANDS)]
+
+
+def _similar(a: Sequence[int], b: Sequence[int], max_bits: int) -> bool:
+    return len(a) == len(b) and all((x ^ y).bit_count() <= max_bits for x, y in zip(a, b))
+
+
+class VlmResponseCache:
+    """Similarity-keyed cache of VLM responses. A batch matches a cached one when it has
+    the same namespace (model/prompt/params), the same number of frames, and every frame's
+    64-bit dHash is within `max_bits` of its counterpart. Memory tier is an LRU scanned
+    linearly; the optional disk tier is a SQLite file shared across jobs and processes.
+    """
+
+    def __init__(self, disk_path: Optional[str | Path] = None, max_items: int = 512, max_bits: int = 3):
+        self.max_items = max(1, int(max_items))
+        self.max_bits = int(max_bits)
+        if self.max_bits >= _BANDS:
+            logger.info(f"vlm cache max_bits={self.max_bits} > {_BANDS - 1}; disk lookups may miss some near-duplicates")
+        self._mem: "OrderedDict[Tuple[str, Tuple[int, ...]], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            p = Path(disk_path)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(p), timeout=30, check_same_thread=False)
+            self._db.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY, ns TEXT, n INTEGER, hashes TEXT, response TEXT, created REAL);
+                CREATE TABLE IF NOT EXISTS bands (band INTEGER, value INTEGER, entry_id INTEGER);
+                CREATE INDEX IF NOT EXISTS bands_idx ON bands(band, value);
+                """
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits_memory": self.hits_memory, "hits_disk": self.hits_disk, "misses": self.misses}
+
+    def _mem_get(self, ns: str, hashes: Tuple[int, ...]) -> Optional[Dict]:
+        exact = self._mem.get((ns, hashes))
+        if exact is not None:
+            self._mem.move_to_end((ns, hashes))
+            return exact
+        for key, resp in reversed(self._mem.items()):
+            if key[0] == ns and _similar(key[1], hashes, self.max_bits):
+                self._mem.move_to_end(key)
+                return resp
+        return None
+
+    def _mem_put(self, ns: str, hashes: Tuple[int, ...], resp: Dict) -> None:
+        self._mem[(ns, hashes)] = resp
+        self._mem.move_to_end((ns, hashes))
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def _disk_get(self, ns: str, hashes: Tuple[int, ...]) -> Optional[Dict]:
+        if self._db is None or not hashes:
+            return None
+        bands = _bands(hashes[0])
+        where = " OR ".join("(b.band = ? AND b.value = ?)" for _ in bands)
+        params: List = [x for i, v in enumerate(bands) for x in (i, v)]
+        rows = self._db.execute(
+            f"SELECT DISTINCT e.hashes, e.response FROM bands b JOIN entries e ON e.id = b.entry_id "
+            f"WHERE ({where}) AND e.ns = ? AND e.n = ?",
+            params + [ns, len(hashes)],
+        ).fetchall()
+        for hs, resp in rows:
+            cand = tuple(int(x, 16) for x in hs.split(","))
+            if _similar(cand, hashes, self.max_bits):
+                return json.loads(resp)
+        return None
+
+    def _disk_put(self, ns: str, hashes: Tuple[int, ...], resp: Dict) -> None:
+        if self._db is None or not hashes:
+            return
+        with self._db:
+            cur = self._db.execute(
+                "INSERT INTO entries (ns, n, hashes, response, created) VALUES (?, ?, ?, ?, ?)",
+                (ns, len(hashes), ",".join(f"{h:x}" for h in hashes), json.dumps(resp), time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO bands (band, value, entry_id) VALUES (?, ?, ?)",
+                [(i, v, cur.lastrowid) for i, v in enumerate(_bands(hashes[0]))],
+            )
+
+    def get(self, ns: str, hashes: Sequence[int]) -> Optional[Dict]:
+        key = tuple(hashes)
+        with self._lock:
+            resp = self._mem_get(ns, key)
+            if resp is not None:
+                self.hits_memory += 1
+                return resp
+            try:
+                resp = self._disk_get(ns, key)
+            except sqlite3.Error as e:
+                logger.info(f"vlm cache disk read failed: {e}")
+                resp = None
+            if resp is not None:
+                self.hits_disk += 1
+                self._mem_put(ns, key, resp)
+                return resp
+            self.misses += 1
+            return None
+
+    def put(self, ns: str, hashes: Sequence[int], resp: Dict) -> None:
+        key = tuple(hashes)
+        with self._lock:
+            self._mem_put(ns, key, resp)
+            try:
+                self._disk_put(ns, key, resp)
+            except sqlite3.Error as e:
+                logger.info(f"vlm cache disk write failed: {e}")
+
+
+_caches: Dict[Tuple, VlmResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_vlm_cache(cfg: Dict) -> Optional[VlmResponseCache]:
+    """Process-wide cache for this config, or None when `vlm_cache` is off."""
+    if not bool(cfg.get("vlm_cache", True)):
+        return None
+    disk = cfg.get("vlm_cache_path", "data/cache/vlm_cache.sqlite")
+    key = (str(disk or ""), int(cfg.get("vlm_cache_memory_items", 512)), int(cfg.get("vlm_cache_max_bits", 3)))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = VlmResponseCache(disk or None, max_items=key[1], max_bits=key[2])
+        return cache
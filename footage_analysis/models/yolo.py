@@ -1,32 +1,192 @@
 from __future__ import annotations
-from typing import List
+from typing import Dict, List, Optional, Sequence
 import numpy as np
+import torch
+from torchvision.ops import batched_nms
 from ultralytics import YOLO
-from ..schemas import Detection
+from ..records import Det
+from ..utils.trace import span
 
 
 class YoloDetector:
-    def __init__(self, weights: str, target_classes: List[str], conf_thres: float = 0.25):
+    """Batched YOLO inference. With `tile_size` > 0 (tiled mode) and regions of interest
+    passed to `infer_batch`, each frame is also cut into native-resolution tiles covering
+    those regions only, so small targets survive that the `imgsz` downscale would erase.
+    """
+
+    def __init__(self, weights: str, target_classes: List[str], conf_thres: float = 0.25,
+                 imgsz: int = 640, batch_size: int = 8, tile_size: int = 0, tile_overlap: float = 0.2,
+                 tile_max_per_frame: int = 6, tile_nms_iou: float = 0.5):
         self.model = YOLO(weights)
         self.names = self.model.names
         self.want = set(target_classes)
         self.conf_thres = conf_thres
+        self.imgsz = int(imgsz)
+        self.batch_size = max(1, int(batch_size))
+        # class ids we keep; names missing from the model (e.g. "gun" on coco weights) are dropped
+        self.want_ids = sorted(int(i) for i, n in self.names.items() if n in self.want)
+        self.tile_size = max(0, int(tile_size or 0))
+        self.tile_overlap = min(max(float(tile_overlap), 0.0), 0.9)
+        self.tile_max = max(1, int(tile_max_per_frame))
+        self.tile_nms_iou = float(tile_nms_iou)
 
-    def infer(self, frame_bgr: np.ndarray) -> List[Detection]:
-        res = self.model.predict(source=frame_bgr, verbose=False, conf=self.conf_thres)[0]
-        out: List[Detection] = []
-        if res.boxes is None:
-            return out
-        for b in res.boxes:
-            cls_idx = int(b.cls.item())
-            cls_name = self.names.get(cls_idx, str(cls_idx))
-            if cls_name not in self.want:
-                continue
-            out.append(
-                Detection(
-                    cls=cls_name,
-                    conf=float(b.conf.item()),
-                    bbox_xyxy=[float(x) for x in b.xyxy.cpu().numpy().reshape(-1).tolist()],
+    @classmethod
+    def from_cfg(cls, cfg: Dict) -> "YoloDetector":
+        return cls(
+            cfg["yolo_weights"],
+            cfg["target_classes"],
+            cfg["conf_threshold"],
+            imgsz=int(cfg.get("yolo_imgsz", 640)),
+            batch_size=int(cfg.get("yolo_batch_size", 8)),
+            tile_size=int(cfg.get("yolo_tile_size") or 0),
+            tile_overlap=float(cfg.get("yolo_tile_overlap", 0.2)),
+            tile_max_per_frame=int(cfg.get("yolo_tile_max_per_frame", 6)),
+            tile_nms_iou=float(cfg.get("yolo_tile_nms_iou", 0.5)),
+        )
+
+    @property
+    def tiling(self) -> bool:
+        return self.tile_size > 0
+
+    def infer(self, frame_bgr: np.ndarray) -> List[Det]:
+        return self.infer_batch([frame_bgr])[0]
+
+    def infer_batch(self, frames_bgr: List[np.ndarray],
+                    regions: Optional[Sequence[Optional[np.ndarray]]] = None) -> List[List[Det]]:
+        """Run detection over N frames, `batch_size` frames per predict call.
+        `regions` (tiled mode only) holds one (k, 4) xyxy array of regions of interest per
+        frame, or None for a frame that gets the full-frame pass alone.
+        Returns one detection list per input frame, in input order.
+        """
+        if not frames_bgr:
+            return []
+        if not self.want_ids:
+            return [[] for _ in frames_bgr]
+        if self.tiling and regions is not None:
+            return self._infer_tiled(frames_bgr, regions)
+        out: List[List[Det]] = []
+        for i in range(0, len(frames_bgr), self.batch_size):
+            batch = list(frames_bgr[i: i + self.batch_size])
+            with span("yolo", "model", frames=len(batch)):
+                results = self.model.predict(
+                    source=batch,
+                    verbose=False,
+                    conf=self.conf_thres,
+                    imgsz=self.imgsz,
+                    classes=self.want_ids,
+                )
+            out.extend(self._to_detections(res) for res in results)
+        return out
+
+    def tiles_for(self, shape: Sequence[int], regions: np.ndarray) -> np.ndarray:
+        """Tiles (n, 4) int xyxy on a `tile_size` grid with `tile_overlap` that intersect any
+        region, most-covered first, at most `tile_max_per_frame`. Frames that already fit in
+        one tile get none: the full-frame pass sees them at native resolution.
+        """
+        h, w = int(shape[0]), int(shape[1])
+        t = self.tile_size
+        r = np.asarray(regions, dtype=np.float32).reshape(-1, 4)
+        if not len(r) or (w <= t and h <= t):
+            return np.zeros((0, 4), dtype=np.int64)
+        step = max(1, int(t * (1.0 - self.tile_overlap)))
+
+        def starts(n: int) -> np.ndarray:
+            if n <= t:
+                return np.zeros(1, dtype=np.int64)
+            return np.append(np.arange(0, n - t, step), n - t)
+
+        gx, gy = np.meshgrid(starts(w), starts(h))
+        x1, y1 = gx.ravel(), gy.ravel()
+        grid = np.stack([x1, y1, np.minimum(x1 + t, w), np.minimum(y1 + t, h)], axis=1)
+        iw = np.minimum(grid[:, None, 2], r[None, :, 2]) - np.maximum(grid[:, None, 0], r[None, :, 0])
+        ih = np.minimum(grid[:, None, 3], r[None, :, 3]) - np.maximum(grid[:, None, 1], r[None, :, 1])
+        cover = (np.clip(iw, 0, None) * np.clip(ih, 0, None)).sum(axis=1)
+        order = np.argsort(-cover, kind="stable")
+        return grid[order[cover[order] > 0][: self.tile_max]]
+
+    def _infer_tiled(self, frames_bgr: List[np.ndarray], regions: Sequence[Optional[np.ndarray]]) -> List[List[Det]]:
+        out: List[List[Det]] = []
+        for i in range(0, len(frames_bgr), self.batch_size):
+            batch = list(frames_bgr[i: i + self.batch_size])
+            # full frames first, then every frame's tiles: one predict call for all of them
+            images = list(batch)
+            owners: List[int] = []
+            tiles: List[List[int]] = []
+            for j, (frame, rois) in enumerate(zip(batch, regions[i: i + self.batch_size])):
+                if rois is None:
+                    continue
+                for x1, y1, x2, y2 in self.tiles_for(frame.shape, rois).tolist():
+                    images.append(frame[y1:y2, x1:x2])
+                    owners.append(j)
+                    tiles.append([x1, y1, x2, y2])
+            with span("yolo", "model", frames=len(batch), tiles=len(tiles)):
+                results = self.model.predict(
+                    source=images,
+                    verbose=False,
+                    conf=self.conf_thres,
+                    imgsz=self.imgsz,
+                    classes=self.want_ids,
                 )
-            )
+            if not tiles:
+                out.extend(self._to_detections(res) for res in results)
+                continue
+            out.extend(self._merge_tiles(results, batch, owners, tiles))
+        return out
+
+    def _merge_tiles(self, results, batch: List[np.ndarray], owners: List[int], tiles: List[List[int]]) -> List[List[Det]]:
+        """Shift tile boxes into frame coordinates and run one class-aware NMS over the
+        detections of every frame in the batch (frame and class folded into the NMS group).
+        Tile boxes touching a tile edge inside the frame are cut-off objects; the
+        overlapping neighbour tile or the full-frame pass holds the whole box.
+        """
+        n_frames = len(batch)
+        parts = []
+        for k, res in enumerate(results):
+            data = self._filter(res)
+            if data is None:
+                continue
+            owner = k if k < n_frames else owners[k - n_frames]
+            if k >= n_frames:
+                x1, y1, x2, y2 = tiles[k - n_frames]
+                fh, fw = batch[owner].shape[:2]
+                edge = 2.0
+                cut = ((data[:, 0] <= edge) & (x1 > 0)) | ((data[:, 1] <= edge) & (y1 > 0))
+                cut |= ((data[:, 2] >= x2 - x1 - edge) & (x2 < fw)) | ((data[:, 3] >= y2 - y1 - edge) & (y2 < fh))
+                data = data[~cut]
+                data[:, 0:4] += data.new_tensor([x1, y1, x1, y1])
+            parts.append(torch.cat([data, data.new_full((len(data), 1), owner)], dim=1))
+        out: List[List[Det]] = [[] for _ in range(n_frames)]
+        if not parts:
+            return out
+        det = torch.cat(parts)
+        groups = det[:, 6].long() * (max(self.want_ids) + 1) + det[:, 5].long()
+        keep = batched_nms(det[:, :4], det[:, 4], groups, self.tile_nms_iou)
+        rows = det[keep].cpu().numpy()
+        # batched_nms returns by descending score; keep that order within each frame
+        for owner in range(n_frames):
+            out[owner] = self._rows_to_dets(rows[rows[:, 6] == owner].tolist())
         return out
+
+    def _filter(self, res) -> Optional[torch.Tensor]:
+        boxes = res.boxes
+        if boxes is None or len(boxes) == 0:
+            return None
+        # boxes.data is (n, 6): x1, y1, x2, y2, conf, cls; filter on-device before leaving torch
+        data = boxes.data
+        cls_t = data[:, 5]
+        keep = (cls_t[:, None] == cls_t.new_tensor(self.want_ids)[None, :]).any(dim=1)
+        keep &= data[:, 4] >= self.conf_thres
+        return data[keep]
+
+    def _to_detections(self, res) -> List[Det]:
+        data = self._filter(res)
+        if data is None:
+            return []
+        return self._rows_to_dets(data.cpu().numpy().tolist())
+
+    def _rows_to_dets(self, rows: List[List[float]]) -> List[Det]:
+        names = self.names
+        return [
+            Det(names.get(int(r[5]), str(int(r[5]))), float(r[4]), [float(r[0]), float(r[1]), float(r[2]), float(r[3])])
+            for r in rows
+        ]
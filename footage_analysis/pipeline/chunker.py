@@ -3,6 +3,7 @@ import subprocess
 from pathlib import Path
 from typing import List, Dict
 from ..utils import ensure_dir
+from ..utils.trace import span
 import os
 
 
@@ -35,7 +36,8 @@ def chunk_video(video_path: str | Path, out_root: str | Path, seconds: int) -> L
         "1",
         str(pattern),
     ]
-    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    with span("segment", video=vp.name):
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
     if proc.returncode != 0:
         raise RuntimeError(f"ffmpeg segment failed for {vp.name}: {proc.stderr.strip()}")
 
@@ -44,11 +46,12 @@ def chunk_video(video_path: str | Path, out_root: str | Path, seconds: int) -> L
     transcode_script = scripts_dir / "transcode.sh"
     if transcode_script.exists():
         try:
-            subprocess.run([
-                "bash",
-                str(transcode_script),
-                str(odir),
-            ], check=True)
+            with span("transcode", video=vp.name):
+                subprocess.run([
+                    "bash",
+                    str(transcode_script),
+                    str(odir),
+                ], check=True)
         except subprocess.CalledProcessError as e:
             print(f"[chunker] transcode warning for {odir}: {e}")
 
@@ -0,0 +1,266 @@
+from __future__ import annotations
+import os
+import shutil
+import subprocess
+import threading
+import time
+import logging
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, Iterator, Optional, Tuple
+import cv2
+import numpy as np
+
+from ..schemas import VideoSummary
+from ..utils import write_json
+from ..utils.columnar import write_clip
+from ..utils.trace import span
+from ..models.vlm import VisionLLM
+from .run import ChunkAnalyzer, VideoOutput, build_detector, columnar_enabled, finalize_video, make_tracker
+from .synopsis import SynopsisPipeline
+
+
+logger = logging.getLogger("pipeline.live")
+logger.addHandler(logging.NullHandler())
+
+
+class FfmpegFrameSource:
+    """Decode a stream URL, named pipe or (growing) file with ffmpeg into fixed-size BGR
+    frames at a fixed rate. `realtime` reads the input at its native rate (-re), which
+    turns a finished file into a live replay; `follow` keeps reading a file that is still
+    being written until no new data arrives for `idle_timeout_s`.
+    """
+
+    def __init__(self, source: str, width: int, height: int, fps: float, realtime: bool = False,
+                 follow: bool = False, idle_timeout_s: float = 30.0):
+        self.source = source
+        self.width, self.height, self.fps = int(width), int(height), float(fps)
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        if realtime:
+            cmd += ["-re"]
+        if follow:
+            cmd += ["-follow", "1", "-rw_timeout", str(int(idle_timeout_s * 1e6))]
+        w, h = self.width, self.height
+        cmd += [
+            "-i", source,
+            "-an",
+            # constant output rate and letterboxed size so every frame is exactly w*h*3 bytes
+            "-vf", f"fps={self.fps},scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2",
+            "-pix_fmt", "bgr24",
+            "-f", "rawvideo",
+            "pipe:1",
+        ]
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=w * h * 3)
+        # drain stderr as it arrives so a chatty ffmpeg never blocks on a full pipe
+        threading.Thread(target=self._log_stderr, name="ffmpeg-stderr", daemon=True).start()
+
+    def _log_stderr(self) -> None:
+        for line in self.proc.stderr:
+            line = line.decode(errors="replace").strip()
+            if line:
+                logger.info(f"ffmpeg {self.source}: {line}")
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        n = self.width * self.height * 3
+        stdout = self.proc.stdout
+        while True:
+            buf = stdout.read(n)
+            if len(buf) < n:
+                break
+            yield np.frombuffer(buf, dtype=np.uint8).reshape(self.height, self.width, 3)
+        rc = self.proc.wait()
+        if rc != 0:
+            logger.info(f"ffmpeg exited {rc} for {self.source}")
+
+    def close(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.kill()
+
+
+class ReplayFrameSource:
+    """Play a local file at its own frame rate with OpenCV; the same interface as
+    FfmpegFrameSource, for exercising live mode without a feed (or without ffmpeg).
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"cannot open {path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.speed = max(1e-3, float(speed))
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        t0 = time.monotonic()
+        i = 0
+        while True:
+            ok, frame = self.cap.read()
+            if not ok:
+                break
+            delay = t0 + i / (self.fps * self.speed) - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            i += 1
+            yield frame
+        self.cap.release()
+
+    def close(self) -> None:
+        self.cap.release()
+
+
+def open_live_source(source: str, cfg: Dict, replay: bool = False):
+    fps = float(cfg.get("live_fps", 15))
+    if replay and not shutil.which("ffmpeg"):
+        logger.info("ffmpeg not found; replaying with OpenCV at the file's own frame rate")
+        return ReplayFrameSource(source)
+    # a regular file that is not being replayed is assumed to still be growing
+    follow = not replay and os.path.isfile(source)
+    return FfmpegFrameSource(
+        source,
+        int(cfg.get("live_width", 1280)),
+        int(cfg.get("live_height", 720)),
+        fps,
+        realtime=replay,
+        follow=follow,
+        idle_timeout_s=float(cfg.get("live_idle_timeout_seconds", 30)),
+    )
+
+
+class FrameBuffer:
+    """Bounded hand-off from a reader thread to the analyzer. When analysis falls behind,
+    the oldest frames are dropped so frames are never more than `max_frames` stale.
+    Items are (seq, arrival time, frame); `seq` counts every frame read, dropped or not.
+    """
+
+    def __init__(self, source, max_frames: int):
+        self.source = source
+        self._q: Deque[Tuple[int, float, np.ndarray]] = deque(maxlen=max(1, int(max_frames)))
+        self._cv = threading.Condition()
+        self._done = False
+        self.read = 0
+        self._thread = threading.Thread(target=self._run, name="live-reader", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            for frame in self.source:
+                with self._cv:
+                    self._q.append((self.read, time.monotonic(), frame))
+                    self.read += 1
+                    self._cv.notify()
+        except Exception as e:
+            logger.info(f"live reader stopped: {e}")
+        finally:
+            with self._cv:
+                self._done = True
+                self._cv.notify()
+
+    def get(self, timeout: float) -> Optional[Tuple[int, float, np.ndarray]]:
+        """Next frame, or None on timeout or once the source is exhausted (see `done`)."""
+        with self._cv:
+            if not self._q and not self._done:
+                self._cv.wait(timeout)
+            return self._q.popleft() if self._q else None
+
+    @property
+    def done(self) -> bool:
+        with self._cv:
+            return self._done and not self._q
+
+    def close(self) -> None:
+        self.source.close()
+
+
+def process_stream(source: str, cfg: Dict, name: Optional[str] = None, replay: bool = False) -> VideoSummary:
+    """Analyze a live feed as it arrives. Frames are cut into consecutive windows of
+    `live_window_seconds`; each window is analyzed like a chunk and written as soon as it
+    closes, so results trail the feed by about one window plus analysis time.
+    Track ids carry across windows. Frames older than `live_max_latency_seconds` are
+    dropped rather than queued.
+    """
+    video_path = name or source
+    src = open_live_source(source, cfg, replay)
+    fps = float(src.fps)
+    window_s = float(cfg.get("live_window_seconds", 5))
+    window_frames = max(1, int(round(window_s * fps)))
+    yolo = build_detector(cfg)
+    vlm = VisionLLM(cfg)
+    tracker = make_tracker(cfg)
+    output = VideoOutput(video_path, cfg)
+    columnar = columnar_enabled(cfg)
+    synopses = SynopsisPipeline(cfg, int(cfg.get("synopsis_batch_size", 1))) if bool(cfg.get("enable_llm", True)) else None
+
+    # start reading only once the models are loaded, so startup does not count as lag
+    buf = FrameBuffer(src, int(float(cfg.get("live_max_latency_seconds", 2)) * fps))
+    logger.info(f"live {source} -> {video_path} fps={fps} window={window_s}s replay={replay}")
+
+    analyzer: Optional[ChunkAnalyzer] = None
+    index = -1
+    win_start = 0
+    last_arrival = 0.0
+    stats = {"windows": 0, "frames_received": 0, "max_lag_seconds": 0.0}
+
+    def _close_window() -> None:
+        with span("window", video=Path(video_path).stem, index=analyzer.meta["index"]):
+            clip = analyzer.finish()
+        # seconds between the window's last frame arriving and its results being written
+        lag = time.monotonic() - last_arrival
+        stats["windows"] += 1
+        stats["max_lag_seconds"] = round(max(stats["max_lag_seconds"], lag), 3)
+        logger.info(f"live window {clip.chunk_index} frames={len(clip.frames)} lag={lag:.2f}s")
+        if synopses is None:
+            output.add(clip)
+            return
+        # write right away; rewritten with its synopsis once that lands
+        write_clip(clip, output.out_dir, columnar=columnar)
+        synopses.add(clip)
+        for c in synopses.ready():
+            output.add(c)
+
+    # VLM cadence carried across windows, including windows closed by a stall
+    last_vlm_t: Optional[float] = None
+    try:
+        while True:
+            item = buf.get(timeout=window_s)
+            if item is None:
+                if buf.done:
+                    break
+                # feed stalled: don't hold a window open indefinitely
+                if analyzer is not None:
+                    last_vlm_t = analyzer.last_vlm_t
+                    _close_window()
+                    analyzer = None
+                continue
+            seq, arrived, frame = item
+            stats["frames_received"] += 1
+            if analyzer is None or seq - win_start >= window_frames:
+                if analyzer is not None:
+                    last_vlm_t = analyzer.last_vlm_t
+                    _close_window()
+                index += 1
+                win_start = seq
+                start = seq / fps
+                meta = {"chunk_path": source, "index": index, "start_sec": round(start, 3), "end_sec": round(start + window_s, 3)}
+                analyzer = ChunkAnalyzer(meta, cfg, yolo, vlm, video_path, fps, tracker=tracker, synopsis=synopses is None)
+                if last_vlm_t is not None:
+                    analyzer.last_vlm_t = last_vlm_t
+            fidx = seq - win_start
+            last_arrival = arrived
+            if analyzer.wants(fidx) and analyzer.analyzed < analyzer.max_frames:
+                analyzer.feed(fidx, frame)
+        if analyzer is not None:
+            _close_window()
+    finally:
+        buf.close()
+
+    if synopses is not None:
+        for c in synopses.finish():
+            output.add(c)
+    dropped = buf.read - stats["frames_received"]
+    logger.info(f"live {source} done frames_read={buf.read} dropped={dropped} windows={stats['windows']} "
+                f"max_lag={stats['max_lag_seconds']:.2f}s")
+    write_json(
+        {"source": source, "fps": fps, "window_seconds": window_s, "frames_read": buf.read,
+         "frames_dropped": dropped, **stats},
+        Path(output.out_dir) / "live_stats.json",
+    )
+    return finalize_video(video_path, output, cfg)
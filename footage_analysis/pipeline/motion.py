@@ -0,0 +1,126 @@
+from __future__ import annotations
+from typing import Dict, List, Optional
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap motion check on tiny grayscale frames against a running background.
+    `check` returns True when a frame should go to the detector. While motion is seen
+    (and for `hold_frames` after) the gate asks for frames every `active_stride`;
+    otherwise frames are sampled at `idle_stride` and static ones are skipped, except
+    a keyframe every `keyframe_every` frames so detections never go fully stale.
+    `regions` turns the last frame's changed pixels into boxes for tiled detection.
+    """
+
+    def __init__(
+        self,
+        idle_stride: int = 5,
+        active_stride: int = 2,
+        width: int = 64,
+        pixel_delta: int = 18,
+        threshold: float = 0.01,
+        hold_frames: int = 30,
+        keyframe_every: int = 150,
+        bg_alpha: float = 0.05,
+    ):
+        self.idle_stride = max(1, int(idle_stride))
+        self.active_stride = max(1, min(int(active_stride), self.idle_stride))
+        self.width = max(8, int(width))
+        self.pixel_delta = float(pixel_delta)
+        self.threshold = float(threshold)
+        self.hold_frames = int(hold_frames)
+        self.keyframe_every = max(1, int(keyframe_every))
+        self.bg_alpha = float(bg_alpha)
+        self._bg: Optional[np.ndarray] = None
+        self._mask: Optional[np.ndarray] = None
+        self._last_motion_frame = -10**9
+        self._last_detect_frame = -10**9
+        self._cur = 0
+        self.skipped: List[Dict] = []
+        self.last_score = 0.0
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict) -> "MotionGate":
+        return cls(
+            idle_stride=int(cfg["frame_stride"]),
+            active_stride=int(cfg.get("motion_active_stride", 2)),
+            width=int(cfg.get("motion_downscale_width", 64)),
+            pixel_delta=int(cfg.get("motion_pixel_delta", 18)),
+            threshold=float(cfg.get("motion_threshold", 0.01)),
+            hold_frames=int(cfg.get("motion_hold_frames", 30)),
+            keyframe_every=int(cfg.get("motion_keyframe_every", 150)),
+        )
+
+    @property
+    def active(self) -> bool:
+        return self._bg is None or self._cur - self._last_motion_frame <= self.hold_frames
+
+    def wants(self, frame_idx: int) -> bool:
+        """Whether this frame index is due for a motion check (before decoding work)."""
+        self._cur = frame_idx
+        stride = self.active_stride if self.active else self.idle_stride
+        return frame_idx % stride == 0
+
+    def _tiny(self, frame_bgr: np.ndarray) -> np.ndarray:
+        h, w = frame_bgr.shape[:2]
+        th = max(1, int(round(h * self.width / max(1, w))))
+        small = cv2.resize(frame_bgr, (self.width, th), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32)
+
+    def observe(self, frame_bgr: np.ndarray) -> float:
+        """Diff a frame against the background and fold it in; returns the changed fraction."""
+        tiny = self._tiny(frame_bgr)
+        if self._bg is None or self._bg.shape != tiny.shape:
+            self._bg = tiny
+            self._mask = None
+            score = 1.0
+        else:
+            diff = cv2.absdiff(tiny, self._bg)
+            self._mask = diff > self.pixel_delta
+            score = float(np.count_nonzero(self._mask)) / diff.size
+            cv2.accumulateWeighted(tiny, self._bg, self.bg_alpha)
+        self.last_score = score
+        return score
+
+    def regions(self, shape) -> np.ndarray:
+        """Boxes (k, 4) xyxy, in pixels of a frame of `shape`, around the connected changed
+        areas of the last observed frame (dilated by one tiny pixel). Empty before a background exists.
+        """
+        if self._mask is None or not self._mask.any():
+            return np.zeros((0, 4), dtype=np.float32)
+        mask = cv2.dilate(self._mask.astype(np.uint8), np.ones((3, 3), np.uint8))
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        st = stats[1:, :4].astype(np.float32)
+        sx, sy = shape[1] / mask.shape[1], shape[0] / mask.shape[0]
+        return np.stack([st[:, 0] * sx, st[:, 1] * sy, (st[:, 0] + st[:, 2]) * sx, (st[:, 1] + st[:, 3]) * sy], axis=1)
+
+    def check(self, frame_idx: int, frame_bgr: np.ndarray) -> bool:
+        self._cur = frame_idx
+        score = self.observe(frame_bgr)
+
+        if score >= self.threshold:
+            self._last_motion_frame = frame_idx
+            reason = None
+        elif frame_idx - self._last_detect_frame >= self.keyframe_every:
+            reason = None
+        else:
+            reason = "static"
+
+        if reason is None:
+            self._last_detect_frame = frame_idx
+            return True
+        self._record_skip(frame_idx, reason, score)
+        return False
+
+    def _record_skip(self, frame_idx: int, reason: str, score: float) -> None:
+        # store runs rather than one entry per frame to keep summaries small
+        last = self.skipped[-1] if self.skipped else None
+        if last and last["reason"] == reason and frame_idx - last["end_frame"] <= self.idle_stride:
+            last["end_frame"] = frame_idx
+            last["count"] += 1
+            last["max_score"] = max(last["max_score"], round(score, 4))
+            return
+        self.skipped.append(
+            {"start_frame": frame_idx, "end_frame": frame_idx, "count": 1, "reason": reason, "max_score": round(score, 4)}
+        )
@@ -0,0 +1,187 @@
+from __future__ import annotations
+import os
+import logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+
+from ..records import Clip
+from ..models.vlm import VisionLLM
+from ..utils.trace import get_tracer, start_tracing
+from .chunker import chunk_video
+from .run import VideoOutput, build_detector, finalize_video, process_chunk, video_out_dir
+from .schedule import ChunkScheduler
+from .tracker import TrackStitcher
+from .synopsis import SynopsisPipeline
+
+
+logger = logging.getLogger("pipeline.pool")
+logger.addHandler(logging.NullHandler())
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+# per-worker state, set once by _init_worker
+_worker: Dict = {}
+
+
+def default_worker_threads(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _limit_threads(n: int) -> None:
+    for var in _THREAD_ENV_VARS:
+        os.environ[var] = str(n)
+    import cv2
+
+    cv2.setNumThreads(n)
+    try:
+        import torch
+
+        torch.set_num_threads(n)
+        torch.set_num_interop_threads(1)
+    except (ImportError, RuntimeError):
+        pass
+
+
+def _init_worker(cfg: Dict, threads: int) -> None:
+    """Runs once per worker process: cap thread pools, load and warm the models."""
+    _limit_threads(threads)
+    if bool(cfg.get("trace", False)):
+        start_tracing(cfg)
+    yolo = build_detector(cfg)
+    imgsz = int(cfg.get("yolo_imgsz", 640))
+    # warmup so the first real chunk does not pay for lazy init / kernel selection
+    yolo.infer(np.zeros((imgsz, imgsz, 3), dtype=np.uint8))
+    _worker.update(cfg=cfg, yolo=yolo, vlm=VisionLLM(cfg))
+    logger.info(f"worker pid={os.getpid()} ready threads={threads}")
+
+
+def _run_chunk(video_path: str, meta: Dict) -> Tuple[Clip, Optional[Dict]]:
+    # the worker decodes its own chunk file, so frames never cross the process boundary
+    cfg = _worker["cfg"]
+    # stitching, synopses and the clip write all happen in the parent (VideoOutput.add)
+    clip = process_chunk(meta, cfg, _worker["yolo"], _worker["vlm"], video_path, synopsis=False)
+    # trace events recorded in the worker ride back with the clip
+    tracer = get_tracer()
+    return clip, tracer.drain() if tracer is not None else None
+
+
+class _VideoAssembly:
+    """Parent-side reassembly of one video. Clips arrive in completion order; they are
+    buffered only until the next chunk in order is available, then stitched, handed to
+    the synopsis pipeline and streamed out, so at most the out-of-order window is held.
+    """
+
+    def __init__(self, video_path: str, metas: List[Dict], cfg: Dict):
+        self.video_path = video_path
+        self.cfg = cfg
+        self.order = [m["index"] for m in metas]
+        self.pos = 0
+        self.buffer: Dict[int, Optional[Clip]] = {}
+        self.stitcher = TrackStitcher(float(cfg["track_iou_threshold"])) if bool(cfg.get("track_across_chunks", True)) else None
+        self.synopses = SynopsisPipeline(cfg, int(cfg.get("synopsis_batch_size", 1))) if bool(cfg.get("enable_llm", True)) else None
+        self.output = VideoOutput(video_path, cfg, keep_clips=not bool(cfg.get("stream_video_summary", True)))
+
+    @property
+    def done(self) -> bool:
+        return self.pos >= len(self.order)
+
+    def add(self, index: int, clip: Optional[Clip]) -> None:
+        """`clip` is None for a failed chunk, which is skipped in order."""
+        self.buffer[index] = clip
+        while not self.done and self.order[self.pos] in self.buffer:
+            clip = self.buffer.pop(self.order[self.pos])
+            self.pos += 1
+            if clip is None:
+                continue
+            if self.stitcher is not None:
+                # chunks were tracked independently; join ids at the boundaries
+                self.stitcher.add(clip)
+            if self.synopses is None:
+                self.output.add(clip)
+                continue
+            self.synopses.add(clip)
+            for c in self.synopses.ready():
+                self.output.add(c)
+
+    def finish(self) -> None:
+        if self.synopses is not None:
+            for c in self.synopses.finish():
+                self.output.add(c)
+        finalize_video(self.video_path, self.output, self.cfg)
+
+
+def run_videos_process_pool(videos: List[str], cfg: Dict, workers: int, threads: Optional[int] = None,
+                            schedule: Optional[ChunkScheduler] = None,
+                            on_video_done: Optional[Callable[[str], None]] = None) -> None:
+    """Process videos by scheduling individual chunks across a process pool.
+    Clips are reassembled per video in chunk order as they land and streamed to disk;
+    each video is finalized as soon as its last chunk lands, so one long video does not
+    hold back the rest. With a `schedule`, chunks outside its incident window are dropped
+    and the rest are submitted highest priority first. `on_video_done(video_path)` is
+    called after each video is finalized.
+    """
+    workers = max(1, int(workers))
+    threads = int(threads or cfg.get("worker_threads") or default_worker_threads(workers))
+
+    # segmentation is ffmpeg-bound; fan it out with threads in the parent
+    chunks_by_video: Dict[str, List[Dict]] = {}
+    with ThreadPoolExecutor(max_workers=workers) as tex:
+        futs = {tex.submit(chunk_video, v, cfg["artifacts_dir"], cfg["chunk_seconds"]): v for v in videos}
+        for fut in as_completed(futs):
+            v = futs[fut]
+            try:
+                metas = fut.result()
+                chunks_by_video[v] = schedule.select(v, metas) if schedule is not None else metas
+                video_out_dir(v, cfg)
+            except Exception as e:
+                logger.exception(f"chunking failed for {v}: {e}")
+
+    # interleave chunks across videos so every video makes progress from the start
+    tasks: List[Tuple[str, Dict]] = []
+    depth = max((len(c) for c in chunks_by_video.values()), default=0)
+    for i in range(depth):
+        for v in videos:
+            metas = chunks_by_video.get(v) or []
+            if i < len(metas):
+                tasks.append((v, metas[i]))
+    if schedule is not None:
+        # closest to the shot in space and time first; the pool runs tasks in submit order
+        tasks = schedule.order_tasks(tasks)
+
+    assemblies = {v: _VideoAssembly(v, metas, cfg) for v, metas in chunks_by_video.items()}
+    for v, st in list(assemblies.items()):
+        if st.done:
+            st.finish()
+            del assemblies[v]
+            if on_video_done is not None:
+                on_video_done(v)
+    logger.info(f"process pool: workers={workers} threads/worker={threads} chunks={len(tasks)} videos={len(videos)}")
+
+    ctx = mp.get_context(str(cfg.get("process_start_method", "spawn")))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker, initargs=(cfg, threads)) as ex:
+        futs = {ex.submit(_run_chunk, v, meta): (v, meta) for v, meta in tasks}
+        for fut in as_completed(futs):
+            # drop our reference so a finished clip is freed once it is streamed out
+            v, meta = futs.pop(fut)
+            st = assemblies.get(v)
+            if st is None:
+                continue
+            try:
+                clip, trace = fut.result()
+                if trace is not None and get_tracer() is not None:
+                    get_tracer().merge(trace)
+            except Exception as e:
+                logger.exception(f"failed processing {v} chunk {meta.get('index')}: {e}")
+                clip = None
+            try:
+                st.add(meta["index"], clip)
+                if st.done:
+                    st.finish()
+                    del assemblies[v]
+                    if on_video_done is not None:
+                        on_video_done(v)
+            except Exception as e:
+                logger.exception(f"failed finalizing {v}: {e}")
+                del assemblies[v]
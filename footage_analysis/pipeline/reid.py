@@ -0,0 +1,195 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import cv2
+import numpy as np
+from scipy.spatial import cKDTree
+
+# hue x saturation bins of the appearance histogram
+H_BINS = 16
+S_BINS = 4
+EMB_DIM = H_BINS * S_BINS
+
+
+def appearance_embedding(frame_bgr: np.ndarray, bbox_xyxy: Sequence[float]) -> Optional[np.ndarray]:
+    """L2-normalized hue/saturation histogram of the box crop, or None for empty crops."""
+    h, w = frame_bgr.shape[:2]
+    x1, y1, x2, y2 = (int(round(v)) for v in bbox_xyxy)
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(w, x2), min(h, y2)
+    if x2 - x1 < 4 or y2 - y1 < 4:
+        return None
+    hsv = cv2.cvtColor(frame_bgr[y1:y2, x1:x2], cv2.COLOR_BGR2HSV)
+    hist = cv2.calcHist([hsv], [0, 1], None, [H_BINS, S_BINS], [0, 180, 0, 256]).reshape(-1)
+    norm = float(np.linalg.norm(hist))
+    if norm <= 0:
+        return None
+    return (hist / norm).astype(np.float32)
+
+
+class TrackAppearance:
+    """Running per-track appearance for one clip. Samples every `sample_every`-th
+    observation of a track so the histogram cost stays a small fraction of detection.
+    """
+
+    def __init__(self, classes: Sequence[str] = ("person",), sample_every: int = 5):
+        self.classes = set(classes)
+        self.sample_every = max(1, int(sample_every))
+        self.tracks: Dict[int, Dict[str, Any]] = {}
+
+    def observe(self, frame_bgr: np.ndarray, detections: List[Any], t_sec: float) -> None:
+        for d in detections:
+            if d.track_id is None or d.cls not in self.classes:
+                continue
+            tr = self.tracks.get(d.track_id)
+            if tr is None:
+                tr = self.tracks[d.track_id] = {"cls": d.cls, "seen": 0, "n": 0, "sum": np.zeros(EMB_DIM, np.float32),
+                                                "first_t": t_sec, "last_t": t_sec}
+            tr["last_t"] = t_sec
+            tr["seen"] += 1
+            if (tr["seen"] - 1) % self.sample_every:
+                continue
+            emb = appearance_embedding(frame_bgr, d.bbox_xyxy)
+            if emb is not None:
+                tr["sum"] += emb
+                tr["n"] += 1
+
+    def to_dict(self) -> Dict[int, Dict[str, Any]]:
+        out: Dict[int, Dict[str, Any]] = {}
+        for tid, tr in self.tracks.items():
+            if not tr["n"]:
+                continue
+            mean = tr["sum"] / tr["n"]
+            mean /= max(1e-9, float(np.linalg.norm(mean)))
+            out[tid] = {
+                "cls": tr["cls"],
+                "n": tr["n"],
+                "first_t": round(tr["first_t"], 3),
+                "last_t": round(tr["last_t"], 3),
+                "emb": [round(float(x), 4) for x in mean],
+            }
+        return out
+
+
+def merge_track_embeddings(clips: List[Any], merged: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[int, Dict[str, Any]]:
+    """Merge per-clip track embeddings of one video (weighted by sample count).
+    Pass the previous result as `merged` to fold clips in one at a time.
+    """
+    merged = {} if merged is None else merged
+    for clip in clips:
+        for tid, tr in (getattr(clip, "track_embeddings", None) or {}).items():
+            tid = int(tid)
+            emb = np.asarray(tr["emb"], dtype=np.float32) * tr["n"]
+            m = merged.get(tid)
+            if m is None:
+                merged[tid] = {"cls": tr["cls"], "n": tr["n"], "first_t": tr["first_t"], "last_t": tr["last_t"], "sum": emb}
+            else:
+                m["n"] += tr["n"]
+                m["sum"] = m["sum"] + emb
+                m["first_t"] = min(m["first_t"], tr["first_t"])
+                m["last_t"] = max(m["last_t"], tr["last_t"])
+    return merged
+
+
+def write_video_reid(path: str | Path, merged: Dict[int, Dict[str, Any]]) -> None:
+    ids = np.asarray(sorted(merged), dtype=np.int64)
+    emb = np.zeros((len(ids), EMB_DIM), dtype=np.float32)
+    for i, tid in enumerate(ids.tolist()):
+        v = merged[tid]["sum"]
+        emb[i] = v / max(1e-9, float(np.linalg.norm(v)))
+    np.savez_compressed(
+        path,
+        track_id=ids,
+        cls=np.asarray([merged[t]["cls"] for t in ids.tolist()], dtype=str),
+        n=np.asarray([merged[t]["n"] for t in ids.tolist()], dtype=np.int32),
+        first_t=np.asarray([merged[t]["first_t"] for t in ids.tolist()], dtype=np.float32),
+        last_t=np.asarray([merged[t]["last_t"] for t in ids.tolist()], dtype=np.float32),
+        emb=emb,
+    )
+
+
+class ReidIndex:
+    """Job-level appearance index over every video's tracks, backed by a k-d tree on
+    unit-norm embeddings (euclidean radius r <=> cosine similarity >= 1 - r^2 / 2).
+    """
+
+    def __init__(self, videos: List[str], video_idx: np.ndarray, track_id: np.ndarray, cls: np.ndarray,
+                 first_t: np.ndarray, last_t: np.ndarray, emb: np.ndarray):
+        self.videos = videos
+        self.video_idx = video_idx
+        self.track_id = track_id
+        self.cls = cls
+        self.first_t = first_t
+        self.last_t = last_t
+        self.emb = emb
+        self.tree = cKDTree(emb) if len(emb) else None
+
+    def __len__(self) -> int:
+        return len(self.track_id)
+
+    @classmethod
+    def from_paths(cls, paths: Dict[str, str | Path]) -> "ReidIndex":
+        """`paths` maps video name -> reid.npz path."""
+        videos, vidx, tids, clss, t0, t1, embs = [], [], [], [], [], [], []
+        for name, p in paths.items():
+            try:
+                # read every array before appending any, so a bad file cannot misalign them
+                with np.load(p) as z:
+                    arrays = (z["track_id"], z["cls"], z["first_t"], z["last_t"], z["emb"])
+            except (OSError, KeyError, ValueError):
+                continue
+            n = len(arrays[0])
+            if not n:
+                continue
+            vidx.append(np.full(n, len(videos), dtype=np.int32))
+            for dst, arr in zip((tids, clss, t0, t1, embs), arrays):
+                dst.append(arr)
+            videos.append(name)
+        if not videos:
+            empty = np.zeros(0)
+            return cls([], empty.astype(np.int32), empty.astype(np.int64), empty.astype(str), empty, empty,
+                       np.zeros((0, EMB_DIM), np.float32))
+        return cls(videos, np.concatenate(vidx), np.concatenate(tids), np.concatenate(clss),
+                   np.concatenate(t0), np.concatenate(t1), np.concatenate(embs).astype(np.float32))
+
+    def _entry(self, i: int) -> Dict[str, Any]:
+        return {
+            "video": self.videos[int(self.video_idx[i])],
+            "track_id": int(self.track_id[i]),
+            "cls": str(self.cls[i]),
+            "first_t": round(float(self.first_t[i]), 2),
+            "last_t": round(float(self.last_t[i]), 2),
+        }
+
+    def query(self, emb: np.ndarray, k: int = 5, min_similarity: float = 0.9) -> List[Dict[str, Any]]:
+        """Nearest tracks to one embedding across all videos."""
+        if self.tree is None:
+            return []
+        k = min(k, len(self))
+        dist, idx = self.tree.query(np.asarray(emb, dtype=np.float32), k=k)
+        out = []
+        for d, i in zip(np.atleast_1d(dist), np.atleast_1d(idx)):
+            sim = 1.0 - float(d) ** 2 / 2.0
+            if sim >= min_similarity:
+                out.append({**self._entry(int(i)), "similarity": round(sim, 4)})
+        return out
+
+    def cross_camera_matches(self, min_similarity: float = 0.9, max_links: int = 200) -> List[Dict[str, Any]]:
+        """Same-class track pairs from different videos above the similarity cutoff,
+        best first. Uses the tree's radius search instead of comparing every pair.
+        """
+        if self.tree is None:
+            return []
+        r = float(np.sqrt(max(0.0, 2.0 * (1.0 - min_similarity))))
+        pairs = self.tree.query_pairs(r, output_type="ndarray")
+        if not len(pairs):
+            return []
+        a, b = pairs[:, 0], pairs[:, 1]
+        keep = (self.video_idx[a] != self.video_idx[b]) & (self.cls[a] == self.cls[b])
+        a, b = a[keep], b[keep]
+        sims = np.einsum("ij,ij->i", self.emb[a], self.emb[b])
+        order = np.argsort(-sims)[:max_links]
+        return [
+            {"a": self._entry(int(a[i])), "b": self._entry(int(b[i])), "similarity": round(float(sims[i]), 4)}
+            for i in order
+        ]
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import os
+import json
+import time
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from ..utils import write_json, prompts
+from ..utils.context import build_job_context_from_paths
+from ..utils.trace import traced
+from ..models.llm import synthesize_text, PRIORITY_JOB_REPORT
+from .reid import ReidIndex
+
+
+logger = logging.getLogger("pipeline.report")
+logger.addHandler(logging.NullHandler())
+
+JOB_REPORT_FILENAME = "job_report.json"
+
+
+def _context_items(artifacts_dir: Path, videos: Optional[Set[str]] = None) -> List[Dict]:
+    summaries_root = artifacts_dir / "summaries"
+    items = []
+    if not summaries_root.exists():
+        return items
+    for vid_dir in sorted(summaries_root.iterdir()):
+        if not vid_dir.is_dir() or (videos is not None and vid_dir.name not in videos):
+            continue
+        vs_path = vid_dir / "video_summary.json"
+        if vs_path.exists():
+            items.append({
+                "video": vid_dir.name,
+                "summary_path": str(vs_path),
+                "reid_path": str(vid_dir / "reid.npz"),
+            })
+    return items
+
+
+def _push(url: str, payload: Dict) -> None:
+    import requests
+
+    try:
+        requests.post(url, json=payload, timeout=5).raise_for_status()
+    except Exception as e:
+        logger.info(f"job report push to {url} failed: {e}")
+
+
+@traced("job_report")
+def write_job_report(artifacts_dir: str | Path, cfg: Dict, videos: Optional[Set[str]] = None,
+                     version: int = 1, final: bool = True, videos_total: Optional[int] = None) -> Optional[Dict]:
+    """Job-level synthesis over finished videos (all under summaries/ unless `videos` names
+    a subset): cross-camera re-id links into reid_matches.json, then the LLM job report into
+    job_report.json. Returns the report payload, or None when there was nothing to report.
+    """
+    artifacts_dir = Path(artifacts_dir)
+    context_items = _context_items(artifacts_dir, videos)
+    if not context_items:
+        return None
+    # cross-camera re-id over every video's track appearances
+    cross_camera = []
+    if bool(cfg.get("reid_enable", True)):
+        index = ReidIndex.from_paths({c["video"]: c["reid_path"] for c in context_items if Path(c["reid_path"]).exists()})
+        cross_camera = index.cross_camera_matches(float(cfg.get("reid_min_similarity", 0.9)))
+        write_json({"tracks": len(index), "matches": cross_camera}, artifacts_dir / "reid_matches.json")
+        logger.info(f"re-id index tracks={len(index)} cross-camera matches={len(cross_camera)}")
+    if not bool(cfg.get("enable_llm", True)):
+        return None
+    # load a compact job context from video summary files
+    job_ctx = build_job_context_from_paths([c["summary_path"] for c in context_items])
+    if cross_camera:
+        job_ctx["cross_camera_links"] = cross_camera[: int(cfg.get("reid_links_in_context", 20))]
+    report = synthesize_text(f"Context JSON: {json.dumps(job_ctx, ensure_ascii=False)}\n\n{prompts.JOB_SUMMARY_REPORT}", cfg, priority=PRIORITY_JOB_REPORT)
+    payload = {
+        "job_report": report,
+        "videos": [c["video"] for c in context_items],
+        "version": version,
+        "final": final,
+        "videos_total": videos_total,
+        "generated_at": time.time(),
+    }
+    # write-then-rename so a dashboard watching the file never reads a partial report
+    target = artifacts_dir / JOB_REPORT_FILENAME
+    tmp = target.with_suffix(".json.tmp")
+    write_json(payload, tmp)
+    os.replace(tmp, target)
+    logger.info(f"job report v{version} videos={len(context_items)}/{videos_total or '?'} final={final}")
+    push_url = cfg.get("job_report_push_url")
+    if push_url:
+        _push(str(push_url), payload)
+    return payload
+
+
+class ProgressiveJobReport:
+    """Regenerates the job report as videos finish instead of once at the end. The first
+    `video_done` opens a debounce window of `job_report_debounce_seconds`; videos landing
+    within it are folded into the same regeneration, which covers every video finished so
+    far. Each write bumps `version`. `finish` writes the final report over all videos.
+    """
+
+    def __init__(self, artifacts_dir: str | Path, cfg: Dict, videos_total: Optional[int] = None):
+        self.artifacts_dir = Path(artifacts_dir)
+        self.cfg = cfg
+        self.videos_total = videos_total
+        self.debounce_s = max(0.0, float(cfg.get("job_report_debounce_seconds", 5)))
+        self.version = 0
+        self._done: Set[str] = set()
+        self._due: Optional[float] = None
+        self._closed = False
+        self._cv = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="job-report", daemon=True)
+        self._thread.start()
+
+    def video_done(self, video_path: str) -> None:
+        with self._cv:
+            self._done.add(Path(video_path).stem)
+            if self._due is None:
+                self._due = time.monotonic() + self.debounce_s
+            self._cv.notify()
+
+    def _write(self, videos: Optional[Set[str]], final: bool) -> None:
+        try:
+            payload = write_job_report(self.artifacts_dir, self.cfg, videos, self.version + 1, final, self.videos_total)
+            if payload is not None:
+                self.version += 1
+        except Exception as e:
+            logger.exception(f"job report failed: {e}")
+
+    def _run(self) -> None:
+        while True:
+            with self._cv:
+                while not self._closed and (self._due is None or time.monotonic() < self._due):
+                    self._cv.wait(None if self._due is None else self._due - time.monotonic())
+                if self._closed:
+                    return
+                self._due = None
+                videos = set(self._done)
+            self._write(videos, final=False)
+
+    def finish(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        # lets an in-flight regeneration land first, so versions stay in order
+        self._thread.join()
+        self._write(None, final=True)
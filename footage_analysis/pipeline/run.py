@@ -1,154 +1,401 @@
 from __future__ import annotations
+import json
+import time
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 import cv2
+import numpy as np
 from tqdm import tqdm
 import logging
 
-from ..schemas import FrameResult, ClipSummary, VideoSummary, Detection
+from ..schemas import VideoSummary
+from ..records import Clip, Frame, as_clip_summary
 from ..utils import ensure_dir, ms_from_frames, write_json, prompts
-from ..utils.context import build_clip_context, build_video_context
+from ..utils.columnar import DETECTIONS_SUFFIX, light_clip_dict, write_clip
+from ..utils.context import VIDEO_INDEX_FILENAME, ClipAggregate, VideoAggregate
+from ..utils.trace import add_time, span, traced
 from .chunker import chunk_video
-from .tracker import SimpleTracker
+from .tracker import SortTracker
+from .motion import MotionGate
+from .selector import VlmFrameSelector
+from .synopsis import SynopsisPipeline
+from .schedule import ChunkScheduler
+from .reid import TrackAppearance, merge_track_embeddings, write_video_reid
 from ..models.yolo import YoloDetector
+from ..models.detector_service import DetectorService, get_detector_service
 from ..models.vlm import VisionLLM
-from ..models.llm import synthesize_text
+from ..models.llm import synthesize_text, PRIORITY_VIDEO_NARRATIVE
 
 
 logger = logging.getLogger("pipeline.run")
 logger.addHandler(logging.NullHandler())
 
 
-def process_chunk(meta: Dict, cfg: Dict, yolo: YoloDetector, vlm: VisionLLM, video_path: str) -> ClipSummary:
-    logger.info(f"start chunk {meta['index']} {meta['start_sec']}..{meta['end_sec']}s -> {meta['chunk_path']}")
-    cap = cv2.VideoCapture(meta["chunk_path"])
-    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
-    stride = max(1, int(cfg["frame_stride"]))
-    vlm_stride = max(1, int(cfg["vlm_every_n_frames"]))
-    vlm_interval_s = float(cfg.get("vlm_interval_seconds", 10))
-    last_vlm_t = -1e9
-    frames_for_vlm: List = []
-    tracker = SimpleTracker(cfg["track_iou_threshold"], cfg["track_max_age_frames"])
-    frames: List[FrameResult] = []
+def make_tracker(cfg: Dict) -> SortTracker:
+    return SortTracker(cfg["track_iou_threshold"], cfg["track_max_age_frames"])
 
-    frame_idx = 0
-    analyzed_idx = 0
-    pbar = tqdm(total=int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), desc=f"chunk {meta['index']}", leave=False)
 
-    enable_vlm = bool(cfg.get("enable_vlm", True))
-    enable_llm = bool(cfg.get("enable_llm", True))
+class ChunkAnalyzer:
+    """Per-frame analysis of one chunk, fed frames in order: motion gate / stride sampling,
+    batched detection, tracking, re-id appearance, VLM frame selection and calls, and the
+    clip's context aggregates. `finish` returns the Clip. Used for chunk files
+    (`process_chunk`) and for windows of a live feed (`pipeline/live.py`).
+    """
 
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-        pbar.update(1)
+    def __init__(
+        self,
+        meta: Dict,
+        cfg: Dict,
+        yolo: Union[YoloDetector, DetectorService],
+        vlm: VisionLLM,
+        video_path: str,
+        fps: float,
+        tracker: Optional[SortTracker] = None,
+        synopsis: bool = True,
+    ):
+        self.meta = meta
+        self.cfg = cfg
+        self.yolo = yolo
+        self.vlm = vlm
+        self.video_path = video_path
+        self.fps = fps
+        self.stride = max(1, int(cfg["frame_stride"]))
+        self.vlm_interval_s = float(cfg.get("vlm_interval_seconds", 10))
+        self.last_vlm_t = -1e9
+        self.frames_for_vlm: List = []
+        # a tracker passed in by the caller carries ids across consecutive chunks of a video
+        self.tracker = tracker if tracker is not None else make_tracker(cfg)
+        # video-level frame clock so motion prediction spans chunk boundaries
+        self.t_offset = int(round(float(meta["start_sec"]) * fps))
+        self.appearance = TrackAppearance(cfg.get("reid_classes", ["person"]), cfg.get("reid_sample_every", 5)) if bool(cfg.get("reid_enable", True)) else None
+        self.gate = MotionGate.from_cfg(cfg) if bool(cfg.get("motion_gate", False)) else None
+        # tiled detection: regions of interest per frame from the motion mask and live tracks
+        self.tile_rois = bool(getattr(yolo, "tiling", False))
+        # a finer motion mask than the gate's: at 64 px wide, a distant person is under a pixel
+        motion_w = int(cfg.get("yolo_tile_motion_width", 320))
+        self.motion = self.gate
+        if self.tile_rois and (self.gate is None or self.gate.width != motion_w):
+            self.motion = MotionGate.from_cfg({**cfg, "motion_downscale_width": motion_w})
+        self.tile_track_classes = list(cfg.get("yolo_tile_track_classes", ["person"]))
+        self.tile_track_margin = float(cfg.get("yolo_tile_track_margin", 0.5))
+        self.frames: List[Frame] = []
+        # context aggregates, updated once per frame as results come in
+        self.agg = ClipAggregate()
+        self.analyzed = 0
 
-        if frame_idx % stride != 0:
-            frame_idx += 1
-            continue
+        self.enable_vlm = bool(cfg.get("enable_vlm", True))
+        # callers that pipeline synopses (SynopsisPipeline) pass synopsis=False
+        self.enable_llm = bool(cfg.get("enable_llm", True)) and synopsis
+        self.vlm_async = bool(cfg.get("vlm_async", True)) and vlm is not None and vlm.available
+        # in-flight VLM calls: (ms_from_chunk_start of the owning frame, future)
+        self.vlm_inflight: List = []
+        # bounded top-k reservoir instead of holding every analyzed frame between calls
+        self.selector = VlmFrameSelector.from_cfg(cfg) if self.enable_vlm and bool(cfg.get("vlm_frame_select", True)) else None
+        self.max_frames = int(cfg["max_frames_per_chunk"])
+        # sampled frames waiting for one batched detector call: (frame_idx, frame, regions)
+        self.pending: List = []
+
+    def wants(self, frame_idx: int) -> bool:
+        """Whether frame `frame_idx` should be decoded and fed at all."""
+        return self.gate.wants(frame_idx) if self.gate else frame_idx % self.stride == 0
 
-        dets: List[Detection] = yolo.infer(frame)
-        dets = tracker.update(dets)
+    def feed(self, frame_idx: int, frame) -> bool:
+        """Analyze a wanted frame; returns False once `max_frames_per_chunk` is reached."""
+        if self.gate and not self.gate.check(frame_idx, frame):
+            return True
+        self.pending.append((frame_idx, frame, self._regions(frame_idx, frame) if self.tile_rois else None))
+        if len(self.pending) >= self.yolo.batch_size:
+            self._flush()
+        self.analyzed += 1
+        return self.analyzed < self.max_frames
 
-        # compute ms first to avoid unbound usage below
-        ms = ms_from_frames(frame_idx, fps)
+    def _regions(self, frame_idx: int, frame) -> np.ndarray:
+        if self.motion is not self.gate:
+            self.motion.observe(frame)
+        tracks = self.tracker.boxes_for(self.tile_track_classes, self.t_offset + frame_idx)
+        if len(tracks):
+            # margin around the person: a carried weapon sits just outside the box
+            wh = tracks[:, 2:] - tracks[:, :2]
+            tracks = tracks + np.concatenate([-wh, wh], axis=1) * self.tile_track_margin
+        return np.concatenate([self.motion.regions(frame.shape), tracks])
 
-        vlm_json = None
-        if enable_vlm:
-            frames_for_vlm.append(frame)
-            cur_t = meta["start_sec"] + (ms / 1000.0)
-            if cur_t - last_vlm_t >= vlm_interval_s:
+    def _flush(self) -> None:
+        if not self.pending:
+            return
+        meta = self.meta
+        pending = self.pending
+        with span("detect", frames=len(pending)):
+            if self.tile_rois:
+                batch_dets = self.yolo.infer_batch([f for _, f, _ in pending], [r for _, _, r in pending])
+            else:
+                batch_dets = self.yolo.infer_batch([f for _, f, _ in pending])
+        with span("track", frames=len(pending)):
+            batch_dets = [self.tracker.update(dets, self.t_offset + fidx) for (fidx, _, _), dets in zip(pending, batch_dets)]
+        if self.appearance is not None:
+            with span("reid", frames=len(pending)):
+                for (fidx, frame, _), dets in zip(pending, batch_dets):
+                    self.appearance.observe(frame, dets, meta["start_sec"] + ms_from_frames(fidx, self.fps) / 1000.0)
+        for (fidx, frame, _), dets in zip(pending, batch_dets):
+            ms = ms_from_frames(fidx, self.fps)
+            vlm_json = None
+            if self.enable_vlm:
+                if self.selector is not None:
+                    self.selector.offer(frame, dets, ms)
+                else:
+                    self.frames_for_vlm.append(frame)
+                cur_t = meta["start_sec"] + (ms / 1000.0)
+                if cur_t - self.last_vlm_t >= self.vlm_interval_s:
+                    if self.selector is not None:
+                        self.frames_for_vlm = self.selector.take()
+                    if self.vlm_async:
+                        self.vlm_inflight.append((ms, self.vlm.submit_batch(self.frames_for_vlm)))
+                    else:
+                        try:
+                            vlm_json = self.vlm.describe_batch(self.frames_for_vlm)
+                        except Exception as e:
+                            logger.info(f"vlm describe failed: {e}")
+                            vlm_json = None
+                    self.frames_for_vlm = []
+                    self.last_vlm_t = cur_t
+            fr = Frame(fidx, ms, dets, vlm_json)
+            self.frames.append(fr)
+            self.agg.observe(fr)
+        self.pending.clear()
+
+    def finish(self) -> Clip:
+        meta = self.meta
+        self._flush()
+        frames, agg = self.frames, self.agg
+        # the tracker may span chunks (and keep tracks that ended here alive), so list
+        # only the tracks seen in this clip's detections
+        tracklets = {}
+        for fr in frames:
+            for d in fr.detections:
+                if d.track_id is not None and d.track_id not in tracklets:
+                    tracklets[d.track_id] = {"cls": d.cls}
+
+        # attach VLM responses to their frames; only the calls still in flight block here
+        if self.vlm_inflight:
+            by_ms = {fr.ms_from_chunk_start: fr for fr in frames}
+            for ms, fut in self.vlm_inflight:
                 try:
-                    vlm_json = vlm.describe_batch(frames_for_vlm)
+                    with span("vlm_wait", "wait"):
+                        vlm_json = fut.result(timeout=float(self.cfg.get("vlm_timeout_seconds", 120)))
                 except Exception as e:
                     logger.info(f"vlm describe failed: {e}")
                     vlm_json = None
-                frames_for_vlm = []
-                last_vlm_t = cur_t
-        frames.append(
-            FrameResult(
-                frame_index=frame_idx, ms_from_chunk_start=ms, detections=dets, vlm_json=vlm_json
-            )
+                if ms in by_ms:
+                    by_ms[ms].vlm_json = vlm_json
+                    agg.observe_vlm(vlm_json)
+
+        # build compact text context for the LLM (no images)
+        clip_ctx = agg.context(seconds=meta["end_sec"] - meta["start_sec"]) if self.enable_llm else None
+        clip_synopsis = synthesize_text(f"Context JSON: {json.dumps(clip_ctx, ensure_ascii=False)}\n\n{prompts.CLIP_SYNOPSIS}", self.cfg) if self.enable_llm else ""
+
+        cs = Clip(
+            video_path=self.video_path,
+            chunk_path=meta["chunk_path"],
+            chunk_index=meta["index"],
+            start_sec=meta["start_sec"],
+            end_sec=meta["end_sec"],
+            frames=frames,
+            tracklets=tracklets,
+            synopsis=clip_synopsis or None,
+            skipped_frames=self.gate.skipped if self.gate else [],
+            track_embeddings=self.appearance.to_dict() if self.appearance is not None else {},
+            aggregate=agg,
+            live_tracks=sorted(self.tracker.summarize()),
         )
+        n_skipped = sum(r["count"] for r in cs.skipped_frames)
+        logger.info(f"done chunk {meta['index']} frames={len(frames)} skipped={n_skipped} tracks={len(tracklets)}")
+        return cs
 
-        analyzed_idx += 1
+
+def process_chunk(
+    meta: Dict,
+    cfg: Dict,
+    yolo: Union[YoloDetector, DetectorService],
+    vlm: VisionLLM,
+    video_path: str,
+    tracker: Optional[SortTracker] = None,
+    synopsis: bool = True,
+) -> Clip:
+    logger.info(f"start chunk {meta['index']} {meta['start_sec']}..{meta['end_sec']}s -> {meta['chunk_path']}")
+    with span("chunk", video=Path(video_path).stem, index=meta["index"]):
+        return _process_chunk(meta, cfg, yolo, vlm, video_path, tracker, synopsis)
+
+
+def _process_chunk(meta: Dict, cfg: Dict, yolo: Union[YoloDetector, DetectorService], vlm: VisionLLM, video_path: str,
+                   tracker: Optional[SortTracker], synopsis: bool) -> Clip:
+    cap = cv2.VideoCapture(meta["chunk_path"])
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    analyzer = ChunkAnalyzer(meta, cfg, yolo, vlm, video_path, fps, tracker=tracker, synopsis=synopsis)
+
+    frame_idx = 0
+    # decode time is summed per chunk; a span per frame would swamp the trace
+    decode_s = 0.0
+    pbar = tqdm(total=int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0), desc=f"chunk {meta['index']}", leave=False)
+    while True:
+        t0 = time.perf_counter()
+        # grab() advances without the color conversion; only frames we look at are retrieved
+        if not cap.grab():
+            break
+        pbar.update(1)
+
+        if not analyzer.wants(frame_idx):
+            decode_s += time.perf_counter() - t0
+            frame_idx += 1
+            continue
+        ok, frame = cap.retrieve()
+        decode_s += time.perf_counter() - t0
+        if not ok:
+            break
+        more = analyzer.feed(frame_idx, frame)
         frame_idx += 1
-        if len(frames) >= cfg["max_frames_per_chunk"]:
+        if not more:
             break
 
     cap.release()
-    tracklets = tracker.summarize()
+    add_time("decode", decode_s, frame_idx)
+    return analyzer.finish()
 
-    # build compact text context for the LLM (no images)
-    clip_ctx = build_clip_context(frames, seconds=meta["end_sec"] - meta["start_sec"]) if enable_llm else None
-    synopsis = synthesize_text(f"Context JSON: {clip_ctx}\n\n{prompts.CLIP_SYNOPSIS}", cfg) if enable_llm else ""
 
-    cs = ClipSummary(
-        video_path=video_path,
-        chunk_path=meta["chunk_path"],
-        chunk_index=meta["index"],
-        start_sec=meta["start_sec"],
-        end_sec=meta["end_sec"],
-        frames=frames,
-        tracklets=tracklets,
-        synopsis=synopsis or None,
-    )
-    logger.info(f"done chunk {meta['index']} frames={len(frames)} tracks={len(tracklets)}")
-    return cs
+def build_detector(cfg: Dict) -> Union[YoloDetector, DetectorService]:
+    if bool(cfg.get("shared_detector", True)):
+        # one warm model per process; frames from all video workers are batched together
+        return get_detector_service(cfg)
+    return YoloDetector.from_cfg(cfg)
 
 
-def process_video(video_path: str, cfg: Dict) -> VideoSummary:
-    logger.info(f"process video {video_path}")
-    chunks_meta = chunk_video(video_path, cfg["artifacts_dir"], cfg["chunk_seconds"])
-    yolo = YoloDetector(cfg["yolo_weights"], cfg["target_classes"], cfg["conf_threshold"])
-    vlm = VisionLLM(cfg)
-    enable_llm = bool(cfg.get("enable_llm", True))
+def columnar_enabled(cfg: Dict) -> bool:
+    return bool(cfg.get("columnar_detections", True))
 
-    # ensure summaries dir upfront so partial results appear even if interrupted
-    out_dir = ensure_dir(Path(cfg["artifacts_dir"]) / "summaries" / Path(video_path).stem)
 
-    clip_summaries: List[ClipSummary] = []
-    for meta in chunks_meta:
-        try:
-            clip = process_chunk(meta, cfg, yolo, vlm, video_path)
-            clip_summaries.append(clip)
-            # write each clip summary incrementally
-            write_json(clip.model_dump(), out_dir / f"clip_{clip.chunk_index:05d}.json")
-        except Exception as e:
-            logger.exception(f"failed processing chunk {meta.get('index')}: {e}")
-            continue
+def video_out_dir(video_path: str, cfg: Dict) -> Path:
+    return ensure_dir(Path(cfg["artifacts_dir"]) / "summaries" / Path(video_path).stem)
+
+
+class VideoOutput:
+    """Streams one video's finished clips to disk: each clip is written, folded into the
+    running aggregates (`VideoAggregate`, merged re-id embeddings) and then dropped, so
+    memory does not grow with footage length. With `keep_clips` the clips are also held
+    for embedding in video_summary.json.
+    """
 
-    timeline: List[Dict] = []
-    for clip in clip_summaries:
-        for fr in clip.frames[-5:]:
-            for det in fr.detections:
-                if det.track_id is None:
-                    continue
-                timeline.append(
-                    {
-                        "t_abs_sec": clip.start_sec + fr.ms_from_chunk_start / 1000.0,
-                        "chunk": clip.chunk_index,
-                        "track_id": det.track_id,
-                        "cls": det.cls,
-                        "conf": det.conf,
-                    }
-                )
-
-    video_ctx = build_video_context(clip_summaries, timeline) if enable_llm else None
-    narrative = synthesize_text(f"Context JSON: {video_ctx}\n\n{prompts.VIDEO_NARRATIVE}", cfg) if enable_llm else ""
+    def __init__(self, video_path: str, cfg: Dict, keep_clips: bool = False):
+        self.video_path = video_path
+        self.out_dir = video_out_dir(video_path, cfg)
+        self.columnar = columnar_enabled(cfg)
+        self.reid = bool(cfg.get("reid_enable", True))
+        self.agg = VideoAggregate(video_path)
+        self.tracks: Dict[int, Dict] = {}
+        self.clips: Optional[List[Clip]] = [] if keep_clips else None
+
+    def add(self, clip: Clip) -> None:
+        name = f"clip_{clip.chunk_index:05d}"
+        write_clip(clip, self.out_dir, columnar=self.columnar)
+        ref = {
+            "chunk_index": clip.chunk_index,
+            "start_sec": clip.start_sec,
+            "end_sec": clip.end_sec,
+            "file": f"{name}.json",
+            "synopsis": clip.synopsis,
+        }
+        if self.columnar:
+            ref["detections_file"] = name + DETECTIONS_SUFFIX
+        self.agg.add(clip, ref)
+        if self.reid:
+            merge_track_embeddings([clip], self.tracks)
+        if self.clips is not None:
+            self.clips.append(clip)
+
+
+@traced("finalize")
+def finalize_video(video_path: str, output: VideoOutput, cfg: Dict) -> VideoSummary:
+    """Build the narrative from the video's running aggregates and write video_summary.json."""
+    enable_llm = bool(cfg.get("enable_llm", True))
+    out_dir = output.out_dir
+    agg = output.agg
+    timeline = agg.timeline
 
+    video_ctx = agg.video_context() if enable_llm else None
+    narrative = synthesize_text(
+        f"Context JSON: {json.dumps(video_ctx, ensure_ascii=False)}\n\n{prompts.VIDEO_NARRATIVE}", cfg, priority=PRIORITY_VIDEO_NARRATIVE
+    ) if enable_llm else ""
+
+    clips = sorted(output.clips or [], key=lambda c: c.chunk_index)
     vs = VideoSummary(
         video_path=video_path,
-        clip_summaries=clip_summaries,
+        clip_summaries=[as_clip_summary(c) for c in clips],
         combined_timeline=timeline,
         narrative=narrative or None,
+        clip_refs=sorted(agg.clip_refs, key=lambda r: r["chunk_index"]),
     )
 
     # write primary summary only (job-level will produce combined responder report)
-    write_json(vs.model_dump(), out_dir / "video_summary.json")
-    logger.info(f"done video {video_path} chunks={len(clip_summaries)} -> {out_dir}")
+    data = vs.model_dump(exclude={"clip_summaries"} if output.columnar else None)
+    if output.columnar:
+        # detections stay in the per-clip array files; embed the light clip form
+        data["clip_summaries"] = [
+            light_clip_dict(c, f"clip_{c.chunk_index:05d}{DETECTIONS_SUFFIX}") for c in clips
+        ]
+    write_json(data, out_dir / "video_summary.json")
+    # small sidecar so job-level synthesis never has to reparse the full summary
+    write_json(agg.index(), out_dir / VIDEO_INDEX_FILENAME)
+    if output.reid:
+        write_video_reid(out_dir / "reid.npz", output.tracks)
+    logger.info(f"done video {video_path} chunks={agg.clips} -> {out_dir}")
     return vs
 
 
+def process_video(video_path: str, cfg: Dict, schedule: Optional[ChunkScheduler] = None) -> VideoSummary:
+    with span("video", video=Path(video_path).stem):
+        return _process_video(video_path, cfg, schedule)
+
+
+def _process_video(video_path: str, cfg: Dict, schedule: Optional[ChunkScheduler]) -> VideoSummary:
+    logger.info(f"process video {video_path}")
+    chunks_meta = chunk_video(video_path, cfg["artifacts_dir"], cfg["chunk_seconds"])
+    if schedule is not None:
+        # chunks run in order here (tracks carry across them); only the window applies
+        chunks_meta = schedule.select(video_path, chunks_meta)
+    yolo = build_detector(cfg)
+    vlm = VisionLLM(cfg)
+    enable_llm = bool(cfg.get("enable_llm", True))
+    tracker = make_tracker(cfg) if bool(cfg.get("track_across_chunks", True)) else None
+
+    # ensure summaries dir upfront so partial results appear even if interrupted;
+    # finished clips are flushed there and only running aggregates stay in memory
+    output = VideoOutput(video_path, cfg, keep_clips=not bool(cfg.get("stream_video_summary", True)))
+
+    # synopses are requested in the background (optionally several clips per request)
+    # while later chunks are analyzed; each clip file is written once its synopsis lands
+    synopses = SynopsisPipeline(cfg, int(cfg.get("synopsis_batch_size", 1))) if enable_llm else None
+
+    def _write(clips: List[Clip]) -> None:
+        for c in clips:
+            output.add(c)
+
+    n_clips = 0
+    for meta in chunks_meta:
+        try:
+            clip = process_chunk(meta, cfg, yolo, vlm, video_path, tracker=tracker, synopsis=synopses is None)
+            n_clips += 1
+            if synopses is None:
+                # write each clip summary incrementally
+                _write([clip])
+            else:
+                synopses.add(clip)
+                _write(synopses.ready())
+        except Exception as e:
+            logger.exception(f"failed processing chunk {meta.get('index')}: {e}")
+            continue
+    if synopses is not None:
+        _write(synopses.finish())
+        logger.info(f"clip synopses clips={n_clips} llm_requests={synopses.requests}")
 
+    if vlm.cache is not None:
+        logger.info(f"vlm cache {vlm.cache.stats()}")
+    if vlm.replay is not None:
+        logger.info(f"replay store {vlm.replay.stats()}")
+    return finalize_video(video_path, output, cfg)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import json
+import math
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import cv2
+
+
+logger = logging.getLogger("pipeline.schedule")
+logger.addHandler(logging.NullHandler())
+
+# an unknown camera position or start time scores as if it were this many scales away
+_UNKNOWN_SCALES = 3.0
+
+
+@dataclass
+class Incident:
+    """A triangulated shot; same fields as gunshot_triangulation's GunshotResult
+    (`timestamp` in epoch seconds).
+    """
+
+    lat: float
+    lng: float
+    timestamp: float
+    confidence: float = 1.0
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "Incident":
+        # the triangulation server broadcasts `t` in milliseconds
+        ts = d["timestamp"] if "timestamp" in d else float(d["t"]) / 1000.0
+        return cls(float(d["lat"]), float(d["lng"]), parse_time(ts), float(d.get("confidence", 1.0)))
+
+
+@dataclass
+class CameraInfo:
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    start_time: Optional[float] = None  # epoch seconds of the video's first frame
+
+
+def parse_time(v: Any) -> float:
+    """Epoch seconds from a number or an ISO 8601 string (naive times are taken as UTC)."""
+    if isinstance(v, (int, float)):
+        return float(v)
+    dt = datetime.fromisoformat(str(v).replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def load_incident(spec: str) -> Incident:
+    """`spec` is a JSON file or an inline JSON object with lat, lng and timestamp (or t in ms)."""
+    p = Path(spec)
+    text = p.read_text() if p.is_file() else spec
+    return Incident.from_dict(json.loads(text))
+
+
+def load_cameras(path: str | Path) -> Dict[str, CameraInfo]:
+    """{video_stem: {lat, lng, start_time}}; missing fields stay unknown."""
+    p = Path(path)
+    if not p.exists():
+        logger.info(f"no camera metadata at {p}; scheduling on what is known")
+        return {}
+    with open(p, "r") as f:
+        data = json.load(f)
+    out: Dict[str, CameraInfo] = {}
+    for stem, d in data.items():
+        st = d.get("start_time")
+        out[str(stem)] = CameraInfo(
+            lat=None if d.get("lat") is None else float(d["lat"]),
+            lng=None if d.get("lng") is None else float(d["lng"]),
+            start_time=None if st is None else parse_time(st),
+        )
+    return out
+
+
+def latlng_to_meters(lat1: float, lng1: float, lat2: float, lng2: float) -> Tuple[float, float]:
+    # equirectangular, as in gunshot_localization.py; fine at neighborhood scale
+    dx = (lng2 - lng1) * 111320 * math.cos(math.radians((lat1 + lat2) / 2))
+    dy = (lat2 - lat1) * 110540
+    return dx, dy
+
+
+def video_duration_s(video_path: str) -> float:
+    cap = cv2.VideoCapture(str(video_path))
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return float(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0) / fps
+    finally:
+        cap.release()
+
+
+class ChunkScheduler:
+    """Orders footage work by expected value for one incident. A chunk's priority is
+    exp(-distance / distance_scale) * exp(-time_offset / time_scale), where distance is
+    from its camera to the shot and time_offset is how far the chunk's wall-clock span
+    lies from the shot time (0 when it contains it). With `window_s`, chunks lying
+    entirely outside shot time ± window are skipped; chunks of a camera with no known
+    start time are never skipped.
+    """
+
+    def __init__(self, incident: Incident, cameras: Dict[str, CameraInfo], cfg: Dict):
+        self.incident = incident
+        self.cameras = cameras
+        self.distance_scale = max(1e-6, float(cfg.get("schedule_distance_scale_m", 150)))
+        self.time_scale = max(1e-6, float(cfg.get("schedule_time_scale_seconds", 120)))
+        window_min = cfg.get("incident_window_minutes")
+        self.window_s = None if window_min is None else float(window_min) * 60.0
+
+    def camera(self, video_path: str) -> CameraInfo:
+        return self.cameras.get(Path(video_path).stem) or CameraInfo()
+
+    def distance_m(self, video_path: str) -> Optional[float]:
+        cam = self.camera(video_path)
+        if cam.lat is None or cam.lng is None:
+            return None
+        dx, dy = latlng_to_meters(self.incident.lat, self.incident.lng, cam.lat, cam.lng)
+        return math.hypot(dx, dy)
+
+    def time_offset_s(self, video_path: str, start_sec: float, end_sec: float) -> Optional[float]:
+        """Seconds between the shot and the nearest edge of [start_sec, end_sec] of the video."""
+        t0 = self.camera(video_path).start_time
+        if t0 is None:
+            return None
+        rel = self.incident.timestamp - t0
+        return max(0.0, start_sec - rel, rel - end_sec)
+
+    def score(self, video_path: str, start_sec: float, end_sec: float) -> float:
+        d = self.distance_m(video_path)
+        dt = self.time_offset_s(video_path, start_sec, end_sec)
+        d_scales = _UNKNOWN_SCALES if d is None else d / self.distance_scale
+        t_scales = _UNKNOWN_SCALES if dt is None else dt / self.time_scale
+        return math.exp(-(d_scales + t_scales))
+
+    def in_window(self, video_path: str, start_sec: float, end_sec: float) -> bool:
+        if self.window_s is None:
+            return True
+        dt = self.time_offset_s(video_path, start_sec, end_sec)
+        return dt is None or dt <= self.window_s
+
+    def select(self, video_path: str, metas: List[Dict]) -> List[Dict]:
+        """Chunks of one video inside the window, still in chunk order."""
+        kept = [m for m in metas if self.in_window(video_path, m["start_sec"], m["end_sec"])]
+        if len(kept) < len(metas):
+            logger.info(f"incident window: {Path(video_path).name} keeps {len(kept)}/{len(metas)} chunks")
+        return kept
+
+    def order_tasks(self, tasks: Sequence[Tuple[str, Dict]]) -> List[Tuple[str, Dict]]:
+        """(video, chunk meta) pairs, highest priority first; ties keep their given order."""
+        return sorted(tasks, key=lambda t: -self.score(t[0], t[1]["start_sec"], t[1]["end_sec"]))
+
+    def order_videos(self, videos: Sequence[str]) -> List[str]:
+        """Whole videos by their best chunk's priority, for executors that run a video's
+        chunks in sequence; the shot time is clamped into each video's span.
+        """
+        scores = {v: self.score(v, 0.0, video_duration_s(v)) for v in videos}
+        ordered = sorted(videos, key=lambda v: -scores[v])
+        logger.info("video priority: " + ", ".join(f"{Path(v).stem}={scores[v]:.3f}" for v in ordered))
+        return ordered
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "incident": {"lat": self.incident.lat, "lng": self.incident.lng,
+                         "timestamp": self.incident.timestamp, "confidence": self.incident.confidence},
+            "distance_scale_m": self.distance_scale,
+            "time_scale_seconds": self.time_scale,
+            "window_seconds": self.window_s,
+            "cameras": len(self.cameras),
+        }
@@ -0,0 +1,76 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+import numpy as np
+from ..utils import dhash, hamming
+
+
+DEFAULT_CLASS_WEIGHTS = {"gun": 3.0, "person": 1.0, "car": 0.5, "truck": 0.5}
+
+
+class VlmFrameSelector:
+    """Streaming top-k frame selection between VLM calls.
+    Each offered frame is scored by detection content (class-weighted confidences) plus
+    motion (hash distance to the previous offered frame). A perceptual hash keeps the
+    held set diverse: a near-duplicate of a held frame can only replace that frame.
+    At most `k` frames are ever held.
+    """
+
+    def __init__(
+        self,
+        k: int = 4,
+        min_hash_distance: int = 6,
+        motion_weight: float = 2.0,
+        class_weights: Optional[Dict[str, float]] = None,
+    ):
+        self.k = max(1, int(k))
+        self.min_hash_distance = int(min_hash_distance)
+        self.motion_weight = float(motion_weight)
+        self.class_weights = dict(class_weights or DEFAULT_CLASS_WEIGHTS)
+        self._held: List[Dict[str, Any]] = []
+        self._prev_hash: Optional[int] = None
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict) -> "VlmFrameSelector":
+        return cls(
+            k=int(cfg.get("vlm_images_per_call", 4)),
+            min_hash_distance=int(cfg.get("vlm_select_min_hash_distance", 6)),
+            motion_weight=float(cfg.get("vlm_select_motion_weight", 2.0)),
+            class_weights=cfg.get("vlm_select_class_weights"),
+        )
+
+    def __len__(self) -> int:
+        return len(self._held)
+
+    def score(self, detections: List[Any], motion: float) -> float:
+        content = sum(self.class_weights.get(d.cls, 0.25) * float(d.conf) for d in detections)
+        return content + self.motion_weight * motion
+
+    def offer(self, frame_bgr: np.ndarray, detections: List[Any], ms: int) -> None:
+        h = dhash(frame_bgr)
+        motion = hamming(h, self._prev_hash) / 64.0 if self._prev_hash is not None else 0.0
+        self._prev_hash = h
+        item = {"score": self.score(detections, motion), "ms": ms, "hash": h, "frame": frame_bgr}
+
+        # near-duplicate of something already held: keep whichever scores higher
+        nearest, nearest_d = None, 65
+        for i, held in enumerate(self._held):
+            d = hamming(h, held["hash"])
+            if d < nearest_d:
+                nearest, nearest_d = i, d
+        if nearest is not None and nearest_d < self.min_hash_distance:
+            if item["score"] > self._held[nearest]["score"]:
+                self._held[nearest] = item
+            return
+
+        if len(self._held) < self.k:
+            self._held.append(item)
+            return
+        worst = min(range(len(self._held)), key=lambda i: self._held[i]["score"])
+        if item["score"] > self._held[worst]["score"]:
+            self._held[worst] = item
+
+    def take(self) -> List[np.ndarray]:
+        """Selected frames in time order; clears the reservoir."""
+        frames = [it["frame"] for it in sorted(self._held, key=lambda it: it["ms"])]
+        self._held = []
+        return frames
@@ -0,0 +1,107 @@
+from __future__ import annotations
+import re
+import json
+import logging
+from concurrent.futures import Future, wait
+from typing import Dict, List, Tuple
+
+from ..records import Clip
+from ..utils import prompts
+from ..utils.context import clip_aggregate
+from ..utils.trace import span
+from ..models.llm import submit_text
+
+
+logger = logging.getLogger("pipeline.synopsis")
+logger.addHandler(logging.NullHandler())
+
+
+def clip_synopsis_context(clip: Clip) -> Dict:
+    return clip_aggregate(clip).context(seconds=clip.end_sec - clip.start_sec)
+
+
+def parse_batch_synopses(text: str) -> Dict[str, str]:
+    try:
+        m = re.search(r"\{.*\}", text or "", re.S)
+        data = json.loads(m.group(0)) if m else {}
+    except Exception:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(k): str(v).strip() for k, v in data.items() if v}
+
+
+class SynopsisPipeline:
+    """Clip synopses off the critical path. `add` queues a clip; once `batch_size` clips
+    are queued they go out as one LLM request (one per clip when batch_size is 1) while
+    the caller keeps analyzing. `ready` hands back clips whose synopsis has landed,
+    `finish` flushes and waits for the rest. Clips a batch reply misses are retried alone.
+    """
+
+    def __init__(self, cfg: Dict, batch_size: int = 1):
+        self.cfg = cfg
+        self.batch_size = max(1, int(batch_size))
+        self._queued: List[Clip] = []
+        self._inflight: List[Tuple[List[Clip], Future, bool]] = []
+        self.requests = 0
+
+    def add(self, clip: Clip) -> None:
+        self._queued.append(clip)
+        if len(self._queued) >= self.batch_size:
+            self._submit()
+
+    def _submit_single(self, clip: Clip) -> None:
+        ctx = clip_synopsis_context(clip)
+        fut = submit_text(f"Context JSON: {json.dumps(ctx, ensure_ascii=False)}\n\n{prompts.CLIP_SYNOPSIS}", self.cfg)
+        self._inflight.append(([clip], fut, False))
+        self.requests += 1
+
+    def _submit(self) -> None:
+        clips, self._queued = self._queued, []
+        if not clips:
+            return
+        if len(clips) == 1:
+            self._submit_single(clips[0])
+            return
+        ctx = {str(c.chunk_index): clip_synopsis_context(c) for c in clips}
+        fut = submit_text(f"Context JSON: {json.dumps(ctx, ensure_ascii=False)}\n\n{prompts.CLIP_SYNOPSIS_BATCH}", self.cfg)
+        self._inflight.append((clips, fut, True))
+        self.requests += 1
+
+    def _resolve(self, clips: List[Clip], fut: Future, batched: bool) -> List[Clip]:
+        text = fut.result()
+        if not batched:
+            clips[0].synopsis = text or None
+            return clips
+        by_id = parse_batch_synopses(text)
+        done = []
+        for c in clips:
+            syn = by_id.get(str(c.chunk_index))
+            if syn or not text:
+                # an empty reply means the llm is off or failing; don't retry per clip
+                c.synopsis = syn or None
+                done.append(c)
+            else:
+                logger.info(f"batched synopsis missing clip {c.chunk_index}; retrying alone")
+                self._submit_single(c)
+        return done
+
+    def ready(self) -> List[Clip]:
+        out: List[Clip] = []
+        current, self._inflight = self._inflight, []
+        for clips, fut, batched in current:
+            if fut.done():
+                # may queue single-clip retries onto self._inflight
+                out.extend(self._resolve(clips, fut, batched))
+            else:
+                self._inflight.append((clips, fut, batched))
+        return out
+
+    def finish(self) -> List[Clip]:
+        self._submit()
+        out: List[Clip] = []
+        while self._inflight:
+            with span("llm_wait", "wait", requests=len(self._inflight)):
+                wait([f for _, f, _ in self._inflight])
+            out.extend(self.ready())
+        return out
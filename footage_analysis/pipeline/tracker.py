@@ -1,45 +1,169 @@
 from __future__ import annotations
-from typing import List, Dict
-from ..schemas import Detection
-from ..utils import iou_xyxy
+from typing import Any, List, Dict, Optional, Tuple
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from ..records import Det
+from ..utils import iou_matrix
 
 
-class SimpleTracker:
-    def __init__(self, iou_threshold: float = 0.4, max_age_frames: int = 45):
+class SortTracker:
+    """SORT-style tracker: constant-velocity box prediction, pairwise IoU matrix and
+    optimal (Hungarian) assignment per class. Track state lives in parallel arrays.
+    `max_age_frames` counts update calls without a match, as before.
+    """
+
+    def __init__(self, iou_threshold: float = 0.4, max_age_frames: int = 45, velocity_smoothing: float = 0.5):
         self.iou_threshold = iou_threshold
         self.max_age = max_age_frames
-        self.tracks: Dict[int, Dict] = {}
+        self.smoothing = float(velocity_smoothing)
         self.next_id = 1
+        self._cls_ids: Dict[str, int] = {}
+        self._cls_names: List[str] = []
+        self._step = 0
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.cls = np.zeros(0, dtype=np.int32)
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.vel = np.zeros((0, 4), dtype=np.float32)  # px per frame
+        self.last_t = np.zeros(0, dtype=np.int64)
+        self.age = np.zeros(0, dtype=np.int32)
 
-    def update(self, detections: List[Detection]) -> List[Detection]:
-        for tid in list(self.tracks):
-            self.tracks[tid]["age"] += 1
-            if self.tracks[tid]["age"] > self.max_age:
-                del self.tracks[tid]
-
-        used = set()
-        for d in detections:
-            best_tid, best_iou = None, 0.0
-            for tid, tr in self.tracks.items():
-                if tr["cls"] != d.cls:
-                    continue
-                iou = iou_xyxy(tr["bbox"], d.bbox_xyxy)
-                if iou > best_iou:
-                    best_iou, best_tid = iou, tid
-            if best_tid and best_iou >= self.iou_threshold and best_tid not in used:
-                d.track_id = best_tid
-                self.tracks[best_tid]["bbox"] = d.bbox_xyxy
-                self.tracks[best_tid]["age"] = 0
-                used.add(best_tid)
-            else:
-                d.track_id = self.next_id
-                self.tracks[self.next_id] = {"bbox": d.bbox_xyxy, "age": 0, "cls": d.cls}
-                used.add(self.next_id)
-                self.next_id += 1
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cls_id(self, name: str) -> int:
+        cid = self._cls_ids.get(name)
+        if cid is None:
+            cid = self._cls_ids[name] = len(self._cls_names)
+            self._cls_names.append(name)
+        return cid
+
+    def _keep(self, mask: np.ndarray) -> None:
+        self.ids = self.ids[mask]
+        self.cls = self.cls[mask]
+        self.boxes = self.boxes[mask]
+        self.vel = self.vel[mask]
+        self.last_t = self.last_t[mask]
+        self.age = self.age[mask]
+
+    def predict(self, t: int) -> np.ndarray:
+        dt = (t - self.last_t).astype(np.float32)[:, None]
+        return self.boxes + self.vel * dt
+
+    def boxes_for(self, classes: List[str], t: int) -> np.ndarray:
+        """Predicted boxes at frame `t` of the live tracks of the given class names."""
+        ids = [self._cls_ids[c] for c in classes if c in self._cls_ids]
+        if not ids or not len(self.ids):
+            return np.zeros((0, 4), dtype=np.float32)
+        mask = np.isin(self.cls, ids)
+        return self.predict(t)[mask] if mask.any() else np.zeros((0, 4), dtype=np.float32)
+
+    def update(self, detections: List[Det], frame_index: Optional[int] = None) -> List[Det]:
+        self._step += 1
+        t = self._step if frame_index is None else int(frame_index)
+
+        self.age += 1
+        alive = self.age <= self.max_age
+        if not alive.all():
+            self._keep(alive)
+        if not detections:
+            return detections
+
+        det_boxes = np.asarray([d.bbox_xyxy for d in detections], dtype=np.float32).reshape(-1, 4)
+        det_cls = np.asarray([self._cls_id(d.cls) for d in detections], dtype=np.int32)
+        n_tracks = len(self.ids)
+        assigned = np.full(len(detections), -1, dtype=np.int64)
+
+        if n_tracks:
+            iou = iou_matrix(det_boxes, self.predict(t))
+            iou[det_cls[:, None] != self.cls[None, :]] = 0.0
+            rows, cols = linear_sum_assignment(iou, maximize=True)
+            ok = iou[rows, cols] >= self.iou_threshold
+            rows, cols = rows[ok], cols[ok]
+            assigned[rows] = cols
+
+            dt = np.maximum(t - self.last_t[cols], 1).astype(np.float32)[:, None]
+            v_obs = (det_boxes[rows] - self.boxes[cols]) / dt
+            self.vel[cols] = self.smoothing * self.vel[cols] + (1.0 - self.smoothing) * v_obs
+            self.boxes[cols] = det_boxes[rows]
+            self.last_t[cols] = t
+            self.age[cols] = 0
+
+        new = np.flatnonzero(assigned < 0)
+        if len(new):
+            n_new = len(new)
+            self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + n_new, dtype=np.int64)])
+            self.cls = np.concatenate([self.cls, det_cls[new]])
+            self.boxes = np.concatenate([self.boxes, det_boxes[new]])
+            self.vel = np.concatenate([self.vel, np.zeros((n_new, 4), dtype=np.float32)])
+            self.last_t = np.concatenate([self.last_t, np.full(n_new, t, dtype=np.int64)])
+            self.age = np.concatenate([self.age, np.zeros(n_new, dtype=np.int32)])
+            assigned[new] = np.arange(n_tracks, n_tracks + n_new)
+            self.next_id += n_new
+
+        for d, tid in zip(detections, self.ids[assigned].tolist()):
+            d.track_id = tid
         return detections
 
     def summarize(self) -> Dict[int, Dict]:
-        return {tid: {"cls": tr["cls"]} for tid, tr in self.tracks.items()}
+        return {tid: {"cls": self._cls_names[c]} for tid, c in zip(self.ids.tolist(), self.cls.tolist())}
+
+
+# kept for callers that still construct the old name
+SimpleTracker = SortTracker
+
+
+class TrackStitcher:
+    """Relabel independently tracked clips (ids restart at 1 per chunk) into video-level
+    ids, in place. Clips must be added in chunk order. Tracks alive at the end of a clip
+    are matched to tracks at the start of the next one by IoU of their last/first boxes
+    with Hungarian assignment per class.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3):
+        self.iou_threshold = iou_threshold
+        self.next_id = 1
+        self.prev_last: Dict[int, Tuple[str, List[float]]] = {}
+
+    def add(self, clip: Any) -> None:
+        first: Dict[int, Tuple[str, List[float]]] = {}
+        last: Dict[int, Tuple[str, List[float]]] = {}
+        for fr in clip.frames:
+            for d in fr.detections:
+                if d.track_id is None:
+                    continue
+                first.setdefault(d.track_id, (d.cls, d.bbox_xyxy))
+                last[d.track_id] = (d.cls, d.bbox_xyxy)
+
+        prev_last = self.prev_last
+        mapping: Dict[int, int] = {}
+        if prev_last and first:
+            c_ids, p_ids = list(first), list(prev_last)
+            iou = iou_matrix([first[c][1] for c in c_ids], [prev_last[p][1] for p in p_ids])
+            c_cls = np.asarray([first[c][0] for c in c_ids])
+            p_cls = np.asarray([prev_last[p][0] for p in p_ids])
+            iou[c_cls[:, None] != p_cls[None, :]] = 0.0
+            rows, cols = linear_sum_assignment(iou, maximize=True)
+            for r, c in zip(rows.tolist(), cols.tolist()):
+                if iou[r, c] >= self.iou_threshold:
+                    mapping[c_ids[r]] = p_ids[c]
+        locals_ = set(first) | {int(k) for k in (clip.tracklets or {})}
+        for local in sorted(locals_):
+            if local not in mapping:
+                mapping[local] = self.next_id
+                self.next_id += 1
 
+        for fr in clip.frames:
+            for d in fr.detections:
+                if d.track_id is not None:
+                    d.track_id = mapping[d.track_id]
+        clip.tracklets = {mapping[int(k)]: v for k, v in (clip.tracklets or {}).items()}
+        if getattr(clip, "track_embeddings", None):
+            clip.track_embeddings = {mapping[int(k)]: v for k, v in clip.track_embeddings.items() if int(k) in mapping}
+        if getattr(clip, "_aggregate", None) is not None:
+            clip._aggregate.relabel(mapping)
 
+        # only tracks the clip's tracker still held at its end can continue into the next clip
+        live = getattr(clip, "live_tracks", None)
+        alive = {mapping[t] for t in live if t in mapping} if live is not None else set(mapping.values())
+        self.prev_last = {mapping[t]: v for t, v in last.items() if mapping[t] in alive}
 
@@ -0,0 +1,88 @@
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+from .schemas import ClipSummary, Detection, FrameResult
+
+# Hot-path results. Same field names as the schemas.py models (everything downstream reads
+# them by attribute), but plain __slots__ objects: no validation or copying per box/frame.
+# Pydantic models are only built at the boundary, via to_schema().
+
+
+class Det:
+    __slots__ = ("cls", "conf", "bbox_xyxy", "track_id")
+
+    def __init__(self, cls: str, conf: float, bbox_xyxy: List[float], track_id: Optional[int] = None):
+        self.cls = cls
+        self.conf = conf
+        self.bbox_xyxy = bbox_xyxy
+        self.track_id = track_id
+
+    def __repr__(self) -> str:
+        return f"Det({self.cls!r}, {self.conf:.3f}, {self.bbox_xyxy}, track_id={self.track_id})"
+
+    def to_schema(self) -> Detection:
+        return Detection(cls=self.cls, conf=self.conf, bbox_xyxy=self.bbox_xyxy, track_id=self.track_id)
+
+
+class Frame:
+    __slots__ = ("frame_index", "ms_from_chunk_start", "detections", "vlm_json")
+
+    def __init__(self, frame_index: int, ms_from_chunk_start: int, detections: List[Det], vlm_json: Optional[Dict] = None):
+        self.frame_index = frame_index
+        self.ms_from_chunk_start = ms_from_chunk_start
+        self.detections = detections
+        self.vlm_json = vlm_json
+
+    def to_schema(self) -> FrameResult:
+        return FrameResult(
+            frame_index=self.frame_index,
+            ms_from_chunk_start=self.ms_from_chunk_start,
+            detections=[d.to_schema() for d in self.detections],
+            vlm_json=self.vlm_json,
+        )
+
+
+class Clip:
+    """In-flight clip result; `to_schema()` gives the ClipSummary written to disk."""
+
+    __slots__ = ("video_path", "chunk_path", "chunk_index", "start_sec", "end_sec", "frames", "tracklets",
+                 "synopsis", "skipped_frames", "track_embeddings", "live_tracks", "_aggregate")
+
+    def __init__(self, video_path: str, chunk_path: str, chunk_index: int, start_sec: float, end_sec: float,
+                 frames: List[Frame], tracklets: Dict[int, Dict], synopsis: Optional[str] = None,
+                 skipped_frames: Optional[List[Dict]] = None, track_embeddings: Optional[Dict[int, Dict]] = None,
+                 aggregate: Any = None, live_tracks: Optional[List[int]] = None):
+        self.video_path = video_path
+        self.chunk_path = chunk_path
+        self.chunk_index = chunk_index
+        self.start_sec = start_sec
+        self.end_sec = end_sec
+        self.frames = frames
+        self.tracklets = tracklets
+        self.synopsis = synopsis
+        self.skipped_frames = skipped_frames or []
+        self.track_embeddings = track_embeddings or {}
+        # track ids still alive in the tracker when the clip ended (TrackStitcher); not written
+        self.live_tracks = live_tracks
+        # utils.context.ClipAggregate built while the clip was analyzed
+        self._aggregate = aggregate
+
+    def to_schema(self, include_frames: bool = True) -> ClipSummary:
+        return ClipSummary(
+            video_path=self.video_path,
+            chunk_path=self.chunk_path,
+            chunk_index=self.chunk_index,
+            start_sec=self.start_sec,
+            end_sec=self.end_sec,
+            frames=[fr.to_schema() for fr in self.frames] if include_frames else [],
+            tracklets=self.tracklets,
+            synopsis=self.synopsis,
+            skipped_frames=self.skipped_frames,
+            track_embeddings=self.track_embeddings,
+        )
+
+
+def as_clip_summary(clip: Any, include_frames: bool = True) -> ClipSummary:
+    """Schema view of either a hot-path Clip or an existing ClipSummary."""
+    if isinstance(clip, ClipSummary):
+        return clip if include_frames else clip.model_copy(update={"frames": []})
+    return clip.to_schema(include_frames)
@@ -1,6 +1,6 @@
 from __future__ import annotations
-from typing import List, Dict, Optional
-from pydantic import BaseModel
+from typing import Any, List, Dict, Optional
+from pydantic import BaseModel, PrivateAttr
 
 class Detection(BaseModel):
     cls: str
@@ -23,9 +23,18 @@ class ClipSummary(BaseModel):
     frames: List[FrameResult]
     tracklets: Dict[int, Dict]
     synopsis: Optional[str] = None
+    # runs of frames the motion gate kept from the detector: start/end frame, count, reason
+    skipped_frames: List[Dict] = []
+    # per-track appearance for cross-camera re-id: cls, n, first_t, last_t, emb
+    track_embeddings: Dict[int, Dict] = {}
+    # running context aggregates (utils.context.ClipAggregate) built during analysis; not serialized
+    _aggregate: Any = PrivateAttr(default=None)
 
 class VideoSummary(BaseModel):
     video_path: str
+    # empty when clips are streamed to disk; see clip_refs
     clip_summaries: List[ClipSummary]
     combined_timeline: List[Dict]
     narrative: Optional[str] = None
+    # per-clip file references: chunk_index, start_sec, end_sec, file, synopsis
+    clip_refs: List[Dict] = []
@@ -0,0 +1,76 @@
+"""Per-frame Python overhead of result objects: pydantic models vs the hot-path records.
+
+    uv run python scripts/bench_hot_path.py --frames 5000 --dets 20
+"""
+from __future__ import annotations
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from footage_analysis.records import Clip, Det, Frame  # noqa: E402
+from footage_analysis.schemas import ClipSummary, Detection, FrameResult  # noqa: E402
+from footage_analysis.utils.columnar import write_clip  # noqa: E402
+
+
+def _rows(n_frames: int, n_dets: int):
+    rnd = random.Random(0)
+    classes = ["person", "car", "truck"]
+    return [
+        [(rnd.choice(classes), rnd.random(), [rnd.random() * 640 for _ in range(4)], rnd.randint(1, 50)) for _ in range(n_dets)]
+        for _ in range(n_frames)
+    ]
+
+
+def _pydantic(rows):
+    # what the pipeline used to do: a model per box, a model per frame, model_dump at the end
+    frames = [
+        FrameResult(frame_index=i, ms_from_chunk_start=i * 33,
+                    detections=[Detection(cls=c, conf=p, bbox_xyxy=b, track_id=t) for c, p, b, t in dets])
+        for i, dets in enumerate(rows)
+    ]
+    return ClipSummary(video_path="v", chunk_path="c", chunk_index=0, start_sec=0, end_sec=10, frames=frames, tracklets={})
+
+
+def _records(rows):
+    frames = [Frame(i, i * 33, [Det(c, p, b, t) for c, p, b, t in dets]) for i, dets in enumerate(rows)]
+    return Clip("v", "c", 0, 0, 10, frames, {})
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--frames", type=int, default=5000)
+    ap.add_argument("--dets", type=int, default=20, help="detections per frame")
+    args = ap.parse_args()
+    rows = _rows(args.frames, args.dets)
+    per_frame = lambda s: f"{s / args.frames * 1e6:8.1f} us/frame"  # noqa: E731
+
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_p, build_p = _timed(_pydantic, rows)
+        _, dump_p = _timed(write_clip, clip_p, Path(tmp) / "json", False)
+        clip_r, build_r = _timed(_records, rows)
+        _, write_r = _timed(write_clip, clip_r, Path(tmp), True)
+        _, schema_r = _timed(clip_r.to_schema)
+
+    print(f"frames={args.frames} dets/frame={args.dets}")
+    print(f"pydantic build        {per_frame(build_p)}")
+    print(f"pydantic json out     {per_frame(dump_p)}")
+    print(f"records build         {per_frame(build_r)}")
+    print(f"records columnar out  {per_frame(write_r)}")
+    print(f"records -> schema     {per_frame(schema_r)}  (only when a pydantic view is needed)")
+    print(f"build speedup         {build_p / max(build_r, 1e-9):8.1f}x")
+    print(f"build + out speedup   {(build_p + dump_p) / max(build_r + write_r, 1e-9):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
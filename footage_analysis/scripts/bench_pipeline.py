@@ -0,0 +1,413 @@
+"""End-to-end pipeline benchmark on synthetic footage with stub models.
+
+    uv run python scripts/bench_pipeline.py --videos 2 --seconds 30 --width 1280 --height 720
+    uv run python scripts/bench_pipeline.py --mode main --jobs 4 --executor process --json after.json --baseline before.json
+
+Videos are drawn with OpenCV (people as tall red boxes, vehicles as wide blue boxes moving
+over a textured background), so no footage, weights or API keys are needed. The detector,
+VLM and text LLM are replaced by stubs with configurable latency; the `color` detector
+finds the drawn boxes, so tracking, re-id and the aggregates see realistic input.
+Stubs are patched into the pipeline modules; process-mode workers inherit them via fork.
+Reports source frames/sec, per-stage time (the --trace spans), peak RSS and output size.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import cv2
+import numpy as np
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from footage_analysis.records import Det  # noqa: E402
+from footage_analysis.utils import ensure_dir  # noqa: E402
+from footage_analysis.utils.trace import start_tracing, stop_tracing, traced  # noqa: E402
+from footage_analysis.models import detector_service, llm  # noqa: E402
+from footage_analysis.models.vlm import _dispatcher  # noqa: E402
+from footage_analysis.pipeline import live, pool, run  # noqa: E402
+
+PKG = Path(__file__).resolve().parents[1]
+JOB = "bench"
+
+# BGR fill colors of the drawn objects; the background stays gray so they segment cleanly
+PERSON_BGR = (30, 30, 230)
+VEHICLE_BGR = (230, 80, 30)
+
+# latencies and detector choice for the stubs; set by install_stubs, inherited by forked workers
+_stub: Dict[str, Any] = {}
+
+
+# ---------------------------------------------------------------- synthetic footage
+
+def make_synthetic_video(path: Path, seconds: float, fps: float, width: int, height: int,
+                         people: int, vehicles: int, seed: int) -> int:
+    """Write an mp4 of boxes moving at constant velocity (bouncing off the edges);
+    returns the number of frames written.
+    """
+    rnd = random.Random(seed)
+    rng = np.random.default_rng(seed)
+    # static texture: blurred noise squeezed into 60..160 gray
+    bg = cv2.GaussianBlur(rng.integers(0, 255, (height, width), dtype=np.uint8), (0, 0), 6)
+    bg = cv2.cvtColor(cv2.normalize(bg, None, 60, 160, cv2.NORM_MINMAX), cv2.COLOR_GRAY2BGR)
+
+    def _objects(n: int, w: float, h: float) -> List[List[float]]:
+        objs = []
+        for _ in range(n):
+            ow, oh = w * rnd.uniform(0.8, 1.2), h * rnd.uniform(0.8, 1.2)
+            objs.append([rnd.uniform(0, width - ow), rnd.uniform(0, height - oh), ow, oh,
+                         rnd.uniform(-4, 4) * width / 1280, rnd.uniform(-2, 2) * height / 720])
+        return objs
+
+    ph = 0.18 * height
+    vw = 0.2 * width
+    walkers = _objects(people, 0.4 * ph, ph)
+    cars = _objects(vehicles, vw, 0.45 * vw)
+    n_frames = int(round(seconds * fps))
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    try:
+        for _ in range(n_frames):
+            frame = bg.copy()
+            # vehicles first so people stay visible in front of them
+            for objs, color in ((cars, VEHICLE_BGR), (walkers, PERSON_BGR)):
+                for o in objs:
+                    x, y, w, h, dx, dy = o
+                    if not 0 <= x + dx <= width - w:
+                        o[4] = dx = -dx
+                    if not 0 <= y + dy <= height - h:
+                        o[5] = dy = -dy
+                    o[0], o[1] = x + dx, y + dy
+                    cv2.rectangle(frame, (int(o[0]), int(o[1])), (int(o[0] + w), int(o[1] + h)), color, -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return n_frames
+
+
+@traced("segment")
+def opencv_chunk_video(video_path: str | Path, out_root: str | Path, seconds: int) -> List[Dict]:
+    """chunk_video without ffmpeg: re-encodes segments with OpenCV (slower than a stream copy)."""
+    vp = Path(video_path)
+    odir = ensure_dir(Path(out_root) / "chunks" / vp.stem)
+    cap = cv2.VideoCapture(str(vp))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    per_chunk = max(1, int(round(seconds * fps)))
+    out: List[Dict] = []
+    writer = None
+    i = 0
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if i % per_chunk == 0:
+            if writer is not None:
+                writer.release()
+            idx = i // per_chunk
+            p = odir / f"{vp.stem}_{idx:05d}.mp4"
+            writer = cv2.VideoWriter(str(p), cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+            out.append({"chunk_path": str(p), "index": idx, "start_sec": idx * seconds, "end_sec": (idx + 1) * seconds})
+        writer.write(frame)
+        i += 1
+    if writer is not None:
+        writer.release()
+    cap.release()
+    return out
+
+
+# ---------------------------------------------------------------- stub models
+
+class StubDetector:
+    """YoloDetector stand-in. `color` segments the drawn boxes, `random` returns a fixed
+    number of random boxes; both then sleep for the configured batch/frame latency.
+    """
+
+    def __init__(self, weights: str, target_classes: List[str], conf_thres: float = 0.25,
+                 imgsz: int = 640, batch_size: int = 8):
+        self.batch_size = max(1, int(batch_size))
+        self.want = set(target_classes)
+        self.kind = _stub.get("detector", "color")
+        self.rnd = random.Random(0)
+        self.tiling = False
+
+    @classmethod
+    def from_cfg(cls, cfg: Dict) -> "StubDetector":
+        return cls(cfg["yolo_weights"], cfg["target_classes"], batch_size=int(cfg.get("yolo_batch_size", 8)))
+
+    def infer(self, frame_bgr: np.ndarray) -> List[Det]:
+        return self.infer_batch([frame_bgr])[0]
+
+    def _color(self, frame: np.ndarray) -> List[Det]:
+        dets: List[Det] = []
+        for cls, lo, hi in (("person", (0, 0, 170), (90, 90, 255)), ("car", (170, 30, 0), (255, 140, 90))):
+            if cls not in self.want:
+                continue
+            mask = cv2.inRange(frame, lo, hi)
+            n, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=4)
+            for x, y, w, h, area in stats[1:].tolist():
+                if area >= 64:
+                    dets.append(Det(cls, 0.9, [float(x), float(y), float(x + w), float(y + h)]))
+        return dets
+
+    def _random(self, frame: np.ndarray) -> List[Det]:
+        h, w = frame.shape[:2]
+        out = []
+        for _ in range(int(_stub.get("random_boxes", 5))):
+            x, y = self.rnd.uniform(0, w - 40), self.rnd.uniform(0, h - 80)
+            out.append(Det("person", self.rnd.uniform(0.3, 1.0), [x, y, x + 40, y + 80]))
+        return out
+
+    @traced("yolo", "model")
+    def infer_batch(self, frames_bgr: List[np.ndarray], regions=None) -> List[List[Det]]:
+        detect = self._color if self.kind == "color" else self._random
+        out = [detect(f) for f in frames_bgr]
+        time.sleep(_stub.get("detector_batch_s", 0.0) + _stub.get("detector_frame_s", 0.0) * len(frames_bgr))
+        return out
+
+
+_VLM_REPLY = {
+    "entities": {"people_count": 2, "vehicles_summary": [{"type": "car", "color": "blue", "approx_count": 1}]},
+    "actions_summary": ["walking"],
+    "movement": {"dominant_direction": "east", "speed_hint": "moderate", "direction_changes": False},
+    "surface_level": "ground",
+    "entry_exit_points": ["street_west"],
+    "weapon_likelihood": {"score": 0.05, "indicators": []},
+    "escape_routes": ["street_west"],
+    "notable": [],
+    "quality": {"lighting": "bright", "occlusion": False, "motion_blur": "low"},
+    "confidence": {"overall": 0.6, "entities": 0.7, "movement": 0.5},
+    "suspicion_score": 0.1,
+}
+
+
+class StubVLM:
+    """VisionLLM stand-in: same surface, canned JSON after `vlm_latency` on the shared VLM pool."""
+
+    def __init__(self, cfg: Dict, max_tokens: int = 512):
+        self.enabled = bool(cfg.get("enable_vlm", False))
+        self.images_per_call = int(cfg.get("vlm_images_per_call", 4))
+        self.max_concurrency = int(cfg.get("vlm_max_concurrency", 4))
+        self.cache = None
+        self.replay = None
+
+    @property
+    def available(self) -> bool:
+        return self.enabled
+
+    def submit_batch(self, frames_bgr: List, context: Optional[Dict] = None) -> Future:
+        return _dispatcher(self.max_concurrency).submit(self.describe_batch, list(frames_bgr), context)
+
+    @traced("vlm_call", "model")
+    def describe_batch(self, frames_bgr: List, context: Optional[Dict] = None) -> Optional[Dict]:
+        if not self.enabled or not frames_bgr:
+            return None
+        time.sleep(_stub.get("vlm_latency_s", 0.0))
+        return json.loads(json.dumps(_VLM_REPLY))
+
+
+class StubLLM:
+    """LLMDispatcher stand-in (no priorities): `llm_latency` per request on `workers` threads.
+    Batched synopsis prompts get one line per clip id back, like the real model.
+    """
+
+    def __init__(self, workers: int):
+        self.pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="llm")
+
+    def submit(self, prompt: str, model: str, max_tokens: int, temperature: float, priority: int = 0) -> Future:
+        return self.pool.submit(self._call, prompt)
+
+    @traced("llm_call", "model")
+    def _call(self, prompt: str) -> str:
+        time.sleep(_stub.get("llm_latency_s", 0.0))
+        ctx = json.loads(prompt.split("\n\n", 1)[0].removeprefix("Context JSON: "))
+        if isinstance(ctx, dict) and ctx and all(str(k).isdigit() for k in ctx):
+            return json.dumps({k: f"Stub synopsis for clip {k}." for k in ctx})
+        return "Stub synopsis."
+
+
+def install_stubs(args: argparse.Namespace, cfg: Dict) -> str:
+    """Patch the stubs into the pipeline modules; returns the chunker in use."""
+    _stub.update(
+        detector=args.detector,
+        detector_batch_s=args.detector_batch_ms / 1000.0,
+        detector_frame_s=args.detector_frame_ms / 1000.0,
+        vlm_latency_s=args.vlm_latency_ms / 1000.0,
+        llm_latency_s=args.llm_latency_ms / 1000.0,
+    )
+    if args.detector != "yolo":
+        run.YoloDetector = StubDetector
+        detector_service.YoloDetector = StubDetector
+    for mod in (run, pool, live):
+        mod.VisionLLM = StubVLM
+    stub_llm = StubLLM(int(cfg.get("llm_max_concurrency", 4)))
+    llm.get_llm_dispatcher = lambda _cfg: stub_llm
+    if args.chunker == "opencv" or (args.chunker == "auto" and not shutil.which("ffmpeg")):
+        run.chunk_video = opencv_chunk_video
+        pool.chunk_video = opencv_chunk_video
+        return "opencv"
+    return "ffmpeg"
+
+
+# ---------------------------------------------------------------- runs
+
+def _dir_bytes(p: Path, pattern: str = "**/*") -> int:
+    return sum(f.stat().st_size for f in p.glob(pattern) if f.is_file())
+
+
+def _bench_cfg(args: argparse.Namespace, work: Path) -> Dict:
+    with open(PKG / "config.yaml", "r") as f:
+        cfg = yaml.safe_load(f)
+    cfg.update(
+        videos_base_dir=str(work / "videos"),
+        results_base_dir=str(work / "results"),
+        artifacts_dir=str(work / "results" / JOB),
+        enable_vlm=args.vlm,
+        enable_llm=args.llm,
+        vlm_cache=False,
+        trace=True,
+        # stubs are patched in-process; spawned workers would load the real models
+        process_start_method="fork",
+        job_report_push_url=None,
+    )
+    for kv in args.set:
+        k, _, v = kv.partition("=")
+        cfg[k] = yaml.safe_load(v)
+    return cfg
+
+
+def run_bench(args: argparse.Namespace) -> Dict[str, Any]:
+    work = Path(args.workdir or tempfile.mkdtemp(prefix="bench_pipeline_"))
+    shutil.rmtree(work / "results", ignore_errors=True)
+    cfg = _bench_cfg(args, work)
+    chunker = install_stubs(args, cfg)
+
+    videos_dir = ensure_dir(work / "videos" / JOB / "processed")
+    videos, frames = [], 0
+    for i in range(args.videos):
+        p = videos_dir / f"cam{i + 1}.mp4"
+        frames += make_synthetic_video(p, args.seconds, args.fps, args.width, args.height,
+                                       args.people, args.vehicles, seed=args.seed + i)
+        videos.append(str(p))
+
+    tracer = start_tracing(cfg)
+    t0 = time.perf_counter()
+    if args.mode == "video":
+        for v in videos:
+            run.process_video(v, cfg)
+        detector_service.shutdown_detector_services()
+    else:
+        from footage_analysis import main as main_mod
+
+        cfg_path = work / "config.yaml"
+        with open(cfg_path, "w") as f:
+            yaml.safe_dump({k: v for k, v in cfg.items() if k != "artifacts_dir"}, f)
+        os.environ["FOOTAGE_CONFIG"] = str(cfg_path)
+        argv = sys.argv
+        sys.argv = ["main.py", "--job_name", JOB, "--jobs", str(args.jobs), "--executor", args.executor, "--trace"]
+        try:
+            main_mod.main()
+        finally:
+            sys.argv = argv
+    wall = time.perf_counter() - t0
+    stop_tracing()
+
+    results = work / "results" / JOB
+    out = {
+        "args": {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "workdir")},
+        "chunker": chunker,
+        "frames": frames,
+        "wall_s": round(wall, 3),
+        "fps": round(frames / max(wall, 1e-9), 1),
+        "stages": {name: {"calls": int(n), "total_s": round(total, 4), "mean_ms": round(total / max(n, 1) * 1e3, 3)}
+                   for name, (n, total, _) in sorted(tracer.stats.items(), key=lambda kv: -kv[1][1])},
+        "peak_rss_mb": {
+            "main": round(tracer.peak_rss.get(tracer.pid, 0) / 2**20, 1),
+            # process-mode workers sample themselves; ffmpeg is not counted
+            "workers_max": round(max([r for p, r in tracer.peak_rss.items() if p != tracer.pid] or [0]) / 2**20, 1),
+        },
+        "output_bytes": {
+            "summaries": _dir_bytes(results / "summaries"),
+            "chunks": _dir_bytes(results / "chunks"),
+            "detections_npz": _dir_bytes(results / "summaries", "**/*.dets.npz"),
+            "json": _dir_bytes(results / "summaries", "**/*.json"),
+        },
+        "workdir": str(work),
+        "summary_table": tracer.summary_table(),
+    }
+    if not args.keep and not args.workdir:
+        shutil.rmtree(work, ignore_errors=True)
+    return out
+
+
+def _print(res: Dict[str, Any], base: Optional[Dict[str, Any]]) -> None:
+    def _delta(new: float, old: Optional[float]) -> str:
+        if old in (None, 0):
+            return ""
+        return f"  ({(new - old) / old * 100:+.1f}% vs baseline {old})"
+
+    b = base or {}
+    print(f"\nframes={res['frames']} wall={res['wall_s']}s chunker={res['chunker']}")
+    print(f"fps                 {res['fps']:>10}{_delta(res['fps'], b.get('fps'))}")
+    for k, v in res["peak_rss_mb"].items():
+        print(f"peak rss {k:<10} {v:>10} MB{_delta(v, (b.get('peak_rss_mb') or {}).get(k))}")
+    for k, v in res["output_bytes"].items():
+        print(f"output {k:<12} {v:>10} B{_delta(v, (b.get('output_bytes') or {}).get(k))}")
+    print(f"\n{'stage':<16} {'calls':>8} {'total s':>10} {'mean ms':>10}")
+    for name, st in res["stages"].items():
+        old = (b.get("stages") or {}).get(name, {}).get("total_s")
+        print(f"{name:<16} {st['calls']:>8} {st['total_s']:>10.3f} {st['mean_ms']:>10.3f}{_delta(st['total_s'], old)}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--mode", choices=["video", "main"], default="video",
+                    help="video: process_video per video in-process; main: main.py end to end (job report included)")
+    ap.add_argument("--jobs", type=int, default=1, help="main mode: --jobs")
+    ap.add_argument("--executor", choices=["thread", "process"], default="thread", help="main mode: --executor")
+    ap.add_argument("--videos", type=int, default=2)
+    ap.add_argument("--seconds", type=float, default=30)
+    ap.add_argument("--fps", type=float, default=30)
+    ap.add_argument("--width", type=int, default=1280)
+    ap.add_argument("--height", type=int, default=720)
+    ap.add_argument("--people", type=int, default=6)
+    ap.add_argument("--vehicles", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--detector", choices=["color", "random", "yolo"], default="color",
+                    help="yolo runs the real YoloDetector with the configured weights")
+    ap.add_argument("--detector-batch-ms", type=float, default=15.0, help="stub latency per detector call")
+    ap.add_argument("--detector-frame-ms", type=float, default=2.0, help="stub latency per frame in a call")
+    ap.add_argument("--vlm", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--vlm-latency-ms", type=float, default=1500.0)
+    ap.add_argument("--llm", action=argparse.BooleanOptionalAction, default=True)
+    ap.add_argument("--llm-latency-ms", type=float, default=800.0)
+    ap.add_argument("--chunker", choices=["auto", "ffmpeg", "opencv"], default="auto",
+                    help="auto uses ffmpeg when it is on PATH")
+    ap.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="config override (YAML value); repeatable")
+    ap.add_argument("--workdir", default=None, help="keep videos and outputs here instead of a temp dir")
+    ap.add_argument("--keep", action="store_true", help="keep the temp dir")
+    ap.add_argument("--json", default=None, help="write results here")
+    ap.add_argument("--baseline", default=None, help="results JSON of an earlier run to compare against")
+    args = ap.parse_args()
+
+    res = run_bench(args)
+    base = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            base = json.load(f)
+    _print(res, base)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({k: v for k, v in res.items() if k != "summary_table"}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
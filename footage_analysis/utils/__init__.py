@@ -1,5 +1,5 @@
-from .common import ensure_dir, write_json, ms_from_frames, iou_xyxy
-from .image import b64_of_bgr
+from .common import ensure_dir, write_json, ms_from_frames, iou_xyxy, iou_matrix
+from .image import b64_of_bgr, dhash, hamming
 from . import prompts
 
 __all__ = [
@@ -7,7 +7,10 @@ __all__ = [
     "write_json",
     "ms_from_frames",
     "b64_of_bgr",
+    "dhash",
+    "hamming",
     "iou_xyxy",
+    "iou_matrix",
     "prompts",
 ]
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import asyncio
 import random
+import threading
 import time
 from typing import Callable, Type, Iterable
 
@@ -24,6 +25,59 @@ async def with_exponential_backoff(async_fn: Callable[[], "asyncio.Future"], *,
             await asyncio.sleep(delay)
 
 
+def with_backoff(fn: Callable[[], object], *,
+                 retries: int = 5,
+                 base_delay: float = 0.5,
+                 max_delay: float = 8.0,
+                 retry_on: Iterable[Type[BaseException]] = (Exception,)):
+    """Blocking counterpart of with_exponential_backoff for thread-based callers."""
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except retry_on as e:  # type: ignore
+            attempt += 1
+            if attempt > retries:
+                raise
+            delay = min(max_delay, base_delay * (2 ** (attempt - 1)))
+            delay *= random.uniform(0.8, 1.3)
+            time.sleep(delay)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rpm` tokens per minute, bursts up to `burst`.
+    Unlike RateLimiter it coordinates every thread and event loop in the process.
+    """
+
+    def __init__(self, rpm: float, burst: int = 1):
+        self.rate = max(1e-6, float(rpm) / 60.0)
+        self.capacity = max(1.0, float(burst))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds: float) -> None:
+        """Push the next token out, e.g. after the provider answers 429."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 1.0) - seconds * self.rate
+
+
 class RateLimiter:
     def __init__(self, rpm: int):
         self.interval = max(0.01, 60.0 / float(rpm))
@@ -0,0 +1,153 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import numpy as np
+from pydantic import TypeAdapter
+
+from ..schemas import ClipSummary, FrameResult
+from ..records import Clip, as_clip_summary
+from .common import write_json
+from .trace import traced
+
+# bumped when the array layout changes
+COLUMNAR_VERSION = 1
+DETECTIONS_SUFFIX = ".dets.npz"
+
+_frames_adapter = TypeAdapter(List[FrameResult])
+
+
+def clip_columns(clip: Clip | ClipSummary) -> Dict[str, np.ndarray]:
+    """Per-frame detections as flat arrays. Frame arrays have one row per analyzed frame;
+    detection arrays one row per detection, with `det_frame` pointing at its frame row.
+    Class names are stored once in `class_names`; `track_id` is -1 when untracked.
+    """
+    names: Dict[str, int] = {}
+    frame_index: List[int] = []
+    ms: List[int] = []
+    det_frame: List[int] = []
+    cls: List[int] = []
+    conf: List[float] = []
+    bbox: List[List[float]] = []
+    track_id: List[int] = []
+    for row, fr in enumerate(clip.frames):
+        frame_index.append(fr.frame_index)
+        ms.append(fr.ms_from_chunk_start)
+        for d in fr.detections:
+            cid = names.get(d.cls)
+            if cid is None:
+                cid = names[d.cls] = len(names)
+            det_frame.append(row)
+            cls.append(cid)
+            conf.append(d.conf)
+            bbox.append(d.bbox_xyxy)
+            track_id.append(-1 if d.track_id is None else d.track_id)
+    return {
+        "version": np.asarray(COLUMNAR_VERSION, dtype=np.int32),
+        "class_names": np.asarray(list(names), dtype=np.str_),
+        "frame_index": np.asarray(frame_index, dtype=np.int32),
+        "ms": np.asarray(ms, dtype=np.int32),
+        "det_frame": np.asarray(det_frame, dtype=np.int32),
+        "cls": np.asarray(cls, dtype=np.int16),
+        "conf": np.asarray(conf, dtype=np.float32),
+        "bbox": np.asarray(bbox, dtype=np.float32).reshape(-1, 4),
+        "track_id": np.asarray(track_id, dtype=np.int32),
+    }
+
+
+def _det_summary(cols: Dict[str, np.ndarray], top_n: int = 5) -> Dict[str, Any]:
+    names = cols["class_names"].tolist()
+    counts = np.bincount(cols["cls"], minlength=len(names)) if len(cols["cls"]) else np.zeros(len(names), dtype=np.int64)
+    top = np.argsort(-cols["conf"], kind="stable")[:top_n]
+    return {
+        "det_counts": {n: int(c) for n, c in zip(names, counts.tolist()) if c},
+        "top_detections": [
+            {
+                "cls": names[int(cols["cls"][i])],
+                "conf": float(cols["conf"][i]),
+                "track_id": None if cols["track_id"][i] < 0 else int(cols["track_id"][i]),
+                "ms_from_chunk_start": int(cols["ms"][cols["det_frame"][i]]),
+                "bbox_xyxy": cols["bbox"][i].tolist(),
+            }
+            for i in top.tolist()
+        ],
+    }
+
+
+def light_clip_dict(clip: Clip | ClipSummary, detections_file: str, cols: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+    """Clip JSON without per-frame detections: metadata, tracks, synopsis, VLM output,
+    a small detection summary, and the name of the sibling array file.
+    """
+    cols = cols if cols is not None else clip_columns(clip)
+    out = as_clip_summary(clip, include_frames=False).model_dump(exclude={"frames"})
+    out["detections_file"] = detections_file
+    out["frames_count"] = len(clip.frames)
+    out.update(_det_summary(cols))
+    out["vlm_frames"] = [
+        {"frame_index": fr.frame_index, "ms_from_chunk_start": fr.ms_from_chunk_start, "vlm_json": fr.vlm_json}
+        for fr in clip.frames
+        if fr.vlm_json
+    ]
+    return out
+
+
+@traced("write_clip", "io")
+def write_clip(clip: Clip | ClipSummary, out_dir: str | Path, columnar: bool = True) -> Dict[str, Any]:
+    """Write clip_NNNNN.json (plus clip_NNNNN.dets.npz when columnar) and return the JSON
+    payload, which is also what video_summary.json embeds for the clip.
+    """
+    out_dir = Path(out_dir)
+    stem = f"clip_{clip.chunk_index:05d}"
+    if not columnar:
+        data = as_clip_summary(clip).model_dump()
+    else:
+        cols = clip_columns(clip)
+        det_name = stem + DETECTIONS_SUFFIX
+        out_dir.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(out_dir / det_name, **cols)
+        data = light_clip_dict(clip, det_name, cols)
+    write_json(data, out_dir / f"{stem}.json")
+    return data
+
+
+def frames_from_columns(cols: Dict[str, np.ndarray], vlm_frames: Optional[List[Dict]] = None) -> List[FrameResult]:
+    names = cols["class_names"].tolist()
+    vlm_by_idx = {int(v["frame_index"]): v.get("vlm_json") for v in vlm_frames or []}
+    det_frame = cols["det_frame"]
+    cls = cols["cls"].tolist()
+    conf = cols["conf"].tolist()
+    bbox = cols["bbox"].tolist()
+    tids = cols["track_id"].tolist()
+    # detections are written frame by frame, so each frame's rows are one contiguous slice
+    bounds = np.searchsorted(det_frame, np.arange(len(cols["frame_index"]) + 1)).tolist()
+    frames: List[Dict[str, Any]] = []
+    for row, (fidx, ms) in enumerate(zip(cols["frame_index"].tolist(), cols["ms"].tolist())):
+        dets = [
+            {"cls": names[cls[i]], "conf": conf[i], "bbox_xyxy": bbox[i], "track_id": None if tids[i] < 0 else tids[i]}
+            for i in range(bounds[row], bounds[row + 1])
+        ]
+        frames.append({"frame_index": fidx, "ms_from_chunk_start": ms, "detections": dets, "vlm_json": vlm_by_idx.get(fidx)})
+    # one validation pass over the whole list instead of a model call per detection
+    return _frames_adapter.validate_python(frames)
+
+
+def load_columns(path: str | Path) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as z:
+        return {k: z[k] for k in z.files}
+
+
+def clip_from_dict(data: Dict[str, Any], base_dir: str | Path) -> ClipSummary:
+    """Rebuild the full pydantic clip from either JSON form; `base_dir` resolves `detections_file`."""
+    det_file = data.get("detections_file")
+    if not det_file:
+        return ClipSummary(**data)
+    fields = {k: v for k, v in data.items() if k in ClipSummary.model_fields and k != "frames"}
+    frames = frames_from_columns(load_columns(Path(base_dir) / det_file), data.get("vlm_frames"))
+    return ClipSummary(frames=[], **fields).model_copy(update={"frames": frames})
+
+
+def load_clip(path: str | Path) -> ClipSummary:
+    p = Path(path)
+    with open(p, "r") as f:
+        data = json.load(f)
+    return clip_from_dict(data, p.parent)
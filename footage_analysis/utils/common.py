@@ -1,6 +1,8 @@
 from __future__ import annotations
 import json
 from pathlib import Path
+import numpy as np
+from .trace import span
 
 
 def ensure_dir(path: str | Path) -> Path:
@@ -12,7 +14,7 @@ def ensure_dir(path: str | Path) -> Path:
 def write_json(obj, path: str | Path):
     target = Path(path)
     target.parent.mkdir(parents=True, exist_ok=True)
-    with open(target, "w") as f:
+    with span("write_json", "io", file=target.name), open(target, "w") as f:
         json.dump(obj, f, indent=2)
 
 
@@ -35,4 +37,15 @@ def iou_xyxy(a, b) -> float:
     return inter / (area_a + area_b - inter + 1e-9)
 
 
-
+def iou_matrix(a, b) -> np.ndarray:
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes -> (N, M)."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
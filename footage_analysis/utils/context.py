@@ -1,170 +1,385 @@
 from __future__ import annotations
 import json
-from collections import Counter, defaultdict
-from typing import Any, Dict, List, Optional
+import math
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional
 
+from .columnar import clip_from_dict
 
-def _det_counts(frames: List[Any]) -> Dict[str, int]:
-    cnt = Counter()
-    for fr in frames:
-        for d in getattr(fr, "detections", []) or []:
-            cls_ = getattr(d, "cls", None)
-            if cls_:
-                cnt[cls_] += 1
-    return dict(cnt)
+# compact per-video sidecar written next to video_summary.json
+VIDEO_INDEX_FILENAME = "video_index.json"
+VIDEO_INDEX_VERSION = 1
+
+
+def _get(obj: Any, key: str, default: Any = None) -> Any:
+    """Field access for both pydantic models and their JSON dicts."""
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+class VlmFieldCounter:
+    """Running counters over VLM responses; `fields` gives the `_collect_vlm_fields` shape.
+    Ordered samples are capped at what the output can show, so merging two counters
+    equals counting both response streams in sequence.
+    """
+
+    ENTRY_LIMIT = 5
+    TOUCH_LIMIT = 3
+
+    def __init__(self):
+        self.surfaces = Counter()
+        self.entries: Dict[str, None] = {}
+        self.actions = Counter()
+        self.notables = Counter()
+        self.touch_events: List[Dict[str, Any]] = []
+        self.routes = Counter()
+
+    def add(self, v: Any) -> None:
+        if not v or not isinstance(v, dict):
+            return
+        # batch schema preferred
+        surf = v.get("surface_level")
+        if surf:
+            self.surfaces[surf] += 1
+        for e in v.get("entry_exit_points", []) or []:
+            if len(self.entries) >= self.ENTRY_LIMIT:
+                break
+            self.entries.setdefault(str(e))
+        for a in v.get("actions_summary", []) or v.get("actions", []) or []:
+            self.actions[str(a)] += 1
+        for n in v.get("notable", []) or []:
+            self.notables[str(n)] += 1
+        for t in v.get("touch_events", []) or []:
+            if len(self.touch_events) >= self.TOUCH_LIMIT:
+                break
+            self.touch_events.append(t)
+        for r in v.get("escape_routes", []) or []:
+            self.routes[str(r)] += 1
+
+    def merge(self, other: "VlmFieldCounter") -> None:
+        self.surfaces.update(other.surfaces)
+        for e in other.entries:
+            if len(self.entries) >= self.ENTRY_LIMIT:
+                break
+            self.entries.setdefault(e)
+        self.actions.update(other.actions)
+        self.notables.update(other.notables)
+        self.touch_events.extend(other.touch_events[: self.TOUCH_LIMIT - len(self.touch_events)])
+        self.routes.update(other.routes)
+
+    def fields(self, max_items: int = 3) -> Dict[str, Any]:
+        return {
+            "surface_level_modes": [k for k, _ in self.surfaces.most_common(3)],
+            "entry_exit_points": list(self.entries)[:5],
+            "common_actions": [k for k, _ in self.actions.most_common(5)],
+            "common_notable": [k for k, _ in self.notables.most_common(5)],
+            "touch_events_samples": self.touch_events[:max_items],
+            "escape_routes_modes": [k for k, _ in self.routes.most_common(3)],
+        }
 
 
 def _collect_vlm_fields(frames: List[Any], max_items: int = 3) -> Dict[str, Any]:
-    out: Dict[str, Any] = {}
-    surfaces = Counter()
-    entries: List[str] = []
-    notables = Counter()
-    actions = Counter()
-    touch_events: List[Dict[str, Any]] = []
-    routes = Counter()
+    counter = VlmFieldCounter()
     for fr in frames:
-        v = getattr(fr, "vlm_json", None)
-        if not v:
-            continue
-        if isinstance(v, dict):
-            # batch schema preferred
-            surf = v.get("surface_level")
-            if surf:
-                surfaces[surf] += 1
-            for e in v.get("entry_exit_points", []) or []:
-                entries.append(str(e))
-            for a in v.get("actions_summary", []) or v.get("actions", []) or []:
-                actions[str(a)] += 1
-            for n in v.get("notable", []) or []:
-                notables[str(n)] += 1
-            for t in v.get("touch_events", []) or []:
-                touch_events.append(t)
-            for r in v.get("escape_routes", []) or []:
-                routes[str(r)] += 1
-    out["surface_level_modes"] = [k for k, _ in surfaces.most_common(3)]
-    out["entry_exit_points"] = list(dict.fromkeys(entries))[:5]
-    out["common_actions"] = [k for k, _ in actions.most_common(5)]
-    out["common_notable"] = [k for k, _ in notables.most_common(5)]
-    out["touch_events_samples"] = touch_events[:max_items]
-    out["escape_routes_modes"] = [k for k, _ in routes.most_common(3)]
-    return out
+        counter.add(_get(fr, "vlm_json"))
+    return counter.fields(max_items)
 
 
-def build_clip_context(frames: List[Any], seconds: Optional[float] = None) -> Dict[str, Any]:
-    """Compact JSON context for a single clip from its frames.
-    Focuses on YOLO detections (especially persons), includes a few VLM fields,
-    and a short recent timeline sample.
+def _cardinal(dx: float, dy: float) -> str:
+    if dx is None or dy is None:
+        return "unknown"
+    ang = (math.degrees(math.atan2(-dy, dx)) + 360.0) % 360.0  # 0=east, 90=north
+    dirs = [(0, "east"), (45, "northeast"), (90, "north"), (135, "northwest"), (180, "west"), (225, "southwest"), (270, "south"), (315, "southeast"), (360, "east")]
+    best = min(dirs, key=lambda t: abs(ang - t[0]))
+    return best[1]
+
+
+class ClipAggregate:
+    """Single-pass aggregates for one clip, updated as each frame's results are produced:
+    class counts, first/last observation per tracked person, VLM field counters and the
+    last few frames. Context builders read from it instead of re-walking detections.
     """
-    ctx: Dict[str, Any] = {}
-    # overall class counts
-    det_counts = _det_counts(frames)
-    ctx["det_counts"] = det_counts
-
-    # person-focused tracking summary
-    # collect track trajectories for persons across frames
-    track_traj: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
-    for fr in frames:
-        ms = getattr(fr, "ms_from_chunk_start", None)
-        for d in getattr(fr, "detections", []) or []:
-            if getattr(d, "cls", None) == "person" and getattr(d, "track_id", None) is not None:
-                x1, y1, x2, y2 = (d.bbox_xyxy if hasattr(d, "bbox_xyxy") else [None, None, None, None])
-                if x1 is None:
-                    continue
-                cx = (x1 + x2) / 2.0
-                cy = (y1 + y2) / 2.0
-                track_traj[int(d.track_id)].append({"ms": ms, "cx": cx, "cy": cy, "conf": getattr(d, "conf", None)})
-
-    def _cardinal(dx: float, dy: float) -> str:
-        if dx is None or dy is None:
-            return "unknown"
-        import math
-        ang = (math.degrees(math.atan2(-dy, dx)) + 360.0) % 360.0  # 0=east, 90=north
-        dirs = [(0, "east"), (45, "northeast"), (90, "north"), (135, "northwest"), (180, "west"), (225, "southwest"), (270, "south"), (315, "southeast"), (360, "east")]
-        best = min(dirs, key=lambda t: abs(ang - t[0]))
-        return best[1]
-
-    persons_summary: List[Dict[str, Any]] = []
-    for tid, pts in track_traj.items():
-        pts_sorted = sorted([p for p in pts if p.get("ms") is not None], key=lambda x: x["ms"]) or pts
-        if not pts_sorted:
-            continue
-        first, last = pts_sorted[0], pts_sorted[-1]
-        dt = max(1, (last.get("ms") or 0) - (first.get("ms") or 0))  # ms
-        dx = (last.get("cx") or 0) - (first.get("cx") or 0)
-        dy = (last.get("cy") or 0) - (first.get("cy") or 0)
-        direction = _cardinal(dx, dy)
-        speed_px_per_s = ((dx ** 2 + dy ** 2) ** 0.5) / (dt / 1000.0)
-        if speed_px_per_s < 10:
-            speed_hint = "slow"
-        elif speed_px_per_s < 50:
-            speed_hint = "moderate"
-        else:
-            speed_hint = "fast"
-        persons_summary.append({
-            "track_id": tid,
-            "observations": len(pts_sorted),
-            "duration_ms": dt,
-            "direction": direction,
-            "speed_hint": speed_hint,
-            "last_conf": last.get("conf")
-        })
 
-    ctx["persons_active_count"] = len(persons_summary)
-    # prioritize longest-observed persons
-    persons_summary = sorted(persons_summary, key=lambda p: (-p["observations"], -p["duration_ms"]))
-    ctx["persons_summary"] = persons_summary[:5]
-
-    # vehicles overview
-    vehicle_classes = [k for k in det_counts.keys() if k in {"car", "truck", "van", "bike"}]
-    ctx["vehicles_present"] = {k: det_counts.get(k, 0) for k in vehicle_classes}
-
-    # summarized VLM fields
-    ctx["vlm"] = _collect_vlm_fields(frames)
-    # short timeline sample: last 5 frames with tracked detections
-    recent = []
-    for fr in frames[-10:]:
-        dets = []
-        for d in getattr(fr, "detections", []) or []:
-            dets.append({
-                "cls": getattr(d, "cls", None),
-                "conf": getattr(d, "conf", None),
-                "track_id": getattr(d, "track_id", None),
+    RECENT_FRAMES = 10
+
+    def __init__(self):
+        self.frames = 0
+        self.det_counts: Counter = Counter()
+        # track_id -> [observations, first (ms, cx, cy, conf), last (ms, cx, cy, conf)]
+        self.persons: Dict[int, List[Any]] = {}
+        self.vlm = VlmFieldCounter()
+        self.recent: Deque[Any] = deque(maxlen=self.RECENT_FRAMES)
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[Any]) -> "ClipAggregate":
+        agg = cls()
+        for fr in frames:
+            agg.observe(fr)
+        return agg
+
+    def observe(self, frame: Any) -> None:
+        """Fold in one frame (pydantic FrameResult or its JSON dict), in time order."""
+        self.frames += 1
+        ms = _get(frame, "ms_from_chunk_start")
+        for d in _get(frame, "detections") or []:
+            cls_ = _get(d, "cls")
+            if cls_:
+                self.det_counts[cls_] += 1
+            tid = _get(d, "track_id")
+            if cls_ != "person" or tid is None:
+                continue
+            box = _get(d, "bbox_xyxy")
+            if not box or box[0] is None:
+                continue
+            x1, y1, x2, y2 = box
+            pt = (ms, (x1 + x2) / 2.0, (y1 + y2) / 2.0, _get(d, "conf"))
+            tr = self.persons.get(int(tid))
+            if tr is None:
+                self.persons[int(tid)] = [1, pt, pt]
+            else:
+                tr[0] += 1
+                tr[2] = pt
+        self.recent.append(frame)
+        self.vlm.add(_get(frame, "vlm_json"))
+
+    def observe_vlm(self, vlm_json: Any) -> None:
+        """For VLM responses attached to an already observed frame."""
+        self.vlm.add(vlm_json)
+
+    def relabel(self, mapping: Dict[int, int]) -> None:
+        # detections in `recent` are the clip's own objects and are relabeled in place
+        self.persons = {mapping.get(t, t): v for t, v in self.persons.items()}
+
+    def persons_summary(self) -> List[Dict[str, Any]]:
+        out: List[Dict[str, Any]] = []
+        for tid, (n, first, last) in self.persons.items():
+            dt = max(1, (last[0] or 0) - (first[0] or 0))  # ms
+            dx = (last[1] or 0) - (first[1] or 0)
+            dy = (last[2] or 0) - (first[2] or 0)
+            speed_px_per_s = ((dx ** 2 + dy ** 2) ** 0.5) / (dt / 1000.0)
+            if speed_px_per_s < 10:
+                speed_hint = "slow"
+            elif speed_px_per_s < 50:
+                speed_hint = "moderate"
+            else:
+                speed_hint = "fast"
+            out.append({
+                "track_id": tid,
+                "observations": n,
+                "duration_ms": dt,
+                "direction": _cardinal(dx, dy),
+                "speed_hint": speed_hint,
+                "last_conf": last[3],
             })
-        recent.append({
-            "ms": getattr(fr, "ms_from_chunk_start", None),
-            "detections": dets,
-        })
-    ctx["recent_timeline"] = recent
-    if seconds is not None:
-        ctx["clip_seconds"] = seconds
-    return ctx
+        return out
+
+    def context(self, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Compact JSON context for the clip.
+        Focuses on YOLO detections (especially persons), includes a few VLM fields,
+        and a short recent timeline sample.
+        """
+        ctx: Dict[str, Any] = {}
+        det_counts = dict(self.det_counts)
+        ctx["det_counts"] = det_counts
+        persons_summary = self.persons_summary()
+        ctx["persons_active_count"] = len(persons_summary)
+        # prioritize longest-observed persons
+        persons_summary = sorted(persons_summary, key=lambda p: (-p["observations"], -p["duration_ms"]))
+        ctx["persons_summary"] = persons_summary[:5]
+
+        # vehicles overview
+        vehicle_classes = [k for k in det_counts.keys() if k in {"car", "truck", "van", "bike"}]
+        ctx["vehicles_present"] = {k: det_counts.get(k, 0) for k in vehicle_classes}
+
+        # summarized VLM fields
+        ctx["vlm"] = self.vlm.fields()
+        # short timeline sample: last frames with their detections
+        recent = []
+        for fr in self.recent:
+            recent.append({
+                "ms": _get(fr, "ms_from_chunk_start"),
+                "detections": [
+                    {"cls": _get(d, "cls"), "conf": _get(d, "conf"), "track_id": _get(d, "track_id")}
+                    for d in _get(fr, "detections") or []
+                ],
+            })
+        ctx["recent_timeline"] = recent
+        if seconds is not None:
+            ctx["clip_seconds"] = seconds
+        return ctx
+
+    def timeline(self, start_sec: float, chunk_index: Any, last_n_frames: int = 5) -> List[Dict[str, Any]]:
+        """Tracked detections from the last few frames, in absolute video time."""
+        out: List[Dict[str, Any]] = []
+        for fr in list(self.recent)[-last_n_frames:]:
+            for det in _get(fr, "detections") or []:
+                if _get(det, "track_id") is None:
+                    continue
+                out.append({
+                    "t_abs_sec": start_sec + _get(fr, "ms_from_chunk_start", 0) / 1000.0,
+                    "chunk": chunk_index,
+                    "track_id": _get(det, "track_id"),
+                    "cls": _get(det, "cls"),
+                    "conf": _get(det, "conf"),
+                })
+        return out
+
+
+def clip_aggregate(clip: Any) -> ClipAggregate:
+    """The aggregate built while the clip was analyzed, or one pass over its frames for
+    clips loaded from disk (cached on pydantic clips).
+    """
+    agg = getattr(clip, "_aggregate", None) if not isinstance(clip, dict) else None
+    if agg is None:
+        agg = ClipAggregate.from_frames(_get(clip, "frames") or [])
+        if not isinstance(clip, dict):
+            clip._aggregate = agg
+    return agg
+
+
+def build_clip_context(frames: List[Any], seconds: Optional[float] = None) -> Dict[str, Any]:
+    """Compact JSON context for a single clip from its frames (see `ClipAggregate.context`)."""
+    return ClipAggregate.from_frames(frames).context(seconds)
 
 
 def build_video_context(clip_summaries: List[Any], timeline: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Compact context for an entire video: class counts, recent timeline and a sample of VLM fields from clips."""
     det_cnt = Counter()
+    vlm = VlmFieldCounter()
     for clip in clip_summaries:
-        for fr in getattr(clip, "frames", []) or []:
-            for d in getattr(fr, "detections", []) or []:
-                if getattr(d, "cls", None):
-                    det_cnt[getattr(d, "cls")] += 1
-    # sample vlm across clips
-    all_frames = []
-    for clip in clip_summaries:
-        all_frames.extend(getattr(clip, "frames", []) or [])
-    vlm_fields = _collect_vlm_fields(all_frames)
+        agg = clip_aggregate(clip)
+        det_cnt.update(agg.det_counts)
+        vlm.merge(agg.vlm)
     # recent timeline tail
     tail = timeline[-20:] if timeline else []
     return {
         "det_counts": dict(det_cnt),
-        "vlm": vlm_fields,
+        "vlm": vlm.fields(),
         "recent_timeline": tail,
     }
 
 
+def clip_timeline(clip: Any, last_n_frames: int = 5) -> List[Dict[str, Any]]:
+    """Tracked detections from the last few frames of a clip, in absolute video time."""
+    return clip_aggregate(clip).timeline(float(_get(clip, "start_sec", 0.0)), _get(clip, "chunk_index"), last_n_frames)
+
+
+class VideoAggregate:
+    """Running per-video aggregates fed one finished clip at a time, so clips can be
+    written and dropped as they complete: class counts, VLM outputs, the combined
+    timeline, synopses, and a reference to each clip file.
+    """
+
+    def __init__(self, video_path: Optional[str] = None):
+        self.video_path = video_path
+        self.clips = 0
+        self.det_counts: Counter = Counter()
+        self.vlm = VlmFieldCounter()
+        self.clip_refs: List[Dict[str, Any]] = []
+        self._timeline: Dict[int, List[Dict[str, Any]]] = {}
+        self._synopses: Dict[int, str] = {}
+
+    def add(self, clip: Any, ref: Optional[Dict[str, Any]] = None) -> None:
+        self.clips += 1
+        self.video_path = self.video_path or _get(clip, "video_path")
+        idx = int(_get(clip, "chunk_index", self.clips - 1))
+        agg = clip_aggregate(clip)
+        # clips are merged in arrival order; counts are order-free, capped VLM samples are not
+        self.det_counts.update(agg.det_counts)
+        self.vlm.merge(agg.vlm)
+        self._timeline[idx] = agg.timeline(float(_get(clip, "start_sec", 0.0)), _get(clip, "chunk_index"))
+        syn = _get(clip, "synopsis")
+        if syn:
+            self._synopses[idx] = str(syn)
+        if ref is not None:
+            self.clip_refs.append(ref)
+
+    @property
+    def timeline(self) -> List[Dict[str, Any]]:
+        # clips may land out of order (pipelined synopses); keep chunk order
+        return [t for i in sorted(self._timeline) for t in self._timeline[i]]
+
+    @property
+    def synopses(self) -> List[str]:
+        return [self._synopses[i] for i in sorted(self._synopses)]
+
+    def video_context(self) -> Dict[str, Any]:
+        """Same shape as `build_video_context`."""
+        return {
+            "det_counts": dict(self.det_counts),
+            "vlm": self.vlm.fields(),
+            "recent_timeline": self.timeline[-20:],
+        }
+
+    def index(self, timeline: Optional[List[Dict[str, Any]]] = None, tail_n: int = 50) -> Dict[str, Any]:
+        timeline = self.timeline if timeline is None else timeline
+        return {
+            "version": VIDEO_INDEX_VERSION,
+            "video_path": self.video_path,
+            "clips": self.clips,
+            "det_counts": dict(self.det_counts),
+            "vlm": self.vlm.fields(),
+            "timeline_tail": timeline[-tail_n:],
+            "synopses_tail": self.synopses[-tail_n:],
+        }
+
+
+def build_video_index(video_path: Optional[str], clips: Iterable[Any], timeline: List[Dict[str, Any]], tail_n: int = 50) -> Dict[str, Any]:
+    """Precomputed aggregates the job context needs, so job synthesis never reloads full summaries.
+    `clips` may be a generator; `timeline` is read after it is exhausted. Without a
+    `video_path`, the clips' own video_path is used.
+    """
+    agg = VideoAggregate(video_path)
+    for clip in clips:
+        agg.add(clip)
+    return agg.index(timeline, tail_n)
+
+
+def _index_from_outputs(summary_path: Path) -> Dict[str, Any]:
+    """Fallback for outputs without a sidecar: stream the per-clip files one at a time,
+    and only parse the full video_summary.json when there are none.
+    """
+    clip_paths = sorted(summary_path.parent.glob("clip_*.json"))
+    if not clip_paths:
+        with open(summary_path, "r") as f:
+            vs = json.load(f)
+        clips = (clip_from_dict(c, summary_path.parent) if c.get("detections_file") else c
+                 for c in vs.get("clip_summaries", []) or [])
+        return build_video_index(vs.get("video_path", str(summary_path)), clips,
+                                 vs.get("combined_timeline", []) or [])
+    agg = VideoAggregate()
+    for cp in clip_paths:
+        with open(cp, "r") as f:
+            clip = json.load(f)
+        if clip.get("detections_file"):
+            # columnar output: detections live in the sibling .dets.npz
+            clip = clip_from_dict(clip, cp.parent)
+        agg.add(clip)
+    idx = agg.index()
+    idx["video_path"] = idx["video_path"] or str(summary_path)
+    return idx
+
+
+def load_video_index(summary_path: str | Path) -> Dict[str, Any]:
+    p = Path(summary_path)
+    sidecar = p.with_name(VIDEO_INDEX_FILENAME)
+    if sidecar.exists():
+        try:
+            with open(sidecar, "r") as f:
+                idx = json.load(f)
+            if idx.get("version") == VIDEO_INDEX_VERSION:
+                return idx
+        except (OSError, ValueError):
+            pass
+    return _index_from_outputs(p)
+
+
 def build_job_context_from_paths(summary_paths: List[str], max_per_video: int = 20, synopses_tail_n: int = 5) -> Dict[str, Any]:
     """Aggregate lightweight context across videos for the job_report.
-    Loads each video_summary.json and extracts det counts, tail timeline, and any surface/touch/escape hints.
+    Reads each video's video_index.json sidecar (falling back to per-clip files for older
+    outputs) for det counts, tail timeline, and any surface/touch/escape hints.
     """
     videos: List[Dict[str, Any]] = []
     totals = Counter()
@@ -172,36 +387,22 @@ def build_job_context_from_paths(summary_paths: List[str], max_per_video: int =
     surfaces = Counter()
     for p in summary_paths:
         try:
-            with open(p, "r") as f:
-                vs = json.load(f)
+            idx = load_video_index(p)
         except Exception:
             continue
-        # counts
-        v_cnt = Counter()
-        all_frames = []
-        synopses: List[str] = []
-        for clip in vs.get("clip_summaries", []) or []:
-            for fr in clip.get("frames", []) or []:
-                all_frames.append(fr)
-                for d in (fr.get("detections", []) or []):
-                    c = d.get("cls")
-                    if c:
-                        v_cnt[c] += 1
-                        totals[c] += 1
-            syn = clip.get("synopsis")
-            if syn:
-                synopses.append(str(syn))
-        vlm_fields = _collect_vlm_fields(all_frames)
+        v_cnt = idx.get("det_counts", {}) or {}
+        totals.update(v_cnt)
+        vlm_fields = idx.get("vlm", {}) or {}
         for r in vlm_fields.get("escape_routes_modes", []) or []:
             routes[r] += 1
         for s in vlm_fields.get("surface_level_modes", []) or []:
             surfaces[s] += 1
         videos.append({
-            "video": vs.get("video_path", p),
+            "video": idx.get("video_path", p),
             "det_counts": dict(v_cnt),
             "vlm": vlm_fields,
-            "timeline_tail": (vs.get("combined_timeline", []) or [])[-max_per_video:],
-            "synopses_tail": synopses[-synopses_tail_n:],
+            "timeline_tail": (idx.get("timeline_tail", []) or [])[-max_per_video:],
+            "synopses_tail": (idx.get("synopses_tail", []) or [])[-synopses_tail_n:],
         })
     return {
         "totals": dict(totals),
@@ -209,5 +410,3 @@ def build_job_context_from_paths(summary_paths: List[str], max_per_video: int =
         "surface_level_modes": [k for k, _ in surfaces.most_common(5)],
         "videos": videos,
     }
-
-
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import base64
 import cv2
+import numpy as np
 
 
 def b64_of_bgr(img):
@@ -10,4 +11,13 @@ def b64_of_bgr(img):
     return base64.b64encode(buf.tobytes()).decode("ascii"), "image/jpeg"
 
 
+def dhash(img, size: int = 8) -> int:
+    """64-bit difference hash of a BGR or gray image (size x size bits)."""
+    gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).reshape(-1)
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
 
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
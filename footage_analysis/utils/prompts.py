@@ -39,6 +39,15 @@ Prioritize: movement direction, surface level (ground/rooftop/stairs), pause/tou
 Include identifiers only when unambiguous; avoid speculation.
 """
 
+# LLM: Several clip synopses in one call
+CLIP_SYNOPSIS_BATCH = """
+You are given a JSON object mapping clip ids to structured clip context (detections, tracks, and any VLM batch JSON). No images are provided.
+For EACH clip id, write a 2–3 sentence, neutral, dispatch-style summary of that clip using only its own context.
+Prioritize: movement direction, surface level (ground/rooftop/stairs), pause/touch events (objects/surfaces), and any obvious escape route hints.
+Include identifiers only when unambiguous; avoid speculation.
+Return STRICT JSON only, with exactly the given clip ids as keys: {"<clip id>": "<synopsis>", ...}
+"""
+
 # LLM: Per-video narrative bullets
 VIDEO_NARRATIVE = """
 Produce 5 concise bullet points summarizing the entire video across all chunks.
@@ -0,0 +1,214 @@
+from __future__ import annotations
+import os
+import json
+import time
+import resource
+import threading
+import functools
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Chrome trace-event recording (load trace.json in chrome://tracing or ui.perfetto.dev).
+# Off by default; every entry point is a no-op until start_tracing() is called in the process.
+
+_NULL = nullcontext()
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+_tracer: Optional["Tracer"] = None
+_tracer_lock = threading.Lock()
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is KiB on linux; without /proc we only get the peak
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Tracer:
+    """Spans and counters for one process. Timestamps are wall-clock microseconds so
+    events from worker processes line up with the parent's when merged. `stats` keeps
+    count / total / max seconds per span name for the summary table.
+    """
+
+    def __init__(self, memory_interval_s: float = 0.25):
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self.stats: Dict[str, List[float]] = {}
+        self.peak_rss: Dict[int, int] = {}
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._epoch_us = time.time() * 1e6 - time.perf_counter() * 1e6
+        self.started_us = self.now_us()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        if memory_interval_s > 0:
+            self._sampler = threading.Thread(target=self._sample_loop, args=(memory_interval_s,), name="trace-memory", daemon=True)
+            self._sampler.start()
+
+    def now_us(self) -> float:
+        return self._epoch_us + time.perf_counter() * 1e6
+
+    def _tid(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        return tid
+
+    def _account(self, name: str, seconds: float, n: int = 1) -> None:
+        # max is per step; for batched `add` calls that is the batch's mean
+        step = seconds / max(n, 1)
+        st = self.stats.get(name)
+        if st is None:
+            self.stats[name] = [n, seconds, step]
+        else:
+            st[0] += n
+            st[1] += seconds
+            st[2] = max(st[2], step)
+
+    def complete(self, name: str, cat: str, start_us: float, dur_us: float, args: Optional[Dict] = None) -> None:
+        ev = {"name": name, "cat": cat, "ph": "X", "ts": round(start_us, 1), "dur": round(dur_us, 1), "pid": self.pid}
+        if args:
+            ev["args"] = args
+        with self._lock:
+            ev["tid"] = self._tid()
+            self.events.append(ev)
+            self._account(name, dur_us / 1e6)
+
+    def add(self, name: str, seconds: float, n: int = 1) -> None:
+        """Time spent in many tiny steps (per-frame decode, ...): summary only, no events."""
+        with self._lock:
+            self._account(name, seconds, n)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "stage", **args: Any) -> Iterator[None]:
+        start = self.now_us()
+        try:
+            yield
+        finally:
+            self.complete(name, cat, start, self.now_us() - start, args)
+
+    def sample_memory(self) -> int:
+        rss = _rss_bytes()
+        ev = {"name": "memory", "ph": "C", "ts": round(self.now_us(), 1), "pid": self.pid,
+              "args": {"rss_mb": round(rss / 2**20, 1)}}
+        with self._lock:
+            self.events.append(ev)
+            self.peak_rss[self.pid] = max(self.peak_rss.get(self.pid, 0), rss)
+        return rss
+
+    def _sample_loop(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            self.sample_memory()
+
+    def drain(self) -> Dict[str, Any]:
+        """Hand recorded data to another process (see `merge`) and start over."""
+        self.sample_memory()
+        with self._lock:
+            out = {"events": self.events + self._thread_events(), "stats": self.stats, "peak_rss": self.peak_rss}
+            self.events, self.stats, self.peak_rss = [], {}, {}
+        return out
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self.events.extend(data["events"])
+            for name, (n, total, mx) in data["stats"].items():
+                st = self.stats.setdefault(name, [0, 0.0, 0.0])
+                st[0] += n
+                st[1] += total
+                st[2] = max(st[2], mx)
+            for pid, rss in data["peak_rss"].items():
+                self.peak_rss[int(pid)] = max(self.peak_rss.get(int(pid), 0), rss)
+
+    def _thread_events(self) -> List[Dict[str, Any]]:
+        return [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                for tid, name in self._threads.items()]
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.sample_memory()
+
+    def write(self, path: str | Path) -> None:
+        with self._lock:
+            events = self.events + self._thread_events()
+        # workers resend their thread names with every drain
+        seen = set()
+        unique = []
+        for e in events:
+            if e["ph"] == "M":
+                key = (e["pid"], e["tid"])
+                if key in seen:
+                    continue
+                seen.add(key)
+            unique.append(e)
+        events = unique
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with open(p, "w") as f:
+            # compact: traces run to hundreds of thousands of events
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, separators=(",", ":"))
+
+    def summary_table(self) -> str:
+        wall = max(1e-9, (self.now_us() - self.started_us) / 1e6)
+        rows = sorted(self.stats.items(), key=lambda kv: -kv[1][1])
+        lines = [f"{'stage':<16} {'calls':>8} {'total s':>10} {'mean ms':>10} {'max ms':>10} {'% wall':>7}"]
+        for name, (n, total, mx) in rows:
+            lines.append(f"{name:<16} {int(n):>8} {total:>10.2f} {total / max(n, 1) * 1e3:>10.2f} {mx * 1e3:>10.2f} "
+                         f"{total / wall * 100:>6.1f}%")
+        lines.append(f"wall {wall:.2f}s; stages nest and run on several threads/processes, so % can exceed 100")
+        for pid, rss in sorted(self.peak_rss.items()):
+            lines.append(f"peak rss pid={pid}{' (main)' if pid == self.pid else ''}: {rss / 2**20:.1f} MB")
+        return "\n".join(lines)
+
+
+def start_tracing(cfg: Dict) -> Tracer:
+    """Enable tracing in this process (idempotent)."""
+    global _tracer
+    with _tracer_lock:
+        # a forked worker inherits the parent's tracer, minus its sampler thread
+        if _tracer is None or _tracer.pid != os.getpid():
+            _tracer = Tracer(float(cfg.get("trace_memory_interval_ms", 250)) / 1000.0)
+        return _tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    global _tracer
+    with _tracer_lock:
+        tr, _tracer = _tracer, None
+    if tr is not None:
+        tr.stop()
+    return tr
+
+
+def span(name: str, cat: str = "stage", **args: Any):
+    tr = _tracer
+    return tr.span(name, cat, **args) if tr is not None else _NULL
+
+
+def add_time(name: str, seconds: float, n: int = 1) -> None:
+    tr = _tracer
+    if tr is not None:
+        tr.add(name, seconds, n)
+
+
+def traced(name: str, cat: str = "stage") -> Callable:
+    """Decorator form of `span`."""
+    def deco(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*a: Any, **kw: Any) -> Any:
+            tr = _tracer
+            if tr is None:
+                return fn(*a, **kw)
+            with tr.span(name, cat):
+                return fn(*a, **kw)
+        return wrapper
+    return deco
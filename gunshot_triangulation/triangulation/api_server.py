@@ -257,6 +257,22 @@ def get_microphone_info():
             'error': str(e)
         }), 500
 
+@app.route('/api/job-report', methods=['POST'])
+def push_job_report():
+    """Relay a footage analysis job report to dashboard clients (footage_analysis job_report_push_url)."""
+    try:
+        report = request.get_json(force=True)
+        socketio.emit('job_report', report)
+        return jsonify({
+            'success': True,
+            'version': report.get('version')
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
 if __name__ == '__main__':
     print("Starting Gunshot Localization API Server with WebSocket support...")
     print("Fixed Microphone Configuration:")
@@ -76,6 +76,15 @@ export async function GET(req: NextRequest) {
                   const perClass: Record<string, number> = {};
                   const sample: Array<{ cls: string; conf: number; track_id?: number; t_abs_sec?: number; bbox_xyxy?: number[] }>
                     = [];
+                  // columnar clips keep detections in clip_*.dets.npz and ship a precomputed summary
+                  if (data?.det_counts && typeof data.det_counts === "object") {
+                    Object.assign(perClass, data.det_counts);
+                  }
+                  for (const d of Array.isArray(data?.top_detections) ? data.top_detections : []) {
+                    const ms = typeof d?.ms_from_chunk_start === "number" ? d.ms_from_chunk_start : 0;
+                    const tAbs = startSec != null ? startSec + ms / 1000.0 : undefined;
+                    sample.push({ cls: d?.cls ?? "unknown", conf: typeof d?.conf === "number" ? d.conf : 0, track_id: d?.track_id, t_abs_sec: tAbs, bbox_xyxy: d?.bbox_xyxy });
+                  }
                   for (const fr of frames) {
                     const ms = typeof fr.ms_from_chunk_start === "number" ? fr.ms_from_chunk_start : 0;
                     const tAbs = startSec != null ? startSec + ms / 1000.0 : undefined;
@@ -92,13 +101,14 @@ export async function GET(req: NextRequest) {
                   const top5 = sample.slice(0, 5);
                   // pick first VLM json if present
                   let vlm: any = null;
-                  for (const fr of frames) {
+                  const vlmFrames = Array.isArray(data?.vlm_frames) ? data.vlm_frames : frames;
+                  for (const fr of vlmFrames) {
                     if (fr && fr.vlm_json) { vlm = fr.vlm_json; break; }
                   }
                   const digest = {
                     startSec,
                     endSec,
-                    framesCount: frames.length,
+                    framesCount: typeof data?.frames_count === "number" ? data.frames_count : frames.length,
                     trackletsCount: data?.tracklets ? Object.keys(data.tracklets).length : 0,
                     perClassCounts: perClass,
                     topDetections: top5,
@@ -403,6 +403,9 @@ export default function ChunkExplorerPage({ params }: { params: Promise<{ video:
                         || (Array.isArray((summaryJson as any)?.clip_summaries)
                               ? (summaryJson as any).clip_summaries.find((c: any) => c?.chunk_index === selectedChunkIndex)?.synopsis
                               : null)
+                        || (Array.isArray((summaryJson as any)?.clip_refs)
+                              ? (summaryJson as any).clip_refs.find((c: any) => c?.chunk_index === selectedChunkIndex)?.synopsis
+                              : null)
                         || "No synopsis available."}
                     </div>
 